@@ -0,0 +1,6 @@
+"""
+Benchmarks for the client hot path.
+
+Run them with ``python -m benchmarks`` from the root of the repository. See
+``python -m benchmarks --help`` for the available options.
+"""
@@ -0,0 +1,271 @@
+"""
+Benchmarks of the client hot path: per-operation overhead and throughput.
+"""
+
+import copy
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+import requests
+import yaml
+
+from zds_client import Client, ClientAuth
+from zds_client.cache import MemoryCache, SharedCache
+from zds_client.log import Log
+from zds_client.oas import schema_fetcher
+from zds_client.schema import get_headers, get_operation_url
+from zds_client.transport import RecordingTransport, ReplayTransport
+from zds_client.validation import get_request_validator
+
+from .schema import make_zaak
+from .stub_server import StubServer
+from .utils import measure, measure_calls, throughput
+
+ALIAS = "bench"
+
+IMPORT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import zds_client
+print(json.dumps(time.perf_counter() - start))
+"""
+
+
+def _get_client() -> Client:
+    client = Client(ALIAS)
+    client.auth = ClientAuth("bench", "bench-secret-of-sufficient-length-0123456789")
+    return client
+
+
+def bench_operation_overhead(results, server: StubServer, options):
+    client = _get_client()
+    schema = client.schema
+    zaak = server.zaken[0]
+    page = json.dumps(server.get_page({})).encode("utf-8")
+    number = options.number
+
+    def operation_url():
+        get_operation_url(
+            schema, "zaak_read", base_url=client.base_url, uuid=zaak["uuid"]
+        )
+
+    def fresh_credentials():
+        ClientAuth(
+            "bench", "bench-secret-of-sufficient-length-0123456789"
+        ).credentials()
+
+    def log_entry():
+        Log.add(
+            ALIAS,
+            zaak["url"],
+            "POST",
+            {"Accept": "application/json"},
+            copy.deepcopy(zaak),
+            201,
+            {"Content-Type": "application/json"},
+            zaak,
+        )
+
+    validator = get_request_validator(schema, "zaak_create")
+    body = {
+        key: value
+        for key, value in zaak.items()
+        if key not in ("url", "uuid", "status", "einddatum")
+    }
+
+    benchmarks = [
+        ("get_operation_url", operation_url),
+        ("get_headers", lambda: get_headers(schema, "zaak_read")),
+        ("build_headers", lambda: client._build_headers("zaak_read")),
+        (
+            "build_headers.extra",
+            lambda: client._build_headers("zaak_read", {"X-Request-ID": "1"}),
+        ),
+        ("auth.credentials", client.auth.credentials),
+        ("auth.credentials.fresh", fresh_credentials),
+        ("log.add", log_entry),
+        ("json.decode.page", lambda: json.loads(page)),
+        ("json.encode.object", lambda: json.dumps(zaak)),
+        ("validate.zaak_create", lambda: validator.validate(body)),
+    ]
+    for name, func in benchmarks:
+        results.add_timing("overhead." + name, measure(func, number=number))
+    Log.clear()
+
+    # the latency of a full client call, compared to the bare requests call
+    calls = options.calls
+    results.add_timing(
+        "latency.requests.get",
+        measure_calls(lambda: requests.get(zaak["url"]).json(), number=calls),
+    )
+    results.add_timing(
+        "latency.client.retrieve",
+        measure_calls(lambda: client.retrieve("zaak", url=zaak["url"]), number=calls),
+    )
+    Log.clear()
+
+
+def bench_throughput(results, server: StubServer, options):
+    zaak = server.zaken[0]
+    data = {
+        key: value
+        for key, value in make_zaak(server.base_url, 0).items()
+        if key not in ("url", "uuid", "status", "einddatum")
+    }
+
+    operations = {
+        "list": lambda client: client.list("zaak"),
+        "retrieve": lambda client: client.retrieve("zaak", uuid=zaak["uuid"]),
+        "create": lambda client: client.create("zaak", data),
+    }
+
+    for name, operation in operations.items():
+        for concurrency in options.concurrency:
+            client = _get_client()
+            ops = throughput(
+                lambda: operation(client),
+                calls=options.calls,
+                concurrency=concurrency,
+            )
+            results.add("throughput." + name, "ops/s", ops, concurrency=concurrency)
+            Log.clear()
+
+
+def bench_schema(results, server: StubServer, options):
+    client = _get_client()
+
+    def load_schema():
+        schema_fetcher.cache.clear()
+        client.fetch_schema()
+
+    results.add_timing(
+        "schema.load", measure_calls(load_schema, number=max(options.calls // 10, 5))
+    )
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        spec = yaml.safe_load(server.schema_content)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del spec
+    results.add("schema.memory", "bytes", after - before)
+    results.add("schema.size", "bytes", len(server.schema_content))
+
+
+def bench_cache(results, server: StubServer, options):
+    zaak = server.zaken[0]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        backends = {
+            "memory": MemoryCache(),
+            "shared": SharedCache(os.path.join(tmpdir, "cache.sqlite")),
+        }
+        for name, cache in backends.items():
+            cache.set("zaak", zaak)
+            cache.set("schema", server.schema)
+            results.add_timing(
+                "cache.{}.get.object".format(name),
+                measure(lambda: cache.get("zaak"), number=options.number),
+            )
+            results.add_timing(
+                "cache.{}.get.schema".format(name),
+                measure(lambda: cache.get("schema"), number=options.number // 10),
+            )
+            results.add_timing(
+                "cache.{}.set.object".format(name),
+                measure(lambda: cache.set("zaak", zaak), number=options.number // 10),
+            )
+
+
+def bench_transport(results, server: StubServer, options):
+    zaak = server.zaken[0]
+    transport = Client.transport
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "recording.jsonl")
+        recorder = Client.transport = RecordingTransport(path)
+        try:
+            client = _get_client()
+            results.add_timing(
+                "latency.client.retrieve.recorded",
+                measure_calls(
+                    lambda: client.retrieve("zaak", url=zaak["url"]),
+                    number=options.calls,
+                ),
+            )
+            recorder.close()
+
+            Client.transport = ReplayTransport(path)
+            client = _get_client()
+            for concurrency in options.concurrency:
+                ops = throughput(
+                    lambda: client.retrieve("zaak", url=zaak["url"]),
+                    calls=options.calls,
+                    concurrency=concurrency,
+                )
+                results.add(
+                    "throughput.retrieve.replayed",
+                    "ops/s",
+                    ops,
+                    concurrency=concurrency,
+                )
+        finally:
+            Client.transport = transport
+            Log.clear()
+
+
+def bench_streaming(results, server: StubServer, options):
+    # a single large page, where streaming matters most
+    with StubServer(objects=options.objects, page_size=options.objects) as large:
+        Client.load_config(**{ALIAS: large.client_config})
+        client = _get_client()
+        number = max(options.calls // 50, 5)
+
+        def first_listed():
+            return client.list("zaak")["results"][0]
+
+        def first_streamed():
+            with client.request("zaken", "zaak_list", stream=True) as page:
+                return next(page)
+
+        benchmarks = [
+            ("list.first", first_listed),
+            ("list.all", lambda: client.list("zaak")),
+            ("iter_list.first", first_streamed),
+            ("iter_list.all", lambda: list(client.iter_list("zaak"))),
+        ]
+        for name, func in benchmarks:
+            results.add_timing(
+                "streaming." + name,
+                measure_calls(func, number=number),
+                objects=options.objects,
+            )
+    Client.load_config(**{ALIAS: server.client_config})
+    Log.clear()
+
+
+def bench_import_time(results, server: StubServer, options):
+    timings = [
+        json.loads(subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT]))
+        for _ in range(5)
+    ]
+    results.add("import.zds_client", "s", min(timings), stats={"runs": timings})
+
+
+def run(results, options):
+    with StubServer(objects=options.objects, page_size=options.page_size) as server:
+        Client.load_config(**{ALIAS: server.client_config})
+        schema_fetcher.cache.clear()
+
+        bench_operation_overhead(results, server, options)
+        bench_throughput(results, server, options)
+        bench_schema(results, server, options)
+        bench_cache(results, server, options)
+        bench_transport(results, server, options)
+        bench_streaming(results, server, options)
+        bench_import_time(results, server, options)
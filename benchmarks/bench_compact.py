@@ -0,0 +1,57 @@
+"""
+Benchmarks of compact decoding of a large export, paged like list responses.
+"""
+
+import gc
+import json
+import time
+import tracemalloc
+
+from zds_client.compact import CompactDecoder
+
+from .schema import make_zaken
+
+BASE_URL = "https://zaken.example.com/api/v1"
+
+
+def make_pages(count: int, page_size: int) -> list:
+    zaken = make_zaken(BASE_URL, count)
+    return [
+        json.dumps(
+            {"count": count, "results": zaken[start : start + page_size]}
+        ).encode("utf-8")
+        for start in range(0, count, page_size)
+    ]
+
+
+def _decode_all(pages: list, decode) -> list:
+    results = []
+    for page in pages:
+        results += decode(page)["results"]
+    return results
+
+
+def run(results, options):
+    count = 5000 if options.quick else 100000
+    pages = make_pages(count, options.page_size)
+
+    decoders = {
+        "json": lambda: json.loads,
+        "strings": lambda: CompactDecoder().decode,
+        "records": lambda: CompactDecoder(records=True).decode,
+    }
+    for name, get_decode in decoders.items():
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            objects = _decode_all(pages, get_decode())
+            duration = time.perf_counter() - start
+            memory = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        del objects
+
+        results.add("compact.memory", "bytes", memory, decoder=name, objects=count)
+        # timed under tracemalloc, only comparable between the decoders
+        results.add("compact.decode", "s", duration, decoder=name, objects=count)
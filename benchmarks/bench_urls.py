@@ -0,0 +1,65 @@
+"""
+Benchmarks of bulk URL processing: extracting parameters and matching operations.
+"""
+
+import uuid
+
+from zds_client import Client, extract_params
+from zds_client.routing import Router
+from zds_client.schema import compile_pattern, compile_schema
+
+from .schema import RESOURCES, get_schema
+from .utils import measure
+
+ALIAS = "bench-urls"
+BASE_URL = "https://zaken.example.com/api/v1"
+
+
+def make_urls(count: int) -> list:
+    """
+    Build detail URLs of all resources of the schema, in turn.
+    """
+    urls = []
+    for index in range(count):
+        _, collection, parent, _ = RESOURCES[index % len(RESOURCES)]
+        path = collection.format(**{parent: uuid.UUID(int=index)} if parent else {})
+        urls.append("{}{}/{}".format(BASE_URL, path, uuid.UUID(int=index)))
+    return urls
+
+
+def run(results, options):
+    count = 1000 if options.quick else 100000
+    zaak_urls = [
+        "{}/zaken/{}".format(BASE_URL, uuid.UUID(int=index)) for index in range(count)
+    ]
+    urls = make_urls(count)
+    spec = get_schema("/api/v1")
+    repeat = 3 if options.quick else 5
+
+    pattern = "/api/v1/zaken/{uuid}"
+    compiled = compile_pattern(pattern)
+    benchmarks = [
+        ("extract_params", lambda: [extract_params(url, pattern) for url in zaak_urls]),
+        ("pattern.match", lambda: [compiled.match(url) for url in zaak_urls]),
+        ("pattern.match_many", lambda: list(compiled.match_many(zaak_urls))),
+    ]
+    for name, func in benchmarks:
+        results.add_timing(
+            "urls." + name, measure(func, number=1, repeat=repeat), urls=count
+        )
+
+    # match URLs of any resource to their operation (and service)
+    Client.load_config(**{ALIAS: {"scheme": "https", "host": "zaken.example.com"}})
+    client = Client(ALIAS)
+    client._schema = spec
+    router = Router()
+    router.add(client)
+    schema = compile_schema(spec)
+    benchmarks = [
+        ("schema.match_urls", lambda: list(schema.match_urls(urls))),
+        ("router.route_many", lambda: list(router.route_many(urls))),
+    ]
+    for name, func in benchmarks:
+        results.add_timing(
+            "urls." + name, measure(func, number=1, repeat=repeat), urls=count
+        )
@@ -0,0 +1,114 @@
+"""
+Run the benchmarks and report machine-readable (JSON) results.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+
+import zds_client
+
+from . import bench_client, bench_compact, bench_urls
+from .utils import Results
+
+SUITES = {
+    "client": bench_client.run,
+    "compact": bench_compact.run,
+    "urls": bench_urls.run,
+}
+
+
+def _setup_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the ZDS client")
+    parser.add_argument(
+        "suites",
+        nargs="*",
+        help="The benchmark suites to run ({}), defaults to all of them".format(
+            ", ".join(sorted(SUITES))
+        ),
+    )
+    parser.add_argument("--output", "-o", help="Write the JSON results to this file")
+    parser.add_argument(
+        "--compare", help="Compare the results against an earlier JSON results file"
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Fewer iterations, for smoke testing"
+    )
+    parser.add_argument("--objects", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    return parser
+
+
+def get_options(argv=None) -> argparse.Namespace:
+    parser = _setup_parser()
+    options = parser.parse_args(argv)
+    unknown = set(options.suites) - set(SUITES)
+    if unknown:
+        parser.error("unknown suite(s): {}".format(", ".join(sorted(unknown))))
+    options.number = 50 if options.quick else 2000
+    options.calls = 20 if options.quick else 500
+    options.concurrency = [1, 4] if options.quick else [1, 4, 16, 32]
+    return options
+
+
+def get_meta(options) -> dict:
+    return {
+        "zds_client": zds_client.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+        "quick": options.quick,
+    }
+
+
+def run(options) -> dict:
+    results = Results()
+    for name in options.suites or sorted(SUITES):
+        SUITES[name](results, options)
+    return {"meta": get_meta(options), "results": results.results}
+
+
+def compare(baseline: dict, current: dict) -> list:
+    """
+    Calculate the ratio current/baseline for every result present in both.
+    """
+
+    def _key(result):
+        return (result["name"], json.dumps(result["params"], sort_keys=True))
+
+    baseline_values = {_key(result): result["value"] for result in baseline["results"]}
+    comparison = []
+    for result in current["results"]:
+        previous = baseline_values.get(_key(result))
+        if not previous:
+            continue
+        comparison.append(
+            {
+                "name": result["name"],
+                "params": result["params"],
+                "unit": result["unit"],
+                "baseline": previous,
+                "current": result["value"],
+                "ratio": result["value"] / previous,
+            }
+        )
+    return comparison
+
+
+def main(argv=None):
+    options = get_options(argv)
+    report = run(options)
+
+    if options.compare:
+        with open(options.compare) as infile:
+            report["comparison"] = compare(json.load(infile), report)
+
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w") as outfile:
+            outfile.write(output)
+    else:
+        sys.stdout.write(output + "\n")
@@ -0,0 +1,277 @@
+"""
+A realistic OAS 3.0 schema and fixture data, modelled after the Zaken API.
+"""
+
+import uuid
+from typing import List
+
+CRS_HEADERS = [
+    {"$ref": "#/components/parameters/Accept-Crs"},
+]
+CONTENT_CRS_HEADERS = [
+    {"$ref": "#/components/parameters/Accept-Crs"},
+    {"$ref": "#/components/parameters/Content-Crs"},
+]
+
+# (resource, collection path, parent path parameter, geo headers)
+RESOURCES = [
+    ("zaak", "/zaken", None, True),
+    ("status", "/statussen", None, False),
+    ("rol", "/rollen", None, False),
+    ("resultaat", "/resultaten", None, False),
+    ("zaakobject", "/zaakobjecten", None, False),
+    ("zaakinformatieobject", "/zaakinformatieobjecten", None, False),
+    ("klantcontact", "/klantcontacten", None, False),
+    ("zaakeigenschap", "/zaken/{zaak_uuid}/zaakeigenschappen", "zaak_uuid", False),
+    ("zaakbesluit", "/zaken/{zaak_uuid}/besluiten", "zaak_uuid", False),
+    ("zaakcontactmoment", "/zaakcontactmomenten", None, False),
+    ("zaakverzoek", "/zaakverzoeken", None, False),
+]
+
+ZAAKTYPEN = [
+    "http://ztc.example.com/api/v1/zaaktypen/{}".format(uuid.UUID(int=i))
+    for i in range(1, 26)
+]
+STATUSTYPEN = [
+    "http://ztc.example.com/api/v1/statustypen/{}".format(uuid.UUID(int=i))
+    for i in range(100, 110)
+]
+BRONORGANISATIES = ["002220647", "517439943", "000000000", "123456782"]
+VERTROUWELIJKHEIDAANDUIDINGEN = [
+    "openbaar",
+    "beperkt_openbaar",
+    "intern",
+    "zaakvertrouwelijk",
+    "vertrouwelijk",
+    "confidentieel",
+    "geheim",
+    "zeer_geheim",
+]
+
+ZAAK_SCHEMA = {
+    "required": [
+        "bronorganisatie",
+        "zaaktype",
+        "verantwoordelijkeOrganisatie",
+        "startdatum",
+    ],
+    "type": "object",
+    "properties": {
+        "url": {"type": "string", "format": "uri", "readOnly": True},
+        "uuid": {"type": "string", "format": "uuid", "readOnly": True},
+        "identificatie": {"type": "string", "maxLength": 40},
+        "bronorganisatie": {"type": "string", "maxLength": 9, "minLength": 1},
+        "omschrijving": {"type": "string", "maxLength": 80},
+        "toelichting": {"type": "string", "maxLength": 1000},
+        "zaaktype": {"type": "string", "format": "uri", "maxLength": 1000},
+        "registratiedatum": {"type": "string", "format": "date"},
+        "verantwoordelijkeOrganisatie": {
+            "type": "string",
+            "maxLength": 9,
+            "minLength": 1,
+        },
+        "startdatum": {"type": "string", "format": "date"},
+        "einddatum": {
+            "type": "string",
+            "format": "date",
+            "readOnly": True,
+            "nullable": True,
+        },
+        "vertrouwelijkheidaanduiding": {
+            "type": "string",
+            "enum": VERTROUWELIJKHEIDAANDUIDINGEN,
+        },
+        "betalingsindicatie": {
+            "type": "string",
+            "enum": ["", "nvt", "nog_niet", "gedeeltelijk", "geheel"],
+        },
+        "status": {
+            "type": "string",
+            "format": "uri",
+            "readOnly": True,
+            "nullable": True,
+        },
+        "kenmerken": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["kenmerk", "bron"],
+                "properties": {
+                    "kenmerk": {"type": "string", "maxLength": 40},
+                    "bron": {"type": "string", "maxLength": 40},
+                },
+            },
+        },
+        "archiefnominatie": {
+            "type": "string",
+            "enum": ["blijvend_bewaren", "vernietigen"],
+            "nullable": True,
+        },
+    },
+}
+
+GENERIC_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "url": {"type": "string", "format": "uri", "readOnly": True},
+        "uuid": {"type": "string", "format": "uuid", "readOnly": True},
+        "zaak": {"type": "string", "format": "uri"},
+        "omschrijving": {"type": "string", "maxLength": 80},
+    },
+}
+
+
+def _capitalize(resource: str) -> str:
+    return resource[0].upper() + resource[1:]
+
+
+def _path_parameter(name: str) -> dict:
+    return {
+        "name": name,
+        "in": "path",
+        "required": True,
+        "schema": {"type": "string", "format": "uuid"},
+    }
+
+
+def _operations(resource, collection, parent, geo) -> dict:
+    component = {"$ref": "#/components/schemas/{}".format(_capitalize(resource))}
+    body = {"content": {"application/json": {"schema": component}}, "required": True}
+    ok = {"description": "OK", "content": {"application/json": {"schema": component}}}
+    headers = CRS_HEADERS if geo else []
+    content_headers = CONTENT_CRS_HEADERS if geo else []
+    detail = "{}/{{uuid}}".format(collection)
+
+    list_response = {
+        "description": "OK",
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "count": {"type": "integer"},
+                        "next": {"type": "string", "nullable": True},
+                        "previous": {"type": "string", "nullable": True},
+                        "results": {"type": "array", "items": component},
+                    },
+                }
+            }
+        },
+    }
+
+    collection_item = {
+        "get": {
+            "operationId": "{}_list".format(resource),
+            "parameters": headers
+            + [
+                {"name": "page", "in": "query", "schema": {"type": "integer"}},
+                {"name": "zaaktype", "in": "query", "schema": {"type": "string"}},
+                {
+                    "name": "bronorganisatie",
+                    "in": "query",
+                    "schema": {"type": "string"},
+                },
+            ],
+            "responses": {"200": list_response},
+        },
+        "post": {
+            "operationId": "{}_create".format(resource),
+            "parameters": content_headers,
+            "requestBody": body,
+            "responses": {"201": ok},
+        },
+        "parameters": [_path_parameter(parent)] if parent else [],
+    }
+
+    detail_parameters = [_path_parameter("uuid")]
+    if parent:
+        detail_parameters.insert(0, _path_parameter(parent))
+
+    detail_item = {
+        "get": {
+            "operationId": "{}_read".format(resource),
+            "parameters": headers,
+            "responses": {"200": ok},
+        },
+        "put": {
+            "operationId": "{}_update".format(resource),
+            "parameters": content_headers,
+            "requestBody": body,
+            "responses": {"200": ok},
+        },
+        "patch": {
+            "operationId": "{}_partial_update".format(resource),
+            "parameters": content_headers,
+            "requestBody": body,
+            "responses": {"200": ok},
+        },
+        "delete": {
+            "operationId": "{}_delete".format(resource),
+            "responses": {"204": {"description": "No content"}},
+        },
+        "parameters": detail_parameters,
+    }
+    return {collection: collection_item, detail: detail_item}
+
+
+def get_schema(server_url: str = "/api/v1") -> dict:
+    paths = {}
+    schemas = {}
+    for resource, collection, parent, geo in RESOURCES:
+        paths.update(_operations(resource, collection, parent, geo))
+        schemas[_capitalize(resource)] = (
+            ZAAK_SCHEMA if resource == "zaak" else GENERIC_SCHEMA
+        )
+
+    crs = {"type": "string", "enum": ["EPSG:4326"]}
+    return {
+        "openapi": "3.0.2",
+        "info": {"title": "Zaken API", "version": "1.0.0"},
+        "servers": [{"url": server_url}],
+        "paths": paths,
+        "components": {
+            "parameters": {
+                "Accept-Crs": {
+                    "name": "Accept-Crs",
+                    "in": "header",
+                    "required": True,
+                    "schema": crs,
+                },
+                "Content-Crs": {
+                    "name": "Content-Crs",
+                    "in": "header",
+                    "required": True,
+                    "schema": crs,
+                },
+            },
+            "schemas": schemas,
+        },
+    }
+
+
+def make_zaak(base_url: str, index: int) -> dict:
+    _uuid = str(uuid.UUID(int=index + 1))
+    return {
+        "url": "{}/zaken/{}".format(base_url, _uuid),
+        "uuid": _uuid,
+        "identificatie": "ZAAK-2021-{:010d}".format(index),
+        "bronorganisatie": BRONORGANISATIES[index % len(BRONORGANISATIES)],
+        "omschrijving": "Aanvraag omgevingsvergunning {}".format(index),
+        "toelichting": "",
+        "zaaktype": ZAAKTYPEN[index % len(ZAAKTYPEN)],
+        "registratiedatum": "2021-03-16",
+        "verantwoordelijkeOrganisatie": BRONORGANISATIES[0],
+        "startdatum": "2021-03-16",
+        "einddatum": None,
+        "vertrouwelijkheidaanduiding": VERTROUWELIJKHEIDAANDUIDINGEN[
+            index % len(VERTROUWELIJKHEIDAANDUIDINGEN)
+        ],
+        "betalingsindicatie": "nvt",
+        "status": "{}/statussen/{}".format(base_url, uuid.UUID(int=10**6 + index)),
+        "kenmerken": [{"kenmerk": "kenmerk-{}".format(index), "bron": "bench"}],
+        "archiefnominatie": None,
+    }
+
+
+def make_zaken(base_url: str, count: int) -> List[dict]:
+    return [make_zaak(base_url, index) for index in range(count)]
@@ -0,0 +1,187 @@
+"""
+In-process stub of a ZDS API, serving a realistic schema and paginated responses.
+"""
+
+import gzip
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+import yaml
+
+from .schema import get_schema, make_zaken
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, don't stall keep-alive connections
+    disable_nagle_algorithm = True
+
+    # set on the (per server) subclass
+    stub = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.stub.handle(self, "GET")
+
+    def do_HEAD(self):
+        self.stub.handle(self, "HEAD")
+
+    def do_POST(self):
+        self.stub.handle(self, "POST")
+
+    def do_PUT(self):
+        self.stub.handle(self, "PUT")
+
+    def do_PATCH(self):
+        self.stub.handle(self, "PATCH")
+
+    def do_DELETE(self):
+        self.stub.handle(self, "DELETE")
+
+
+class StubServer:
+    """
+    Serve a Zaken API stub on localhost, in a background thread.
+
+    Usage:
+
+    >>> with StubServer(objects=1000, page_size=100) as server:
+            Client.load_config(zrc=server.client_config)
+            ...
+
+    :param objects: number of zaken in the collection
+    :param page_size: number of zaken per list page
+    :param latency: a number of seconds, or a callable returning a number of
+      seconds, to delay each response with
+    :param compress: gzip responses for clients accepting it
+    """
+
+    base_path = "/api/v1"
+
+    def __init__(
+        self, objects: int = 1000, page_size: int = 100, latency=0, compress=False
+    ):
+        self.page_size = page_size
+        self.latency = latency
+        self.compress = compress
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        handler = type("Handler", (StubHandler,), {"stub": self})
+        self.httpd = _ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.port = self.httpd.server_address[1]
+        self.base_url = "http://127.0.0.1:{}{}".format(self.port, self.base_path)
+
+        self.schema = get_schema(self.base_path)
+        self.schema_content = yaml.safe_dump(self.schema).encode("utf-8")
+        self.zaken = make_zaken(self.base_url, objects)
+        self._by_uuid = {zaak["uuid"]: zaak for zaak in self.zaken}
+        self._thread = None
+
+    @property
+    def client_config(self) -> dict:
+        return {"scheme": "http", "host": "127.0.0.1", "port": self.port}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str):
+        with self._lock:
+            self.requests += 1
+
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        if request.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+
+        parsed = urlparse(request.path)
+        path = parsed.path[len(self.base_path) :]
+        query = parse_qs(parsed.query)
+
+        if path == "/schema/openapi.yaml":
+            return self.respond(
+                request, 200, self.schema_content, "application/vnd.oai.openapi"
+            )
+
+        bits = [bit for bit in path.split("/") if bit]
+        if bits[:1] != ["zaken"] or len(bits) > 2:
+            return self.respond_json(request, 404, {"detail": "Niet gevonden."})
+
+        if len(bits) == 1 and method in ("GET", "HEAD"):
+            return self.respond_json(request, 200, self.get_page(query))
+
+        if len(bits) == 1 and method == "POST":
+            data = json.loads(body)
+            _uuid = str(uuid.uuid4())
+            data.update(
+                {"url": "{}/zaken/{}".format(self.base_url, _uuid), "uuid": _uuid}
+            )
+            return self.respond_json(request, 201, data)
+
+        zaak = self._by_uuid.get(bits[1])
+        if zaak is None:
+            return self.respond_json(request, 404, {"detail": "Niet gevonden."})
+        if method == "DELETE":
+            return self.respond(request, 204, b"")
+        if method in ("PUT", "PATCH"):
+            return self.respond_json(request, 200, dict(zaak, **json.loads(body)))
+        return self.respond_json(request, 200, zaak)
+
+    def get_page(self, query: dict) -> dict:
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * self.page_size
+        end = start + self.page_size
+
+        def page_url(number):
+            return "{}/zaken?page={}".format(self.base_url, number)
+
+        return {
+            "count": len(self.zaken),
+            "next": page_url(page + 1) if end < len(self.zaken) else None,
+            "previous": page_url(page - 1) if page > 1 else None,
+            "results": self.zaken[start:end],
+        }
+
+    def respond_json(self, request, status: int, data):
+        content = json.dumps(data).encode("utf-8")
+        return self.respond(request, status, content, "application/json")
+
+    def respond(self, request, status: int, content: bytes, content_type=None):
+        request.send_response(status)
+        if content_type:
+            request.send_header("Content-Type", content_type)
+        if self.compress and "gzip" in request.headers.get("Accept-Encoding", ""):
+            content = gzip.compress(content)
+            request.send_header("Content-Encoding", "gzip")
+        request.send_header("Content-Length", str(len(content)))
+        request.end_headers()
+        if request.command != "HEAD":
+            request.wfile.write(content)
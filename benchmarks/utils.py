@@ -0,0 +1,93 @@
+import gc
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+
+def _percentile(timings: List[float], percentile: float) -> float:
+    ordered = sorted(timings)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(timings: List[float]) -> dict:
+    return {
+        "n": len(timings),
+        "min": min(timings),
+        "mean": statistics.mean(timings),
+        "median": statistics.median(timings),
+        "p95": _percentile(timings, 95),
+        "p99": _percentile(timings, 99),
+    }
+
+
+def measure(func: Callable, number: int = 1000, repeat: int = 5) -> dict:
+    """
+    Time ``func`` in ``repeat`` batches of ``number`` calls.
+
+    The statistics are in seconds per call.
+    """
+    func()  # warm up caches
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            timings.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return summarize(timings)
+
+
+def measure_calls(func: Callable, number: int = 100) -> dict:
+    """
+    Time ``number`` individual calls of ``func``, for latency distributions.
+    """
+    func()
+    timings = []
+    for _ in range(number):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def throughput(func: Callable, calls: int, concurrency: int) -> float:
+    """
+    Run ``func`` ``calls`` times on ``concurrency`` threads, return calls/second.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # warm up the worker threads
+        list(executor.map(lambda _: func(), range(concurrency)))
+        start = time.perf_counter()
+        list(executor.map(lambda _: func(), range(calls)))
+        duration = time.perf_counter() - start
+    return calls / duration
+
+
+class Results:
+    """
+    Collect benchmark results in a machine-readable structure.
+    """
+
+    def __init__(self):
+        self.results = []
+
+    def add(self, name: str, unit: str, value: float, stats: dict = None, **params):
+        self.results.append(
+            {
+                "name": name,
+                "params": params,
+                "unit": unit,
+                "value": value,
+                "stats": stats,
+            }
+        )
+
+    def add_timing(self, name: str, stats: dict, **params):
+        self.add(name, "s", stats["median"], stats=stats, **params)
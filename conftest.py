@@ -0,0 +1,3 @@
+# Makes pytest put the repository root on sys.path (rootdir conftest, "prepend"
+# import mode), so the tests can import the benchmarks package without tox
+# setting PYTHONPATH.
@@ -0,0 +1,66 @@
+"""
+Smoke test the benchmark suite, so it doesn't silently break.
+"""
+
+import json
+
+import pytest
+
+from benchmarks.run import compare, get_options, main
+
+
+def test_benchmarks_quick_run(tmpdir):
+    output = tmpdir.join("results.json")
+
+    main(
+        ["client", "--quick", "--objects", "50", "--page-size", "10", "-o", str(output)]
+    )
+
+    report = json.loads(output.read())
+    assert report["meta"]["quick"] is True
+    names = {result["name"] for result in report["results"]}
+    assert {
+        "overhead.get_operation_url",
+        "overhead.get_headers",
+        "throughput.list",
+        "schema.load",
+        "schema.memory",
+        "import.zds_client",
+    } <= names
+
+
+def test_urls_benchmarks_quick_run(tmpdir):
+    output = tmpdir.join("results.json")
+
+    main(["urls", "--quick", "-o", str(output)])
+
+    names = {result["name"] for result in json.loads(output.read())["results"]}
+    assert {"urls.extract_params", "urls.pattern.match_many"} <= names
+
+
+def test_compact_benchmarks_quick_run(tmpdir):
+    output = tmpdir.join("results.json")
+
+    main(["compact", "--quick", "-o", str(output)])
+
+    results = json.loads(output.read())["results"]
+    memory = {
+        result["params"]["decoder"]: result["value"]
+        for result in results
+        if result["name"] == "compact.memory"
+    }
+    assert memory["records"] < memory["strings"] < memory["json"]
+
+
+def test_compare_results():
+    baseline = {"results": [{"name": "a", "params": {}, "unit": "s", "value": 2.0}]}
+    current = {"results": [{"name": "a", "params": {}, "unit": "s", "value": 1.0}]}
+
+    comparison = compare(baseline, current)
+
+    assert comparison[0]["ratio"] == 0.5
+
+
+def test_unknown_suite(capsys):
+    with pytest.raises(SystemExit):
+        get_options(["nope"])
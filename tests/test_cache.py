@@ -0,0 +1,220 @@
+import multiprocessing
+import sys
+import time
+
+import pytest
+import requests_mock
+
+from zds_client import Client
+from zds_client.cache import MemoryCache, SharedCache
+from zds_client.oas import SchemaFetcher
+from zds_client.schema import compile_schema
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/api/v1"}],
+    "paths": {
+        "/zaken": {"get": {"operationId": "zaak_list"}},
+        "/zaken/{uuid}": {
+            "get": {"operationId": "zaak_read"},
+            "patch": {"operationId": "zaak_partial_update"},
+        },
+    },
+}
+
+ZAAK_URL = "https://example.com/api/v1/zaken/1"
+
+
+@pytest.fixture(params=["memory", "shared"])
+def cache(request, tmpdir):
+    if request.param == "memory":
+        return MemoryCache(max_entries=3)
+    return SharedCache(str(tmpdir.join("cache.sqlite")), max_size=1000)
+
+
+def test_cache_interface(cache):
+    cache["foo"] = {"bar": [1, 2]}
+
+    assert "foo" in cache
+    assert cache["foo"] == {"bar": [1, 2]}
+    assert cache.get("missing") is None
+    assert len(cache) == 1
+
+    del cache["foo"]
+
+    assert "foo" not in cache
+    with pytest.raises(KeyError):
+        cache["foo"]
+
+
+def test_cache_delete_prefix(cache):
+    cache["https://a/zaken/1#x"] = 1
+    cache["https://a/zaken/1?fields=url#x"] = 2
+    cache["https://a/zaken/10#x"] = 3
+
+    assert cache.delete_prefix("https://a/zaken/1#") == 1
+    assert cache.delete_prefix("https://a/zaken/1?") == 1
+    assert cache.keys() == ["https://a/zaken/10#x"]
+
+
+def test_cache_ttl(cache):
+    cache.set("foo", "bar", ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get("foo") is None
+
+
+def test_memory_cache_lru_eviction():
+    cache = MemoryCache(max_entries=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache.get("a")
+    cache["c"] = 3
+
+    assert cache.keys() == ["a", "c"]
+
+
+def test_shared_cache_size_eviction(tmpdir):
+    cache = SharedCache(str(tmpdir.join("cache.sqlite")), max_size=1000)
+    cache.touch_interval = 0
+
+    cache["old"] = b"x" * 400
+    cache["used"] = b"x" * 400
+    time.sleep(0.01)
+    cache.get("used")
+    cache["new"] = b"x" * 400
+
+    assert set(cache.keys()) == {"used", "new"}
+
+
+def _write_entries(path, offset):
+    cache = SharedCache(path)
+    for i in range(50):
+        cache.set("key-{}".format(offset + i), {"value": offset + i})
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="relies on fork")
+def test_shared_cache_concurrent_processes(tmpdir):
+    path = str(tmpdir.join("cache.sqlite"))
+    SharedCache(path)
+    context = multiprocessing.get_context("fork")
+
+    processes = [
+        context.Process(target=_write_entries, args=(path, i * 50)) for i in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    cache = SharedCache(path)
+    assert len(cache) == 200
+    assert cache["key-199"] == {"value": 199}
+
+
+def test_schema_fetcher_with_shared_cache(tmpdir):
+    path = str(tmpdir.join("cache.sqlite"))
+    fetcher1, fetcher2 = SchemaFetcher(), SchemaFetcher()
+    fetcher1.cache = SharedCache(path)
+    fetcher2.cache = SharedCache(path)
+
+    with requests_mock.Mocker() as m:
+        m.get("https://example.com/schema", text="openapi: 3.0.0\npaths: {}\n")
+
+        fetcher1.fetch("https://example.com/schema")
+        spec = fetcher2.fetch("https://example.com/schema")
+
+    assert m.call_count == 1
+    assert spec == {"openapi": "3.0.0", "paths": {}}
+
+
+def test_shared_schemas_are_loaded_once_per_process(tmpdir):
+    path = str(tmpdir.join("cache.sqlite"))
+    fetcher1, fetcher2 = SchemaFetcher(), SchemaFetcher()
+    fetcher1.cache = SharedCache(path)
+    fetcher2.cache = SharedCache(path)
+    url = "https://example.com/schema"
+
+    with requests_mock.Mocker() as m:
+        m.get(url, text="openapi: 3.0.0\npaths: {}\n")
+        fetcher1.fetch(url)
+
+    # the same schema object for every client of the process, compiled once
+    spec = fetcher2.fetch(url)
+    assert fetcher2.fetch(url) is spec
+    assert compile_schema(fetcher2.fetch(url)) is compile_schema(spec)
+
+    # a schema stored by another process replaces the loaded one
+    fetcher1._store(url, {"openapi": "3.0.1", "paths": {}}, "other-digest")
+    assert fetcher2.fetch(url)["openapi"] == "3.0.1"
+
+
+def test_response_cache(cache):
+    Client.load_config(
+        dummy={
+            "scheme": "https",
+            "host": "example.com",
+            "auth": {"client_id": "a", "secret": "b"},
+        }
+    )
+    client = Client("dummy")
+    client._schema = SCHEMA
+    client.response_cache = cache
+
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL, "omschrijving": "zaak"})
+        m.patch(ZAAK_URL, json={"url": ZAAK_URL, "omschrijving": "gewijzigd"})
+
+        zaak1 = client.retrieve("zaak", url=ZAAK_URL)
+        zaak1["omschrijving"] = "mutated"
+        zaak2 = client.retrieve("zaak", url=ZAAK_URL)
+
+        assert m.call_count == 1
+        assert zaak2 == {"url": ZAAK_URL, "omschrijving": "zaak"}
+
+        # other credentials don't share the cached responses
+        client.auth = None
+        client.retrieve("zaak", url=ZAAK_URL)
+
+        assert m.call_count == 2
+
+        # modifications invalidate the cached response
+        client.partial_update("zaak", {"omschrijving": "gewijzigd"}, url=ZAAK_URL)
+        client.retrieve("zaak", url=ZAAK_URL)
+
+        assert m.call_count == 4
+
+
+def test_writes_invalidate_all_credentials_and_lists(cache):
+    Client.load_config(
+        dummy={
+            "scheme": "https",
+            "host": "example.com",
+            "auth": {"client_id": "a", "secret": "b"},
+        }
+    )
+    writer, reader = Client("dummy"), Client("dummy")
+    writer._schema = reader._schema = SCHEMA
+    reader.auth = None
+    writer.response_cache = reader.response_cache = cache
+    list_url = "https://example.com/api/v1/zaken"
+
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL, "omschrijving": "zaak"})
+        m.get(list_url, json=[{"url": ZAAK_URL, "omschrijving": "zaak"}])
+        m.patch(ZAAK_URL, json={"url": ZAAK_URL, "omschrijving": "gewijzigd"})
+
+        reader.retrieve("zaak", url=ZAAK_URL)
+        writer.list("zaak", params={"page": 1})
+        assert m.call_count == 2
+
+        writer.partial_update("zaak", {"omschrijving": "gewijzigd"}, url=ZAAK_URL)
+        m.get(ZAAK_URL, json={"url": ZAAK_URL, "omschrijving": "gewijzigd"})
+        m.get(list_url, json=[{"url": ZAAK_URL, "omschrijving": "gewijzigd"}])
+
+        # the other credentials and the cached list page see the change
+        assert reader.retrieve("zaak", url=ZAAK_URL)["omschrijving"] == "gewijzigd"
+        page = writer.list("zaak", params={"page": 1})
+        assert page[0]["omschrijving"] == "gewijzigd"
+        assert m.call_count == 5
@@ -4,6 +4,7 @@ import pytest
 
 from zds_client import Client, extract_params, get_operation_url
 from zds_client.client import get_headers
+from zds_client.schema import compile_schema
 
 
 @pytest.mark.parametrize(
@@ -150,3 +151,22 @@ def test_regression_double_slashes():
     assert (
         url == "/api/v1/zaken/28dcfc90-2d26-4d4e-8261-a9202ee56185/informatieobjecten"
     )
+
+
+def test_compiled_schema_is_cached():
+    spec = {
+        "paths": {
+            "/zaken": {
+                "get": {"operationId": "zaak_list"},
+                "post": {"operationId": "zaak_create"},
+            }
+        }
+    }
+
+    compiled = compile_schema(spec)
+
+    assert compile_schema(spec) is compiled
+    assert compile_schema(dict(spec)) is not compiled
+    assert compiled.get_operation("zaak_create").method == "POST"
+    with pytest.raises(ValueError):
+        compiled.get_operation("zaak_delete")
@@ -0,0 +1,157 @@
+import uuid
+
+import pytest
+import requests_mock
+
+from zds_client import Client
+from zds_client.oas import schema_fetcher
+
+ZAAK = {
+    "type": "object",
+    "properties": {
+        "url": {"type": "string"},
+        "zaaktype": {"type": "string"},
+        "omschrijving": {"type": "string"},
+        "toelichting": {"type": "string"},
+    },
+}
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/api/v1"}],
+    "paths": {
+        "/zaken": {
+            "get": {
+                "operationId": "zaak_list",
+                "parameters": [
+                    {"$ref": "#/components/parameters/fields"},
+                    {"name": "expand", "in": "query", "schema": {"type": "string"}},
+                ],
+                "responses": {
+                    "200": {
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "count": {"type": "integer"},
+                                        "results": {
+                                            "type": "array",
+                                            "items": {
+                                                "$ref": "#/components/schemas/Zaak"
+                                            },
+                                        },
+                                    },
+                                }
+                            }
+                        }
+                    }
+                },
+            },
+        },
+        "/zaken/{uuid}": {
+            "get": {
+                "operationId": "zaak_read",
+                "responses": {
+                    "200": {
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/Zaak"}
+                            }
+                        }
+                    }
+                },
+            },
+        },
+    },
+    "components": {
+        "parameters": {
+            "fields": {"name": "fields", "in": "query", "schema": {"type": "string"}}
+        },
+        "schemas": {"Zaak": ZAAK},
+    },
+}
+
+ZAAK_UUID = str(uuid.uuid4())
+ZAAK_URL = f"https://zrc.example.com/api/v1/zaken/{ZAAK_UUID}"
+ZAAKTYPE_URL = f"https://ztc.example.com/api/v1/zaaktypen/{uuid.uuid4()}"
+ZAAK_DATA = {
+    "url": ZAAK_URL,
+    "zaaktype": ZAAKTYPE_URL,
+    "omschrijving": "Een zaak",
+    "toelichting": "Een hele lange toelichting",
+}
+
+
+@pytest.fixture
+def client():
+    schema_fetcher.cache.clear()
+    Client.load_config(
+        zrc={"scheme": "https", "host": "zrc.example.com"},
+        ztc={"scheme": "https", "host": "ztc.example.com"},
+    )
+    client = Client("zrc")
+    client._schema = SCHEMA
+    return client
+
+
+def test_fields_passed_to_api(client):
+    with requests_mock.Mocker() as m:
+        m.get(
+            "https://zrc.example.com/api/v1/zaken",
+            json={"count": 1, "results": [{"url": ZAAK_URL}]},
+        )
+
+        response = client.list("zaak", fields=["url"], params={"foo": "bar"})
+
+    assert m.last_request.qs == {"fields": ["url"], "foo": ["bar"]}
+    assert response["results"] == [{"url": ZAAK_URL}]
+
+
+def test_fields_projected_client_side(client):
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json=ZAAK_DATA)
+
+        response = client.retrieve("zaak", uuid=ZAAK_UUID, fields=["url", "zaaktype"])
+
+    assert "fields" not in m.last_request.qs
+    assert response == {"url": ZAAK_URL, "zaaktype": ZAAKTYPE_URL}
+
+
+def test_unknown_fields(client):
+    with requests_mock.Mocker() as m:
+        with pytest.raises(ValueError, match="bestaatniet"):
+            client.list("zaak", fields=["url", "bestaatniet"])
+
+        with pytest.raises(ValueError, match="bestaatookniet"):
+            client.retrieve("zaak", uuid=ZAAK_UUID, expand=["bestaatookniet"])
+
+    assert not m.called
+
+
+def test_expand_passed_to_api(client):
+    with requests_mock.Mocker() as m:
+        m.get("https://zrc.example.com/api/v1/zaken", json={"count": 0, "results": []})
+
+        client.list("zaak", expand=["zaaktype"])
+
+    assert m.last_request.qs == {"expand": ["zaaktype"]}
+
+
+def test_expand_client_side(client):
+    zaaktype = {"url": ZAAKTYPE_URL, "omschrijving": "Een zaaktype"}
+
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json=ZAAK_DATA)
+        m.get(
+            "https://ztc.example.com/api/v1/schema/openapi.yaml",
+            text="openapi: 3.0.0\npaths:\n  /zaaktypen/{uuid}:\n"
+            "    get:\n      operationId: zaaktype_read\n",
+        )
+        m.get(ZAAKTYPE_URL, json=zaaktype)
+
+        response = client.retrieve(
+            "zaak", uuid=ZAAK_UUID, fields=["omschrijving"], expand=["zaaktype"]
+        )
+
+    assert response == {"omschrijving": "Een zaak", "_expand": {"zaaktype": zaaktype}}
@@ -0,0 +1,108 @@
+import copy
+
+import requests_mock
+
+from zds_client import Client, ClientAuth
+from zds_client.schema import compile_schema
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/api/v1"}],
+    "paths": {
+        "/zaken": {
+            "get": {
+                "operationId": "zaak_list",
+                "parameters": [
+                    {
+                        "name": "Accept-Crs",
+                        "in": "header",
+                        "required": True,
+                        "schema": {"type": "string", "enum": ["EPSG:4326"]},
+                    },
+                ],
+            },
+        },
+    },
+}
+
+
+def _get_client(schema=SCHEMA) -> Client:
+    Client.load_config(
+        dummy={
+            "scheme": "https",
+            "host": "example.com",
+            "auth": {"client_id": "client", "secret": "secret"},
+        }
+    )
+    client = Client("dummy")
+    client._schema = schema
+    return client
+
+
+def test_header_template_reused():
+    client = _get_client()
+    templates = compile_schema(SCHEMA).get_operation("zaak_list").header_templates
+    templates.clear()
+
+    headers1 = client._build_headers("zaak_list")
+    headers2 = client._build_headers("zaak_list")
+
+    assert len(templates) == 1
+    assert headers1 == headers2
+    assert headers1 is not headers2
+    assert headers1["Accept"] == "application/json"
+    assert headers1["Accept-Crs"] == "EPSG:4326"
+    assert headers1["Authorization"].startswith("Bearer ")
+
+
+def test_extra_headers_override_defaults_but_not_credentials():
+    client = _get_client()
+
+    headers = client._build_headers(
+        "zaak_list",
+        {"accept-crs": "EPSG:28992", "X-Extra": "1", "Authorization": "nope"},
+    )
+
+    assert headers["Accept-Crs"] == "EPSG:28992"
+    assert headers["X-Extra"] == "1"
+    assert headers["Authorization"] == client.auth.credentials()["Authorization"]
+    # the template is not affected
+    assert client._build_headers("zaak_list")["Accept-Crs"] == "EPSG:4326"
+
+
+def test_rotated_credentials_get_new_template():
+    client = _get_client()
+    old = client._build_headers("zaak_list")["Authorization"]
+
+    client.auth = ClientAuth("client", "rotated-secret")
+    new = client._build_headers("zaak_list")["Authorization"]
+
+    assert new != old
+    assert new == client.auth.credentials()["Authorization"]
+
+
+def test_refreshed_schema_gets_new_template():
+    client = _get_client()
+    client._build_headers("zaak_list")
+
+    refreshed = copy.deepcopy(SCHEMA)
+    parameter = refreshed["paths"]["/zaken"]["get"]["parameters"][0]
+    parameter["schema"]["enum"] = ["EPSG:28992"]
+    client._schema = refreshed
+
+    assert client._build_headers("zaak_list")["Accept-Crs"] == "EPSG:28992"
+
+
+def test_headers_sent():
+    client = _get_client()
+
+    with requests_mock.Mocker() as m:
+        m.get("https://example.com/api/v1/zaken", json=[])
+
+        client.list("zaak", request_kwargs={"headers": {"X-Extra": "1"}})
+        client.list("zaak")
+
+    first, second = m.request_history
+    assert first.headers["X-Extra"] == "1"
+    assert "X-Extra" not in second.headers
+    assert second.headers["Accept-Crs"] == "EPSG:4326"
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+import requests_mock
+
+from zds_client import Client
+from zds_client.compact import CompactDecoder, Record, StringTable
+
+ZAAKTYPE = "https://ztc.example.com/api/v1/zaaktypen/1"
+
+
+def _page(start, count=2):
+    return json.dumps(
+        {
+            "count": 4,
+            "results": [
+                {
+                    "url": f"https://zrc.example.com/api/v1/zaken/{index}",
+                    "zaaktype": ZAAKTYPE,
+                    "eigenschappen": [ZAAKTYPE],
+                    "kenmerken": [{"bron": "bron"}],
+                }
+                for index in range(start, start + count)
+            ],
+        }
+    ).encode("utf-8")
+
+
+def test_strings_are_shared_across_pages():
+    decoder = CompactDecoder()
+
+    zaken = decoder.decode(_page(0))["results"] + decoder.decode(_page(2))["results"]
+
+    assert zaken == json.loads(_page(0))["results"] + json.loads(_page(2))["results"]
+    assert len({id(zaak["zaaktype"]) for zaak in zaken}) == 1
+    assert zaken[0]["eigenschappen"][0] is zaken[3]["zaaktype"]
+    assert zaken[0]["kenmerken"][0]["bron"] is zaken[3]["kenmerken"][0]["bron"]
+    assert isinstance(zaken[0], dict)
+
+
+def test_records():
+    decoder = CompactDecoder(records=True)
+
+    page = decoder.decode(_page(0))
+    zaken = page["results"] + decoder.decode(_page(2))["results"]
+
+    assert isinstance(page, Record)
+    assert zaken[0] == json.loads(_page(0))["results"][0]
+    assert zaken[0]._index is zaken[3]._index
+    assert zaken[1]["zaaktype"] is zaken[2]["zaaktype"]
+    assert "url" in zaken[0] and "omschrijving" not in zaken[0]
+    assert list(zaken[0]) == ["url", "zaaktype", "eigenschappen", "kenmerken"]
+    assert json.dumps(page.to_dict()) == _page(0).decode("utf-8")
+    with pytest.raises(TypeError):
+        zaken[0]["zaaktype"] = "mutated"
+
+
+def test_string_table_bounds():
+    table = StringTable(max_entries=2, max_length=3)
+
+    assert table.intern("a") == "a"
+    table.intern("long")
+    table.intern("b")
+    table.intern("c")
+
+    assert len(table) == 2
+    assert table.intern("".join(["a"])) is table.intern("a")
+
+
+@pytest.fixture
+def client():
+    Client.load_config(zrc={"scheme": "https", "host": "zrc.example.com"})
+    client = Client("zrc")
+    client._schema = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "/api/v1"}],
+        "paths": {
+            "/zaken": {
+                "get": {
+                    "operationId": "zaak_list",
+                    "responses": {
+                        "200": {
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "object",
+                                        "properties": {
+                                            "results": {
+                                                "type": "array",
+                                                "items": {
+                                                    "type": "object",
+                                                    "properties": {
+                                                        "url": {"type": "string"},
+                                                        "zaaktype": {"type": "string"},
+                                                    },
+                                                },
+                                            }
+                                        },
+                                    }
+                                }
+                            }
+                        }
+                    },
+                }
+            },
+            "/zaken/_zoek": {"post": {"operationId": "zaak__zoek"}},
+        },
+    }
+    return client
+
+
+def test_client_list_compact(client):
+    decoder = CompactDecoder()
+
+    with requests_mock.Mocker() as m:
+        m.get("https://zrc.example.com/api/v1/zaken", content=_page(0))
+        m.post("https://zrc.example.com/api/v1/zaken/_zoek", content=_page(2))
+
+        first = client.list("zaak", compact=decoder)
+        second = client.operation("zaak__zoek", {}, compact=decoder)
+        default = client.list("zaak", compact=True)
+
+    assert first["results"][0]["zaaktype"] is second["results"][0]["zaaktype"]
+    assert default == first
+
+
+def test_client_list_records_with_client_side_fields(client):
+    with pytest.raises(ValueError):
+        client.list("zaak", fields=["url"], compact=CompactDecoder(records=True))
@@ -0,0 +1,176 @@
+import time
+
+import pytest
+import requests_mock
+
+from benchmarks.stub_server import StubServer
+from zds_client import Client, ClientError
+from zds_client.composite import Composite, CompositeError, Ref
+from zds_client.oas import schema_fetcher
+
+ZRC_URL = "https://zrc.example.com/api/v1/"
+DRC_URL = "https://drc.example.com/api/v1/"
+ZAAK_URL = f"{ZRC_URL}zaken/1"
+
+ZRC_SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/api/v1"}],
+    "paths": {
+        "/zaken": {"post": {"operationId": "zaak_create"}},
+        "/zaken/{uuid}": {
+            "put": {"operationId": "zaak_update"},
+            "patch": {"operationId": "zaak_partial_update"},
+        },
+        "/statussen": {"post": {"operationId": "status_create"}},
+        "/rollen": {"post": {"operationId": "rol_create"}},
+        "/zaakinformatieobjecten": {
+            "post": {"operationId": "zaakinformatieobject_create"}
+        },
+    },
+}
+
+DRC_SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/api/v1"}],
+    "paths": {
+        "/enkelvoudiginformatieobjecten": {
+            "post": {"operationId": "enkelvoudiginformatieobject_create"}
+        },
+    },
+}
+
+
+@pytest.fixture
+def clients():
+    Client.load_config(
+        zrc={"scheme": "https", "host": "zrc.example.com"},
+        drc={"scheme": "https", "host": "drc.example.com"},
+    )
+    zrc, drc = Client("zrc"), Client("drc")
+    zrc._schema = ZRC_SCHEMA
+    drc._schema = DRC_SCHEMA
+    return zrc, drc
+
+
+def echo(url):
+    def callback(request, context):
+        context.status_code = 201
+        return dict(request.json(), url=url)
+
+    return callback
+
+
+def test_references_are_resolved(clients):
+    zrc, drc = clients
+    dossier = Composite()
+    zaak = dossier.create("zaak", zrc, "zaak", {"identificatie": "ZAAK-1"})
+    document = dossier.create("document", drc, "enkelvoudiginformatieobject", {})
+    dossier.create(
+        "zio",
+        zrc,
+        "zaakinformatieobject",
+        {"zaak": zaak, "informatieobject": document, "titel": zaak["identificatie"]},
+    )
+    dossier.partial_update(
+        "update", zrc, "zaak", {"toelichting": "compleet"}, url=zaak, after=["zio"]
+    )
+
+    with requests_mock.Mocker() as m:
+        m.post(f"{ZRC_URL}zaken", json=echo(ZAAK_URL))
+        m.post(f"{DRC_URL}enkelvoudiginformatieobjecten", json=echo(f"{DRC_URL}eio/1"))
+        m.post(f"{ZRC_URL}zaakinformatieobjecten", json=echo(f"{ZRC_URL}zio/1"))
+        m.patch(ZAAK_URL, json={"url": ZAAK_URL, "toelichting": "compleet"})
+        result = dossier.run()
+
+    result.raise_for_errors()
+    assert result.ok
+    assert result["zio"].output == {
+        "url": f"{ZRC_URL}zio/1",
+        "zaak": ZAAK_URL,
+        "informatieobject": f"{DRC_URL}eio/1",
+        "titel": "ZAAK-1",
+    }
+    assert result["update"].output["toelichting"] == "compleet"
+    assert m.request_history[-1].method == "PATCH"
+    assert list(result.outputs) == ["zaak", "document", "zio", "update"]
+    assert dossier.get_depth() == 3
+
+
+def test_failures_skip_dependents(clients):
+    zrc, drc = clients
+    dossier = Composite()
+    zaak = dossier.create("zaak", zrc, "zaak", {})
+    status = dossier.create("status", zrc, "status", {"zaak": zaak})
+    dossier.create("rol", zrc, "rol", {"zaak": zaak})
+    dossier.create("zio", zrc, "zaakinformatieobject", {"status": status})
+    dossier.create("document", drc, "enkelvoudiginformatieobject", {})
+
+    with requests_mock.Mocker() as m:
+        m.post(f"{ZRC_URL}zaken", json=echo(ZAAK_URL))
+        m.post(f"{ZRC_URL}statussen", status_code=400, json={"detail": "Ongeldig"})
+        m.post(f"{ZRC_URL}rollen", json=echo(f"{ZRC_URL}rollen/1"))
+        m.post(f"{DRC_URL}enkelvoudiginformatieobjecten", json=echo(f"{DRC_URL}eio/1"))
+        result = dossier.run()
+
+    assert not result.ok
+    assert [step.status for step in result] == [
+        "done",
+        "failed",
+        "done",
+        "skipped",
+        "done",
+    ]
+    assert isinstance(result.errors["status"], ClientError)
+    assert result.skipped == ["zio"]
+    with pytest.raises(CompositeError) as exc_info:
+        result.raise_for_errors()
+    assert list(exc_info.value.errors) == ["status"]
+
+
+def test_invalid_steps(clients):
+    zrc, _ = clients
+    dossier = Composite()
+    dossier.create("zaak", zrc, "zaak", {})
+
+    with pytest.raises(ValueError):
+        dossier.create("zaak", zrc, "zaak", {})
+    with pytest.raises(ValueError):
+        dossier.create("status", zrc, "status", {"zaak": Ref("unknown")})
+    with pytest.raises(ValueError):
+        dossier.add("zaak2", zrc, "delete", "zaak", {})
+    assert len(dossier) == 1
+
+
+def test_empty():
+    result = Composite().run()
+
+    assert result.ok
+    assert len(result) == 0
+
+
+def test_wall_time_follows_depth():
+    schema_fetcher.cache.clear()
+    with StubServer(objects=1, latency=0.1) as server:
+        Client.load_config(stub=server.client_config)
+        client = Client("stub")
+        client.fetch_schema()
+
+        dossier = Composite()
+        zaak = dossier.create("zaak", client, "zaak", {"omschrijving": "hoofdzaak"})
+        deelzaken = [
+            dossier.create(f"deelzaak{i}", client, "zaak", {"hoofdzaak": zaak})
+            for i in range(6)
+        ]
+        dossier.create("relevant", client, "zaak", {"relevanteAndereZaken": deelzaken})
+        assert dossier.get_depth() == 3
+
+        start = time.perf_counter()
+        result = dossier.run()
+        duration = time.perf_counter() - start
+
+    assert result.ok
+    assert server.requests == 1 + 8
+    deelzaak_urls = [result[f"deelzaak{i}"].output["url"] for i in range(6)]
+    assert result["relevant"].output["relevanteAndereZaken"] == deelzaak_urls
+    # 3 rounds instead of 8 sequential requests
+    assert duration < 0.6
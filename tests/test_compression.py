@@ -0,0 +1,84 @@
+import pytest
+
+from benchmarks.schema import make_zaak
+from benchmarks.stub_server import StubServer
+from zds_client import Client
+from zds_client.compression import CompressionConfig, ResponseTooLarge
+from zds_client.oas import schema_fetcher
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StubServer(objects=200, page_size=100, compress=True) as server:
+        yield server
+
+
+def _get_client(server, **compression) -> Client:
+    schema_fetcher.cache.clear()
+    Client.load_config(
+        compressed=dict(server.client_config, compression=compression or None)
+    )
+    client = Client("compressed")
+    client._transfer_stats.reset()
+    return client
+
+
+def test_compressed_response(server):
+    client = _get_client(server, accept=["gzip"])
+
+    page = client.list("zaak")
+
+    assert len(page["results"]) == 100
+    stats = client.transfer_stats
+    assert stats["requests"] == 1
+    assert 0 < stats["response_bytes"] < stats["response_bytes_uncompressed"] / 2
+
+
+def test_uncompressed_response(server):
+    client = _get_client(server, accept=["identity"])
+
+    client.list("zaak")
+
+    stats = client.transfer_stats
+    assert stats["response_bytes"] == stats["response_bytes_uncompressed"]
+
+
+def test_compressed_request_body(server):
+    client = _get_client(server, request_threshold=100)
+    data = make_zaak(server.base_url, 1)
+
+    zaak = client.create("zaak", data)
+
+    assert zaak["identificatie"] == data["identificatie"]
+    stats = client.transfer_stats
+    assert 0 < stats["request_bytes"] < stats["request_bytes_uncompressed"]
+
+
+def test_small_request_body_not_compressed(server):
+    client = _get_client(server, request_threshold=10**6)
+
+    client.create("zaak", {"omschrijving": "small"})
+
+    stats = client.transfer_stats
+    assert stats["request_bytes"] == stats["request_bytes_uncompressed"]
+
+
+def test_max_response_size(server):
+    client = _get_client(server, max_response_size=1000)
+    client._schema = server.schema
+
+    with pytest.raises(ResponseTooLarge):
+        client.list("zaak")
+
+    # a single zaak fits
+    client.retrieve("zaak", url=server.zaken[0]["url"])
+
+
+def test_unsupported_encodings_not_accepted(caplog):
+    config = CompressionConfig(accept=["zstd-unknown", "gzip"])
+
+    assert config.accept_encoding == "gzip"
+    for _ in range(3):
+        config.prepare_request({}, {})
+    # warned once, not on every request
+    assert caplog.text.count("zstd-unknown") == 1
@@ -0,0 +1,197 @@
+import io
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+import requests
+
+from zds_client import Client
+from zds_client.hedging import Hedger, HedgingConfig, _close_response
+from zds_client.timeouts import deadline, get_remaining
+
+
+class SlowTransport:
+    """
+    Respond after the configured delay of each consecutive request.
+    """
+
+    def __init__(self, *delays):
+        self.delays = list(delays)
+        self.calls = 0
+        self.closed = []
+        self._lock = threading.Lock()
+
+    def send(self, method, url, **kwargs):
+        with self._lock:
+            number = self.calls
+            self.calls += 1
+        delay = self.delays[number] if number < len(self.delays) else 0
+        time.sleep(delay)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"request": %d}' % number
+        response.raw = io.BytesIO(response._content)
+        response.close = lambda: self.closed.append(number)
+        return response
+
+
+def _warm_up(hedger: Hedger, transport, number=20):
+    for _ in range(number):
+        hedger.send(transport, "GET", "https://example.com")
+
+
+def test_no_hedging_before_enough_samples():
+    hedger = Hedger(HedgingConfig(min_samples=20, budget=1))
+    transport = SlowTransport(0.05)
+
+    response = hedger.send(transport, "GET", "https://example.com")
+
+    assert response.json() == {"request": 0}
+    assert transport.calls == 1
+    assert hedger.delay is None
+
+
+def test_slow_request_is_hedged():
+    hedger = Hedger(HedgingConfig(min_delay=0.01, budget=1))
+    transport = SlowTransport(*[0] * 20, 1.0)
+    _warm_up(hedger, transport)
+    assert hedger.delay == 0.01
+
+    start = time.perf_counter()
+    response = hedger.send(transport, "GET", "https://example.com")
+
+    assert time.perf_counter() - start < 0.5
+    assert response.json() == {"request": 21}
+    assert hedger.hedged == 1
+    assert hedger.hedge_wins == 1
+
+    # the slow response is closed once it arrives
+    time.sleep(1.0)
+    assert transport.closed == [20]
+
+
+def test_fast_request_is_not_hedged():
+    hedger = Hedger(HedgingConfig(min_delay=0.1, budget=1))
+    transport = SlowTransport()
+    _warm_up(hedger, transport)
+
+    hedger.send(transport, "GET", "https://example.com")
+
+    assert transport.calls == 21
+    assert hedger.hedged == 0
+
+
+def test_budget_caps_hedges():
+    hedger = Hedger(HedgingConfig(min_delay=0.01, budget=0.1))
+    hedger.max_tokens = 1
+    transport = SlowTransport(*[0] * 20, *[0.05] * 10)
+    _warm_up(hedger, transport)
+
+    for _ in range(5):
+        hedger.send(transport, "GET", "https://example.com")
+
+    assert hedger.hedged == 1
+
+
+class ThreadRecordingTransport(SlowTransport):
+    def __init__(self, *delays):
+        super().__init__(*delays)
+        self.threads = []
+        self.remaining = []
+
+    def send(self, method, url, **kwargs):
+        self.threads.append(threading.current_thread())
+        self.remaining.append(get_remaining())
+        return super().send(method, url, **kwargs)
+
+
+def test_hedges_run_in_the_callers_context():
+    hedger = Hedger(HedgingConfig(min_delay=0.01, budget=1))
+    transport = ThreadRecordingTransport(*[0] * 20, 0.2)
+    _warm_up(hedger, transport)
+
+    with deadline(5):
+        hedger.send(transport, "GET", "https://example.com")
+
+    assert hedger.hedged == 1
+    primary, hedge = transport.remaining[20:]
+    assert 4 < primary <= 5
+    assert 4 < hedge <= 5
+
+
+def test_busy_pool_is_bypassed():
+    hedger = Hedger(HedgingConfig(min_delay=0.01, budget=1, workers=2))
+    transport = ThreadRecordingTransport(*[0] * 20, 0.3, 0.3)
+    _warm_up(hedger, transport)
+
+    # takes both threads of the pool
+    busy = threading.Thread(
+        target=hedger.send, args=(transport, "GET", "https://example.com")
+    )
+    busy.start()
+    time.sleep(0.1)
+    hedger.send(transport, "GET", "https://example.com")
+    busy.join()
+
+    # sent from the calling thread, rather than queued behind the busy ones
+    assert transport.threads[22] is threading.current_thread()
+    # the losing request frees its thread once it completes
+    time.sleep(0.1)
+    assert hedger._busy == 0
+
+
+def test_percentile_delay():
+    hedger = Hedger(HedgingConfig(percentile=90, min_delay=0, min_samples=10))
+
+    for latency in range(1, 11):
+        hedger.observe(latency / 100)
+
+    assert hedger.delay == 0.1
+
+    for latency in range(11, 17):
+        hedger.observe(latency / 100)
+
+    # recalculated every 16 observations
+    assert hedger.delay == pytest.approx(0.15)
+
+
+def test_invalid_percentile():
+    with pytest.raises(ValueError):
+        HedgingConfig(percentile=100)
+
+
+def test_client_hedges_get_requests(monkeypatch):
+    Client.load_config(
+        hedged={
+            "scheme": "https",
+            "host": "hedged.example.com",
+            "hedging": {"min_delay": 0.01, "budget": 1},
+        }
+    )
+    client = Client("hedged")
+    client._schema = {"paths": {}}
+    transport = SlowTransport(*[0] * 20, 1.0)
+    monkeypatch.setattr(Client, "transport", transport)
+
+    for _ in range(20):
+        client.request("zaken", "zaak_list")
+    start = time.perf_counter()
+    response = client.request("zaken", "zaak_list")
+
+    assert time.perf_counter() - start < 0.5
+    assert response == {"request": 21}
+
+    client.request("zaken", "zaak_create", method="POST", expected_status=200)
+    # other methods are never hedged
+    assert transport.calls == 23
+
+
+def test_close_response_without_connection():
+    # e.g. a response of a ReplayTransport
+    response = requests.Response()
+    response._content = b"{}"
+    future = Future()
+    future.set_result(response)
+
+    _close_response(future)
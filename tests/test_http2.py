@@ -0,0 +1,240 @@
+"""
+Test the HTTP/2 transport against a local (prior knowledge) h2 server.
+"""
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from zds_client import Client
+from zds_client.oas import schema_fetcher
+
+h2 = pytest.importorskip("h2")
+pytest.importorskip("httpx")
+
+from h2.config import H2Configuration  # noqa: E402
+from h2.connection import H2Connection  # noqa: E402
+from h2.events import DataReceived, RequestReceived, StreamEnded  # noqa: E402
+
+from zds_client.http2 import HTTP2Transport  # noqa: E402
+
+
+class H2Server:
+    """
+    Minimal HTTP/2 server, echoing the method, path and stream of each request.
+    """
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        self.connections = 0
+        # block responses until this many requests are in flight
+        self.barrier = None
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.sock.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, sock):
+        conn = H2Connection(config=H2Configuration(client_side=False))
+        conn.initiate_connection()
+        sock.sendall(conn.data_to_send())
+        requests = {}
+        lock = threading.Lock()
+
+        while True:
+            data = sock.recv(65535)
+            if not data:
+                return
+            with lock:
+                events = conn.receive_data(data)
+                for event in events:
+                    if isinstance(event, RequestReceived):
+                        requests[event.stream_id] = dict(event.headers)
+                    elif isinstance(event, DataReceived):
+                        conn.acknowledge_received_data(
+                            event.flow_controlled_length, event.stream_id
+                        )
+                    elif isinstance(event, StreamEnded):
+                        headers = requests.pop(event.stream_id)
+                        threading.Thread(
+                            target=self._respond,
+                            args=(sock, conn, lock, event.stream_id, headers),
+                            daemon=True,
+                        ).start()
+                sock.sendall(conn.data_to_send())
+
+    def _respond(self, sock, conn, lock, stream_id, headers):
+        if self.barrier is not None:
+            self.barrier.wait()
+        body = json.dumps(
+            {
+                "method": headers[b":method"].decode(),
+                "path": headers[b":path"].decode(),
+                "stream": stream_id,
+            }
+        ).encode()
+        with lock:
+            conn.send_headers(
+                stream_id,
+                [
+                    (":status", "200"),
+                    ("content-type", "application/json"),
+                    ("content-length", str(len(body))),
+                ],
+            )
+            conn.send_data(stream_id, body, end_stream=True)
+            sock.sendall(conn.data_to_send())
+
+
+@pytest.fixture
+def h2_server():
+    with H2Server() as server:
+        yield server
+
+
+@pytest.fixture
+def transport():
+    transport = HTTP2Transport(prior_knowledge=True)
+    yield transport
+    transport.close()
+
+
+def test_http2_request(h2_server, transport):
+    response = transport.send(
+        "GET", f"http://127.0.0.1:{h2_server.port}/api/v1/zaken", params={"page": 2}
+    )
+
+    assert response.status_code == 200
+    assert response.http_version == "HTTP/2"
+    assert response.json()["path"] == "/api/v1/zaken?page=2"
+
+
+def test_concurrent_requests_are_multiplexed(h2_server, transport):
+    h2_server.barrier = threading.Barrier(8, timeout=5)
+    url = f"http://127.0.0.1:{h2_server.port}/api/v1/zaken"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(
+            executor.map(lambda _: transport.send("GET", url).json(), range(8))
+        )
+
+    # all requests were in flight at the same time, over one connection
+    assert h2_server.connections == 1
+    assert len({response["stream"] for response in responses}) == 8
+
+
+def test_fallback_to_http11():
+    schema_fetcher.cache.clear()
+    transport = HTTP2Transport()
+    with StubServer(objects=5) as server:
+        Client.load_config(http11=server.client_config)
+        client = Client("http11")
+        client._schema = server.schema
+        client.transport = transport
+
+        zaak = client.retrieve("zaak", uuid=server.zaken[0]["uuid"])
+        response = transport.send("GET", server.zaken[0]["url"])
+
+    assert zaak == server.zaken[0]
+    assert response.http_version == "HTTP/1.1"
+    transport.close()
+
+
+def test_connection_errors_are_requests_exceptions():
+    import requests
+
+    transport = HTTP2Transport()
+
+    with pytest.raises(requests.ConnectionError):
+        transport.send("GET", "http://127.0.0.1:1/api/v1/zaken")
+
+
+class TruncatingServer:
+    """
+    HTTP/1.1 server sending less of the body than announced, or stalling.
+    """
+
+    def __init__(self, stall=False):
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.url = "http://127.0.0.1:%d/" % self.sock.getsockname()[1]
+        self.stall = stall
+        self.done = threading.Event()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        conn, _ = self.sock.accept()
+        conn.recv(65535)
+        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\n{")
+        if self.stall:
+            self.done.wait(5)
+        conn.close()
+        self.sock.close()
+
+
+@pytest.mark.parametrize(
+    "stall,error",
+    [
+        (False, "ChunkedEncodingError"),
+        # like requests, a read timeout in the body is a ConnectionError
+        (True, "ConnectionError"),
+    ],
+)
+def test_body_errors_are_requests_exceptions(stall, error):
+    import requests
+
+    transport = HTTP2Transport()
+    server = TruncatingServer(stall=stall)
+
+    response = transport.send("GET", server.url, stream=True, timeout=(1, 0.1))
+    with pytest.raises(getattr(requests.exceptions, error)):
+        list(response.iter_content(16))
+    server.done.set()
+    transport.close()
+
+
+def test_unsupported_arguments(transport):
+    with pytest.raises(TypeError):
+        transport.send("GET", "http://127.0.0.1:1/", files={"a": b"b"})
+
+
+def test_streamed_compressed_response():
+    transport = HTTP2Transport()
+    with StubServer(objects=200, page_size=100, compress=True) as server:
+        Client.load_config(
+            compressed_h2=dict(
+                server.client_config,
+                compression={"accept": ["gzip"], "max_response_size": 10**6},
+            )
+        )
+        client = Client("compressed_h2")
+        client._schema = server.schema
+        client.transport = transport
+        client._transfer_stats.reset()
+
+        page = client.list("zaak")
+
+    assert len(page["results"]) == 100
+    stats = client.transfer_stats
+    assert 0 < stats["response_bytes"] < stats["response_bytes_uncompressed"] / 2
+    transport.close()
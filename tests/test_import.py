@@ -0,0 +1,93 @@
+"""
+Guard the import time of the package.
+
+The import runs in a fresh interpreter, as the test process itself already has
+everything imported.
+"""
+import json
+import subprocess
+import sys
+
+# modules that are expensive to import and must only be loaded on first use
+HEAVY_MODULES = [
+    "pkg_resources",
+    "requests.models",
+    "urllib3",
+    "yaml.loader",
+    "jwt.api_jwt",
+    "sqlite3",
+    "pickle",
+]
+
+# generous upper bound - a cold import used to take ~300ms because of pkg_resources
+IMPORT_TIME_BUDGET = 0.1
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import zds_client
+duration = time.perf_counter() - start
+print(json.dumps({"duration": duration, "modules": sorted(sys.modules)}))
+"""
+
+
+def _import_zds_client() -> dict:
+    output = subprocess.check_output([sys.executable, "-c", SCRIPT])
+    return json.loads(output)
+
+
+def test_import_does_not_load_heavy_dependencies():
+    result = _import_zds_client()
+
+    loaded = [module for module in HEAVY_MODULES if module in result["modules"]]
+    assert loaded == []
+
+
+def test_import_time_benchmark():
+    # best of a couple of runs to smooth out noise from the test machine
+    durations = [_import_zds_client()["duration"] for _ in range(3)]
+
+    assert min(durations) < IMPORT_TIME_BUDGET
+
+
+def test_lazy_dependencies_load_on_use():
+    from zds_client import ClientAuth
+
+    credentials = ClientAuth("client-id", "secret").credentials()
+
+    assert credentials["Authorization"].startswith("Bearer ")
+
+
+THREADS_SCRIPT = """
+import json, threading
+from zds_client import Client, ClientAuth
+
+Client.load_config(dummy={"scheme": "https", "host": "example.com"})
+barrier = threading.Barrier(8)
+errors = []
+
+def use_client():
+    client = Client("dummy")
+    client._schema = {"openapi": "3.0.0", "paths": {}}
+    client.auth = ClientAuth("client-id", "secret")
+    barrier.wait()
+    try:
+        headers = client._build_headers("zaak_list")
+        client._get_cache_key("https://example.com/zaken", {"page": 1}, headers)
+    except Exception as exc:
+        errors.append(repr(exc))
+
+threads = [threading.Thread(target=use_client) for _ in range(8)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print(json.dumps(errors))
+"""
+
+
+def test_lazy_dependencies_first_use_in_threads():
+    for _ in range(3):
+        output = subprocess.check_output([sys.executable, "-c", THREADS_SCRIPT])
+
+        assert json.loads(output) == []
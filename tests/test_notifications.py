@@ -0,0 +1,141 @@
+import uuid
+
+import pytest
+import requests_mock
+import yaml
+
+from zds_client import Client
+from zds_client.cache import MemoryCache
+from zds_client.notifications import CacheInvalidator, parse_notification
+from zds_client.oas import schema_fetcher
+from zds_client.resources import Resolver
+
+ZRC = "https://zrc.example.com/api/v1"
+ZAAK = f"{ZRC}/zaken/{uuid.UUID(int=1, version=4)}"
+OTHER_ZAAK = f"{ZRC}/zaken/{uuid.UUID(int=2, version=4)}"
+STATUS = f"{ZRC}/statussen/{uuid.UUID(int=3, version=4)}"
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/api/v1"}],
+    "paths": {
+        "/zaken": {"get": {"operationId": "zaak_list"}},
+        "/zaken/{uuid}": {"get": {"operationId": "zaak_read"}},
+        "/statussen": {"get": {"operationId": "status_list"}},
+        "/statussen/{uuid}": {"get": {"operationId": "status_read"}},
+    },
+}
+
+
+def _notification(resource_url, actie="update", hoofd_object=ZAAK):
+    return {
+        "kanaal": "zaken",
+        "hoofdObject": hoofd_object,
+        "resource": "zaak" if resource_url == hoofd_object else "status",
+        "resourceUrl": resource_url,
+        "actie": actie,
+        "aanmaakdatum": "2021-03-16T12:00:00Z",
+        "kenmerken": {},
+    }
+
+
+@pytest.fixture
+def mock():
+    schema_fetcher.cache.clear()
+    Client.load_config(zrc={"scheme": "https", "host": "zrc.example.com"})
+    with requests_mock.Mocker() as m:
+        m.get(f"{ZRC}/schema/openapi.yaml", text=yaml.safe_dump(SCHEMA))
+        for url in (ZAAK, OTHER_ZAAK, STATUS):
+            m.get(url, json={"url": url})
+        m.get(f"{ZRC}/zaken", json=[{"url": ZAAK}, {"url": OTHER_ZAAK}])
+        m.get(f"{ZRC}/statussen", json=[{"url": STATUS}])
+        yield m
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    response_cache = MemoryCache()
+    monkeypatch.setattr(Client, "response_cache", response_cache)
+    resolver = Resolver()
+    return response_cache, resolver
+
+
+def _fill(resolver):
+    client = Client("zrc")
+    client.list("zaak")
+    client.list("zaak", params={"zaaktype": "https://ztc/1"})
+    client.list("status")
+    for url in (ZAAK, OTHER_ZAAK, STATUS):
+        resolver.fetch(url)
+
+
+def test_parse_notification():
+    notification = _notification(ZAAK)
+
+    assert parse_notification(notification) is notification
+    assert parse_notification(
+        b'{"kanaal": "zaken", "hoofdObject": "a", "resource": '
+        b'"zaak", "resourceUrl": "a", "actie": "create"}'
+    )
+
+    with pytest.raises(ValueError):
+        parse_notification({"kanaal": "zaken"})
+    with pytest.raises(ValueError):
+        parse_notification("[]")
+
+
+def test_update_invalidates_resource_and_lists(mock, caches):
+    response_cache, resolver = caches
+    _fill(resolver)
+    invalidator = CacheInvalidator(resolvers=[resolver])
+
+    assert invalidator.handle(_notification(ZAAK)) == 4
+
+    keys = response_cache.keys()
+    assert [key for key in keys if key.startswith(f"{ZRC}/zaken")] == [
+        f"{OTHER_ZAAK}#anonymous"
+    ]
+    assert f"{ZRC}/statussen#anonymous" in keys
+    assert ZAAK not in resolver.cache
+    assert OTHER_ZAAK in resolver.cache
+
+
+def test_sub_resource_invalidates_main_object(mock, caches):
+    response_cache, resolver = caches
+    _fill(resolver)
+    invalidator = CacheInvalidator(resolvers=[resolver])
+
+    invalidator.handle(_notification(STATUS, actie="create"))
+
+    # the lists of the zaken and of the statussen are stale
+    assert set(response_cache.keys()) == {f"{OTHER_ZAAK}#anonymous"}
+    assert list(resolver.cache.keys()) == [OTHER_ZAAK]
+
+
+def test_refresh(mock, caches):
+    response_cache, resolver = caches
+    _fill(resolver)
+    invalidator = CacheInvalidator(resolvers=[resolver], refresh=True)
+    mock.get(STATUS, json={"url": STATUS, "statustoelichting": "nieuw"})
+    calls = mock.call_count
+
+    invalidator.handle(_notification(STATUS))
+
+    # the status and its zaak are fetched again
+    assert mock.call_count == calls + 2
+    assert resolver.cache.get(STATUS)["statustoelichting"] == "nieuw"
+    assert f"{STATUS}#anonymous" in response_cache
+    assert ZAAK in resolver.cache
+
+
+def test_refresh_skips_destroyed_resource(mock, caches):
+    response_cache, resolver = caches
+    _fill(resolver)
+    invalidator = CacheInvalidator(resolvers=[resolver], refresh=True)
+    calls = mock.call_count
+
+    invalidator.handle(_notification(STATUS, actie="destroy"))
+
+    assert mock.call_count == calls + 1
+    assert STATUS not in resolver.cache
+    assert ZAAK in resolver.cache
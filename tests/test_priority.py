@@ -0,0 +1,228 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from zds_client import Client
+from zds_client.config import ClientConfig
+from zds_client.oas import schema_fetcher
+from zds_client.priority import (
+    PriorityConfig,
+    PriorityScheduler,
+    get_priority,
+    get_scheduler,
+    priority,
+)
+from zds_client.timeouts import DeadlineExceeded, deadline
+
+
+def _wait_for(condition, timeout=2):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.001)
+
+
+def _queue(scheduler, lane, granted):
+    """
+    Wait for a slot in a thread, recording the order in which slots are granted.
+    """
+
+    def acquire():
+        slot = scheduler.acquire(lane)
+        granted.append(lane)
+        slot.release()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    return thread
+
+
+def test_get_priority():
+    assert get_priority() == "default"
+    assert get_priority("batch") == "batch"
+    with priority("interactive"):
+        assert get_priority("batch") == "interactive"
+        with priority("batch"):
+            assert get_priority() == "batch"
+        assert get_priority() == "interactive"
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"slots": 0}, {"slots": 2, "reserved": 2}, {"weights": {"batch": 0}}],
+)
+def test_invalid_config(kwargs):
+    with pytest.raises(ValueError):
+        PriorityConfig(**kwargs)
+
+
+def test_config_from_dict():
+    config = ClientConfig.from_dict(
+        {"host": "example.com", "priority": {"slots": 4, "weights": {"bulk": 0.5}}}
+    )
+
+    assert config.priority.slots == 4
+    assert config.priority.weights == {
+        "interactive": 8,
+        "default": 4,
+        "batch": 1,
+        "bulk": 0.5,
+    }
+
+
+def test_unknown_priority():
+    scheduler = PriorityScheduler(PriorityConfig())
+
+    with pytest.raises(ValueError):
+        scheduler.acquire("urgent")
+
+
+def test_slots_by_weight():
+    scheduler = PriorityScheduler(
+        PriorityConfig(slots=1, reserved=0, weights={"interactive": 4})
+    )
+    granted = []
+    slot = scheduler.acquire("batch")
+
+    threads = []
+    for lane in ["batch"] * 5 + ["interactive"] * 8:
+        threads.append(_queue(scheduler, lane, granted))
+        # queue in a predictable order
+        _wait_for(lambda: sum(scheduler.waiting.values()) == len(threads))
+    slot.release()
+    for thread in threads:
+        thread.join()
+
+    # 4 interactive calls for every batch call (the batch lane already had one),
+    # even though the batch calls were queued first
+    assert (
+        granted == ["interactive"] * 5 + ["batch"] + ["interactive"] * 3 + ["batch"] * 4
+    )
+    assert scheduler.in_use == {}
+
+
+def _in_thread(function):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(function()))
+    thread.start()
+    thread.join()
+    return results[0]
+
+
+def test_reserved_slots():
+    scheduler = PriorityScheduler(PriorityConfig(slots=2, reserved=1))
+    batch = scheduler.acquire("batch")
+
+    # the other slot is reserved for interactive calls (of other threads, this
+    # thread's calls share its slot)
+    def acquire_batch():
+        with deadline(0.05):
+            try:
+                scheduler.acquire("batch")
+            except DeadlineExceeded as exc:
+                return exc
+
+    assert isinstance(_in_thread(acquire_batch), DeadlineExceeded)
+    assert scheduler.waiting == {}
+
+    interactive = _in_thread(lambda: scheduler.acquire("interactive"))
+    assert scheduler.in_use == {"batch": 1, "interactive": 1}
+    interactive.release()
+    batch.release()
+    # releasing twice doesn't free another slot
+    batch.release()
+    assert scheduler.in_use == {}
+    assert repr(scheduler) == "<PriorityScheduler: 2/2 slots free>"
+
+
+def test_nested_acquire_does_not_wait():
+    scheduler = PriorityScheduler(PriorityConfig(slots=1, reserved=0))
+
+    with scheduler.acquire("batch"):
+        with deadline(0.05):
+            nested = scheduler.acquire("batch")
+        assert scheduler.in_use == {"batch": 1}
+        nested.release()
+        assert scheduler.in_use == {"batch": 1}
+
+    assert scheduler.in_use == {}
+    # another thread still waits
+    with scheduler.acquire("batch"):
+        granted = []
+        thread = _queue(scheduler, "batch", granted)
+        _wait_for(lambda: scheduler.waiting == {"batch": 1})
+    thread.join()
+    assert granted == ["batch"]
+
+
+def test_nested_calls_while_iterating():
+    schema_fetcher.cache.clear()
+    with StubServer(objects=6, page_size=2) as server:
+        Client.load_config(
+            nested=dict(server.client_config, priority={"slots": 2, "reserved": 0})
+        )
+        client = Client("nested")
+        client.fetch_schema()
+        barrier = threading.Barrier(2)
+        results = []
+
+        def run():
+            for zaak in client.iter_list("zaak"):
+                # both threads are iterating a page
+                barrier.wait(timeout=2)
+                results.append(client.retrieve("zaak", url=zaak["url"]))
+
+        threads = [threading.Thread(target=run) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(results) == 12
+    assert get_scheduler("nested", client._config.priority).in_use == {}
+
+
+def test_get_scheduler():
+    config = PriorityConfig()
+
+    scheduler = get_scheduler("zrc", config)
+
+    assert get_scheduler("zrc", config) is scheduler
+    assert get_scheduler("zrc", PriorityConfig()) is not scheduler
+
+
+def test_interactive_calls_skip_the_batch_queue():
+    schema_fetcher.cache.clear()
+    with StubServer(objects=10, page_size=10, latency=0.05) as server:
+        Client.load_config(
+            lanes=dict(server.client_config, priority={"slots": 3, "reserved": 1})
+        )
+        batch_client = Client("lanes")
+        batch_client.priority = "batch"
+        batch_client.fetch_schema()
+        zaak_url = server.zaken[0]["url"]
+
+        def run_batch():
+            for _ in range(4):
+                batch_client.retrieve("zaak", url=zaak_url)
+
+        threads = [threading.Thread(target=run_batch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        scheduler = get_scheduler("lanes", batch_client._config.priority)
+        _wait_for(lambda: scheduler.waiting.get("batch", 0) >= 4)
+
+        start = time.perf_counter()
+        with priority("interactive"):
+            batch_client.retrieve("zaak", url=zaak_url)
+        duration = time.perf_counter() - start
+
+        for thread in threads:
+            thread.join()
+
+    # 32 batch requests over 2 slots take 0.8s
+    assert duration < 0.15
+    assert scheduler.in_use == {}
@@ -0,0 +1,106 @@
+import pstats
+import time
+
+import pytest
+import requests_mock
+
+from zds_client import Client
+from zds_client.profiling import Profiler
+
+ZAAK_URL = "https://example.com/api/v1/zaken/1"
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/api/v1"}],
+    "paths": {
+        "/zaken": {"get": {"operationId": "zaak_list"}},
+        "/zaken/{uuid}": {"get": {"operationId": "zaak_read"}},
+    },
+}
+
+
+@pytest.fixture
+def client():
+    Client.load_config(dummy={"scheme": "https", "host": "example.com"})
+    client = Client("dummy")
+    client._schema = SCHEMA
+    return client
+
+
+def slow_response(request, context):
+    time.sleep(0.05)
+    return {"url": ZAAK_URL}
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        Profiler(mode="perf")
+
+
+def test_disabled(client):
+    client.profiler = Profiler(rate=0)
+
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL})
+        client.retrieve("zaak", url=ZAAK_URL)
+
+    assert client.profiler.samples == {}
+
+
+def test_cprofile(client, tmpdir):
+    client.profiler = Profiler(rate=1)
+
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL})
+        m.get("https://example.com/api/v1/zaken", json=[])
+        client.retrieve("zaak", url=ZAAK_URL)
+        client.retrieve("zaak", url=ZAAK_URL)
+        client.list("zaak")
+
+    assert client.profiler.samples == {"zaak_read": 2, "zaak_list": 1}
+    paths = client.profiler.dump_stats(str(tmpdir.join("profiles")))
+
+    assert [path.rsplit("/", 1)[1] for path in paths] == [
+        "zaak_list.pstats",
+        "zaak_read.pstats",
+    ]
+    stats = pstats.Stats(paths[1])
+    functions = {name for (_, _, name) in stats.stats}
+    assert "_build_headers" in functions
+    assert stats.total_calls > 0
+
+
+def test_stack_sampling(client, tmpdir):
+    client.profiler = Profiler(rate=1, mode="stack", interval=0.001)
+
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json=slow_response)
+        client.retrieve("zaak", url=ZAAK_URL)
+
+    stacks = client.profiler.get_folded_stacks()
+    assert sum(stacks.values()) > 5
+    assert all(
+        stack.startswith("zaak_read;zds_client.client:Client.request")
+        for stack in stacks
+    )
+    # the wall-clock time spent waiting is sampled as well
+    assert any(":slow_response" in stack for stack in stacks)
+
+    path = str(tmpdir.join("stacks.folded"))
+    client.profiler.dump_folded(path)
+    with open(path) as folded:
+        lines = folded.read().splitlines()
+    assert len(lines) == len(stacks)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_reset(client):
+    client.profiler = Profiler(rate=1)
+
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL})
+        client.retrieve("zaak", url=ZAAK_URL)
+    client.profiler.reset()
+
+    assert client.profiler.samples == {}
+    assert client.profiler.get_stats() == {}
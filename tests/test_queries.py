@@ -0,0 +1,146 @@
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+import requests_mock
+
+from benchmarks.stub_server import StubServer
+from zds_client import Client
+from zds_client.oas import schema_fetcher
+from zds_client.queries import iter_list_in, split_values
+from zds_client.timeouts import deadline
+
+ZRC = "https://zrc.example.com/api/v1"
+ZAAKTYPEN = [f"https://ztc.example.com/api/v1/zaaktypen/{index}" for index in range(50)]
+
+
+def _prepared_url(url, params) -> str:
+    prepared = requests.models.PreparedRequest()
+    prepared.prepare_url(url, params)
+    return prepared.url
+
+
+@pytest.mark.parametrize("max_url_length", [150, 300, 1000])
+def test_split_values(max_url_length):
+    params = {"status": "open"}
+
+    chunks = split_values(
+        f"{ZRC}/zaken", "zaaktype__in", ZAAKTYPEN, params, max_url_length
+    )
+
+    assert [value for chunk in chunks for value in chunk] == ZAAKTYPEN
+    for chunk in chunks:
+        query = dict(params, zaaktype__in=",".join(chunk))
+        length = len(_prepared_url(f"{ZRC}/zaken", query))
+        assert length <= max_url_length
+    # chunks are filled up
+    assert len(chunks) <= len(ZAAKTYPEN) // (max_url_length // 150) + 1
+
+
+def test_split_values_too_long():
+    chunks = split_values(f"{ZRC}/zaken", "zaaktype__in", ZAAKTYPEN[:2], None, 10)
+
+    assert chunks == [[ZAAKTYPEN[0]], [ZAAKTYPEN[1]]]
+
+
+@pytest.fixture
+def client():
+    Client.load_config(zrc={"scheme": "https", "host": "zrc.example.com"})
+    client = Client("zrc")
+    client._schema = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "/api/v1"}],
+        "paths": {"/zaken": {"get": {"operationId": "zaak_list"}}},
+    }
+    return client
+
+
+def _zaken(request, context):
+    query = parse_qs(urlparse(request.url).query)
+    zaaktypen = (
+        query["zaaktype__in"][0].split(",")
+        if "zaaktype__in" in query
+        else query["zaaktype"]
+    )
+    # every zaak is returned twice, for its zaaktype and the next one
+    results = [
+        {"url": f"{ZRC}/zaken/{ZAAKTYPEN.index(zaaktype) // 2}", "zaaktype": zaaktype}
+        for zaaktype in zaaktypen
+    ]
+    return {"count": len(results), "next": None, "results": results}
+
+
+def test_iter_list_in(client):
+    with requests_mock.Mocker() as m:
+        m.get(f"{ZRC}/zaken", json=_zaken)
+
+        zaken = list(
+            iter_list_in(
+                client, "zaak", "zaaktype__in", ZAAKTYPEN * 2, max_url_length=500
+            )
+        )
+
+    assert sorted(zaak["url"] for zaak in zaken) == sorted(
+        {f"{ZRC}/zaken/{index}" for index in range(25)}
+    )
+    assert 1 < m.call_count < len(ZAAKTYPEN)
+    assert all(len(request.url) <= 500 for request in m.request_history)
+
+
+def test_iter_list_in_single_values(client):
+    with requests_mock.Mocker() as m:
+        m.get(f"{ZRC}/zaken", json=_zaken)
+
+        zaken = list(iter_list_in(client, "zaak", "zaaktype", ZAAKTYPEN[:6]))
+
+    assert len(zaken) == 3
+    assert m.call_count == 6
+
+
+def test_iter_list_in_is_concurrent():
+    schema_fetcher.cache.clear()
+    with StubServer(objects=5, latency=0.2) as server:
+        Client.load_config(stub=server.client_config)
+        client = Client("stub")
+        client.fetch_schema()
+
+        start = time.monotonic()
+        # the stub ignores the filter, every request returns the same zaken
+        zaken = list(iter_list_in(client, "zaak", "zaaktype", "abcd", max_workers=4))
+        duration = time.monotonic() - start
+
+    assert zaken == server.zaken
+    assert server.requests == 5
+    assert duration < 0.6
+
+
+def test_iter_list_in_errors(client):
+    def respond(request, context):
+        if "zaaktypen%2F3" in request.url:
+            context.status_code = 500
+            return {}
+        return _zaken(request, context)
+
+    with requests_mock.Mocker() as m:
+        m.get(f"{ZRC}/zaken", json=respond)
+
+        with pytest.raises(requests.HTTPError):
+            list(iter_list_in(client, "zaak", "zaaktype", ZAAKTYPEN[:6]))
+
+
+def test_iter_list_in_no_values(client):
+    assert list(iter_list_in(client, "zaak", "zaaktype__in", [])) == []
+
+
+def test_iter_list_in_deadline_spent_after_last_fetch(client):
+    with requests_mock.Mocker() as m:
+        m.get(f"{ZRC}/zaken", json=_zaken)
+
+        zaken = []
+        with deadline(0.1):
+            for zaak in iter_list_in(client, "zaak", "zaaktype", ZAAKTYPEN[:2]):
+                zaken.append(zaak)
+                time.sleep(0.2)
+
+    assert len(zaken) == 1
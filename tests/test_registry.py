@@ -0,0 +1,117 @@
+import os
+import threading
+
+import pytest
+
+from zds_client import Client
+from zds_client.config import ClientConfig
+from zds_client.registry import ClientRegistry, registry
+
+CONFIG_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "config.yaml"))
+
+
+def test_config_is_immutable():
+    config = ClientConfig(scheme="https", host="example.com")
+
+    with pytest.raises(AttributeError):
+        config.host = "example2.com"
+
+    with pytest.raises(AttributeError):
+        config.extra = "not allowed"
+
+
+def test_config_base_url():
+    assert ClientConfig("https", "example.com").base_url == "https://example.com"
+    assert ClientConfig("http", "example.com", 80).base_url == "http://example.com"
+    assert (
+        ClientConfig("http", "example.com", 8000).base_url == "http://example.com:8000"
+    )
+    # ports parsed from URLs are strings
+    assert (
+        ClientConfig.from_url("https://example.com:443/api/v1/zaken").base_url
+        == "https://example.com"
+    )
+
+
+def test_config_value_semantics():
+    config1 = ClientConfig("https", "example.com")
+    config2 = ClientConfig("https", "example.com", 443)
+
+    assert config1 == config2
+    assert hash(config1) == hash(config2)
+    assert config1 != ClientConfig("https", "example2.com")
+
+
+def test_from_dict_does_not_mutate_input():
+    _config = {"host": "example.com", "auth": {"client_id": "a", "secret": "b"}}
+
+    config = ClientConfig.from_dict(_config)
+
+    assert "auth" in _config
+    assert config.auth.client_id == "a"
+
+
+def test_reverse_lookup():
+    _registry = ClientRegistry()
+    config = ClientConfig("https", "example.com")
+    _registry.register("https://example.com", config)
+    _registry.register("zrc", config)
+
+    assert _registry.get_aliases("https://example.com/") == (
+        "zrc",
+        "https://example.com",
+    )
+    assert (
+        _registry.get_alias_for_url("https://example.com:443/api/v1/zaken/123") == "zrc"
+    )
+    assert _registry.get_alias_for_url("https://example2.com/api/v1/zaken") is None
+
+    del _registry["zrc"]
+
+    assert _registry.get_aliases("https://example.com") == ("https://example.com",)
+
+
+def test_concurrent_registration():
+    _registry = ClientRegistry()
+
+    def register(offset):
+        for i in range(100):
+            alias = "service-{}".format(offset + i)
+            _registry.register(alias, ClientConfig("https", "{}.nl".format(alias)))
+
+    threads = [threading.Thread(target=register, args=(i * 100,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(_registry) == 800
+    assert _registry.get_alias_for_url("https://service-799.nl/foo") == "service-799"
+
+
+def test_reload_config_does_not_affect_existing_clients():
+    Client.load_config(
+        zrc={"scheme": "http", "host": "localhost", "port": 8000},
+        obsolete={"scheme": "http", "host": "localhost", "port": 8010},
+    )
+    client = Client("zrc")
+    original = dict(registry.items())
+
+    try:
+        Client.reload_config(CONFIG_FILE, zrc={"scheme": "https", "host": "zrc.nl"})
+
+        assert "obsolete" not in registry
+        assert "client1" in registry
+        assert client.base_url == "http://localhost:8000/api/v1/"
+        assert Client("zrc").base_url == "https://zrc.nl/api/v1/"
+    finally:
+        registry.update(original, replace=True)
+
+
+def test_client_base_path_change():
+    Client.load_config(zrc={"scheme": "http", "host": "localhost", "port": 8000})
+    client = Client("zrc")
+
+    client.base_path = "/api/v2/"
+
+    assert client.base_url == "http://localhost:8000/api/v2/"
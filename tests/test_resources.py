@@ -0,0 +1,185 @@
+import threading
+import uuid
+
+import requests_mock
+import yaml
+
+from zds_client import Client
+from zds_client.oas import schema_fetcher
+from zds_client.registry import registry
+from zds_client.resources import Resolver, Resource, expand
+
+ZRC = "https://zrc.example.com/api/v1"
+ZTC = "https://ztc.example.com/api/v1"
+
+ZRC_SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/api/v1"}],
+    "paths": {
+        "/zaken": {"get": {"operationId": "zaak_list"}},
+        "/zaken/{uuid}": {"get": {"operationId": "zaak_read"}},
+        "/statussen/{uuid}": {"get": {"operationId": "status_read"}},
+        "/zaken/{zaak_uuid}/besluiten/{uuid}": {"get": {"operationId": "besluit_read"}},
+    },
+}
+ZTC_SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/api/v1"}],
+    "paths": {
+        "/zaaktypen/{uuid}": {"get": {"operationId": "zaaktype_read"}},
+        "/statustypen/{uuid}": {"get": {"operationId": "statustype_read"}},
+    },
+}
+
+
+def _uuid(index):
+    return uuid.UUID(int=index, version=4)
+
+
+def _zaak(index):
+    return {
+        "url": f"{ZRC}/zaken/{_uuid(index)}",
+        "zaaktype": f"{ZTC}/zaaktypen/{_uuid(index % 2)}",
+        "status": f"{ZRC}/statussen/{_uuid(index)}",
+        "omschrijving": f"zaak {index}",
+        "kenmerken": [{"kenmerk": "foo", "bron": "bar"}],
+        "communicatiekanaal": "https://unknown.example.com/kanalen/1",
+    }
+
+
+def setup_function():
+    schema_fetcher.cache.clear()
+    Client.load_config(
+        zrc={"scheme": "https", "host": "zrc.example.com"},
+        ztc={"scheme": "https", "host": "ztc.example.com"},
+    )
+
+
+def _setup(m):
+    m.get(f"{ZRC}/schema/openapi.yaml", text=yaml.safe_dump(ZRC_SCHEMA))
+    m.get(f"{ZTC}/schema/openapi.yaml", text=yaml.safe_dump(ZTC_SCHEMA))
+    m.get(f"{ZRC}/zaken", json=[_zaak(i) for i in range(4)])
+    for i in range(4):
+        m.get(f"{ZRC}/zaken/{_uuid(i)}", json=_zaak(i))
+        m.get(
+            f"{ZRC}/statussen/{_uuid(i)}",
+            json={
+                "url": f"{ZRC}/statussen/{_uuid(i)}",
+                "statustype": f"{ZTC}/statustypen/{_uuid(1)}",
+            },
+        )
+    for i in range(2):
+        m.get(
+            f"{ZTC}/zaaktypen/{_uuid(i)}",
+            json={"url": f"{ZTC}/zaaktypen/{_uuid(i)}", "omschrijving": f"type {i}"},
+        )
+    m.get(
+        f"{ZTC}/statustypen/{_uuid(1)}",
+        json={"url": f"{ZTC}/statustypen/{_uuid(1)}", "volgnummer": 1},
+    )
+
+
+def test_references_resolve_on_attribute_access():
+    resolver = Resolver()
+    client = Client("zrc")
+    client._schema = ZRC_SCHEMA
+
+    with requests_mock.Mocker() as m:
+        _setup(m)
+        zaak = resolver.retrieve(client, "zaak", url=f"{ZRC}/zaken/{_uuid(1)}")
+        requests_before = m.call_count
+
+        zaaktype = zaak.zaaktype
+
+        # references are only fetched when their data is needed
+        assert isinstance(zaaktype, Resource)
+        assert m.call_count == requests_before
+        assert zaaktype.omschrijving == "type 1"
+        assert m.last_request.url == f"{ZTC}/zaaktypen/{_uuid(1)}"
+
+    assert zaak["zaaktype"] == f"{ZTC}/zaaktypen/{_uuid(1)}"
+    assert zaak.url == f"{ZRC}/zaken/{_uuid(1)}"
+    assert zaak.kenmerken[0].kenmerk == "foo"
+    # unknown services are not treated as references
+    assert zaak.communicatiekanaal == "https://unknown.example.com/kanalen/1"
+
+
+def test_lazy_proxy_by_url():
+    resolver = Resolver()
+
+    with requests_mock.Mocker() as m:
+        _setup(m)
+        zaak = resolver.get(f"{ZRC}/zaken/{_uuid(2)}")
+
+        assert not zaak.is_loaded
+        assert zaak.status.statustype.volgnummer == 1
+        assert zaak.is_loaded
+
+
+def test_shared_cache():
+    resolver = Resolver()
+
+    with requests_mock.Mocker() as m:
+        _setup(m)
+        resolver.get(f"{ZTC}/zaaktypen/{_uuid(0)}").omschrijving
+        count = m.call_count
+
+        assert resolver.get(f"{ZTC}/zaaktypen/{_uuid(0)}").omschrijving == "type 0"
+        assert m.call_count == count
+
+
+def test_prefetch():
+    resolver = Resolver()
+    client = Client("zrc")
+    client._schema = ZRC_SCHEMA
+
+    with requests_mock.Mocker() as m:
+        _setup(m)
+        zaken = resolver.list(client, "zaak")
+        resolver.prefetch(zaken, "zaaktype", "status.statustype")
+        count = m.call_count
+
+        omschrijvingen = [zaak.zaaktype.omschrijving for zaak in zaken]
+        volgnummers = [zaak.status.statustype.volgnummer for zaak in zaken]
+
+        # everything was already fetched
+        assert m.call_count == count
+
+    assert omschrijvingen == ["type 0", "type 1", "type 0", "type 1"]
+    assert volgnummers == [1, 1, 1, 1]
+
+
+def test_prefetch_is_concurrent():
+    resolver = Resolver(max_workers=4)
+    barrier = threading.Barrier(2, timeout=5)
+    original_fetch = resolver.fetch
+
+    def fetch(url, **kwargs):
+        # blocks unless two fetches are in flight at the same time
+        barrier.wait()
+        return original_fetch(url, **kwargs)
+
+    resolver.fetch = fetch
+    zaken = [Resource(_zaak(i), resolver=resolver) for i in range(2)]
+
+    with requests_mock.Mocker() as m:
+        _setup(m)
+        resolver.prefetch(zaken, "zaaktype")
+
+    assert f"{ZTC}/zaaktypen/{_uuid(0)}" in resolver.cache
+    assert f"{ZTC}/zaaktypen/{_uuid(1)}" in resolver.cache
+
+
+def test_expand_only_configured_services():
+    resolver = Resolver()
+    zaken = [_zaak(0)]
+
+    with requests_mock.Mocker() as m:
+        _setup(m)
+        expand(zaken, ["zaaktype", "communicatiekanaal"], resolver=resolver)
+
+    assert zaken[0]["_expand"]["zaaktype"]["omschrijving"] == "type 0"
+    # an unknown host is neither fetched, nor registered
+    assert zaken[0]["_expand"]["communicatiekanaal"] == zaken[0]["communicatiekanaal"]
+    assert not any("unknown.example.com" in r.url for r in m.request_history)
+    assert registry.get_alias_for_url(zaken[0]["communicatiekanaal"]) is None
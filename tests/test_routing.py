@@ -0,0 +1,108 @@
+import uuid
+
+import pytest
+import requests_mock
+import yaml
+
+from zds_client import Client
+from zds_client.oas import schema_fetcher
+from zds_client.routing import Router
+
+ZRC = "https://api.example.com/zaken/api/v1"
+DRC = "https://api.example.com/documenten/api/v1"
+
+ZRC_SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/zaken/api/v1"}],
+    "paths": {
+        "/zaken": {"get": {"operationId": "zaak_list"}},
+        "/zaken/{uuid}": {
+            "get": {"operationId": "zaak_read"},
+            "delete": {"operationId": "zaak_delete"},
+        },
+        "/zaken/{zaak_uuid}/besluiten/{uuid}": {"get": {"operationId": "besluit_read"}},
+    },
+}
+DRC_SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/documenten/api/v1"}],
+    "paths": {
+        "/enkelvoudiginformatieobjecten/{uuid}": {
+            "get": {"operationId": "enkelvoudiginformatieobject_read"}
+        },
+    },
+}
+
+UUID = str(uuid.UUID(int=1, version=4))
+
+
+@pytest.fixture
+def router():
+    schema_fetcher.cache.clear()
+    Client.load_config(
+        zrc={"scheme": "https", "host": "api.example.com"},
+        drc={"scheme": "https", "host": "api.example.com"},
+    )
+    router = Router()
+    router.add(Client("zrc", "/zaken/api/v1/"))
+    router.add(Client("drc", "/documenten/api/v1/"))
+    with requests_mock.Mocker() as m:
+        m.get(f"{ZRC}/schema/openapi.yaml", text=yaml.safe_dump(ZRC_SCHEMA))
+        m.get(f"{DRC}/schema/openapi.yaml", text=yaml.safe_dump(DRC_SCHEMA))
+        yield router
+
+
+def test_route_services_on_one_host(router):
+    zaak = router.route(f"{ZRC}/zaken/{UUID}")
+    document = router.route(f"{DRC}/enkelvoudiginformatieobjecten/{UUID}?x=1")
+
+    assert zaak.service == "zrc"
+    assert zaak.operation_id == "zaak_read"
+    assert zaak.params == {"uuid": UUID}
+    assert document.service == "drc"
+    assert document.operation_id == "enkelvoudiginformatieobject_read"
+    assert document.client.base_url == f"{DRC}/"
+
+
+def test_route_method_and_nested_paths(router):
+    assert router.route(f"{ZRC}/zaken/{UUID}", method="DELETE").operation_id == (
+        "zaak_delete"
+    )
+    besluit = router.route(f"{ZRC}/zaken/{UUID}/besluiten/{UUID}")
+    assert besluit.operation_id == "besluit_read"
+    assert besluit.params == {"zaak_uuid": UUID, "uuid": UUID}
+
+
+def test_route_unknown_operation(router):
+    assert router.route(f"{ZRC}/rollen/{UUID}") is None
+
+
+def test_route_many(router):
+    routes = list(router.route_many([f"{ZRC}/zaken", f"{ZRC}/zaken/{UUID}"]))
+
+    assert [route.operation_id for route in routes] == ["zaak_list", "zaak_read"]
+
+
+def test_clients_are_shared(router):
+    client = router.get_client(f"{ZRC}/zaken/{UUID}")
+
+    assert router.get_client(f"{ZRC}/zaken") is client
+    assert router.add(Client("zrc", "/zaken/api/v1/")) is client
+
+
+def test_discover_service_from_url():
+    schema_fetcher.cache.clear()
+    Client.load_config(zrc={"scheme": "https", "host": "zrc.example.com"})
+    router = Router()
+    url = f"https://zrc.example.com/api/v1/zaken/{UUID}"
+
+    with requests_mock.Mocker() as m:
+        m.get(
+            "https://zrc.example.com/api/v1/schema/openapi.yaml",
+            text=yaml.safe_dump(dict(ZRC_SCHEMA, servers=[{"url": "/api/v1"}])),
+        )
+        route = router.route(url)
+
+    assert route.service == "zrc"
+    assert route.operation_id == "zaak_read"
+    assert router.get_client(url) is route.client
@@ -0,0 +1,130 @@
+import pytest
+
+from zds_client import extract_params
+from zds_client.schema import PathMatcher, compile_pattern, compile_schema, get_path
+
+SPEC = {
+    "paths": {
+        "/zaken": {
+            "get": {"operationId": "zaak_list"},
+            "post": {"operationId": "zaak_create"},
+        },
+        "/zaken/_zoek": {"post": {"operationId": "zaak__zoek"}},
+        "/zaken/{uuid}": {
+            "get": {"operationId": "zaak_read"},
+            "delete": {"operationId": "zaak_delete"},
+        },
+        "/zaken/{zaak_uuid}/zaakeigenschappen/{uuid}": {
+            "get": {"operationId": "zaakeigenschap_read"}
+        },
+        "/statussen/{uuid}": {"get": {"operationId": "status_read"}},
+    }
+}
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("https://example.com/api/v1/zaken/1", "/api/v1/zaken/1"),
+        ("https://example.com:8000/api/v1/zaken?page=2", "/api/v1/zaken"),
+        ("https://example.com/api/v1/zaken/#fragment", "/api/v1/zaken/"),
+        ("https://example.com", ""),
+        ("/api/v1/zaken/1?page=2", "/api/v1/zaken/1"),
+    ],
+)
+def test_get_path(url, expected):
+    assert get_path(url) == expected
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://example.com/api/v1/zaken/1234",
+        "https://example.com/zrc/api/v1/zaken/1234/",
+        "https://example.com/api/v1/zaken/1234?expand=zaaktype",
+    ],
+)
+def test_compiled_pattern_matches_extract_params(url):
+    pattern = "/api/v1/zaken/{uuid}"
+
+    params = compile_pattern(pattern).match(url)
+
+    assert params == {"uuid": "1234"}
+    assert params == extract_params(url, pattern)
+
+
+def test_compiled_pattern_literals_must_match():
+    pattern = compile_pattern("/api/v1/zaken/{uuid}")
+
+    assert pattern.match("https://example.com/api/v1/statussen/1234") is None
+    assert pattern.match("https://example.com/api/v1/zaken") is None
+    # the host is never matched as a path segment
+    assert compile_pattern("/{a}/zaken/{uuid}").match("https://h/zaken/1") is None
+
+
+def test_compiled_pattern_match_many():
+    pattern = compile_pattern("/zaken/{zaak_uuid}/zaakeigenschappen/{uuid}")
+    urls = [
+        "https://example.com/api/v1/zaken/1/zaakeigenschappen/2",
+        "https://example.com/api/v1/zaken/1",
+    ]
+
+    assert list(pattern.match_many(urls)) == [
+        {"zaak_uuid": "1", "uuid": "2"},
+        None,
+    ]
+
+
+def test_compile_pattern_is_cached():
+    assert compile_pattern("/zaken/{uuid}") is compile_pattern("/zaken/{uuid}")
+
+
+def test_path_matcher_prefers_literals_and_longest_path():
+    matcher = PathMatcher(SPEC["paths"])
+
+    assert matcher.match("https://example.com/api/v1/zaken/_zoek") == (
+        "/zaken/_zoek",
+        {},
+    )
+    assert matcher.match("https://example.com/api/v1/zaken/1") == (
+        "/zaken/{uuid}",
+        {"uuid": "1"},
+    )
+    assert matcher.match("https://example.com/api/v1/zaken/1/zaakeigenschappen/2") == (
+        "/zaken/{zaak_uuid}/zaakeigenschappen/{uuid}",
+        {"zaak_uuid": "1", "uuid": "2"},
+    )
+    assert matcher.match("https://example.com/api/v1/rollen/1") is None
+
+
+def test_match_url():
+    schema = compile_schema(SPEC)
+
+    operation, params = schema.match_url("https://example.com/api/v1/statussen/1")
+    assert operation.operation_id == "status_read"
+    assert params == {"uuid": "1"}
+
+    operation, params = schema.match_url(
+        "https://example.com/api/v1/zaken/1", method="delete"
+    )
+    assert operation.operation_id == "zaak_delete"
+
+    assert schema.match_url("https://example.com/api/v1/zaken/_zoek") is None
+
+
+def test_match_urls():
+    schema = compile_schema(SPEC)
+    urls = [
+        "https://example.com/api/v1/zaken",
+        "https://example.com/api/v1/zaken/1",
+        "https://example.com/api/v1/unknown",
+    ]
+
+    matches = list(schema.match_urls(urls))
+
+    assert [match[0].operation_id if match else None for match in matches] == [
+        "zaak_list",
+        "zaak_read",
+        None,
+    ]
+    assert matches[1][1] == {"uuid": "1"}
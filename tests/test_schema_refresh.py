@@ -0,0 +1,192 @@
+import time
+
+import pytest
+import requests_mock
+
+from zds_client import Client
+from zds_client.oas import SchemaFetcher, schema_fetcher
+from zds_client.schema import compile_schema
+
+URL = "https://example.com/api/v1/schema/openapi.yaml"
+
+SCHEMA_V1 = b"""
+openapi: 3.0.0
+paths:
+  /zaken:
+    get:
+      operationId: zaak_list
+"""
+
+SCHEMA_V2 = (
+    SCHEMA_V1
+    + b"""
+  /statussen:
+    get:
+      operationId: status_list
+"""
+)
+
+
+def _wait_for(condition, timeout=2):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.01)
+
+
+def test_no_refresh_by_default():
+    fetcher = SchemaFetcher()
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, content=SCHEMA_V1)
+        fetcher.fetch(URL)
+
+        assert fetcher.is_updated(URL, 0) is False
+        assert fetcher.get_version(URL) == 0
+        assert m.call_count == 1
+
+
+def test_refresh_not_modified():
+    fetcher = SchemaFetcher(refresh_interval=60)
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, content=SCHEMA_V1, headers={"ETag": '"v1"'})
+        spec = fetcher.fetch(URL, {"v": "3"})
+        m.get(URL, status_code=304)
+
+        assert fetcher.refresh(URL) is False
+
+    assert m.last_request.headers["If-None-Match"] == '"v1"'
+    assert m.last_request.qs == {"v": ["3"]}
+    assert fetcher.fetch(URL) is spec
+    assert fetcher.get_version(URL) == 0
+
+
+def test_refresh_unchanged_content():
+    fetcher = SchemaFetcher(refresh_interval=60)
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, content=SCHEMA_V1)
+        spec = fetcher.fetch(URL)
+
+        assert fetcher.refresh(URL) is False
+
+    assert "If-None-Match" not in m.last_request.headers
+    assert fetcher.fetch(URL) is spec
+
+
+def test_refresh_swaps_compiled_schema():
+    fetcher = SchemaFetcher(refresh_interval=60)
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, content=SCHEMA_V1, headers={"Last-Modified": "yesterday"})
+        old = fetcher.fetch(URL)
+        m.get(URL, content=SCHEMA_V2)
+
+        assert fetcher.refresh(URL) is True
+
+    assert m.last_request.headers["If-Modified-Since"] == "yesterday"
+    new = fetcher.fetch(URL)
+    assert new is not old
+    assert fetcher.get_version(URL) == 1
+    # the old schema is left untouched for requests still using it
+    assert list(old["paths"]) == ["/zaken"]
+    assert list(compile_schema(new).operations) == ["zaak_list", "status_list"]
+
+
+def test_stale_schema_is_served_while_revalidating():
+    fetcher = SchemaFetcher(refresh_interval=0)
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, content=SCHEMA_V1)
+        old = fetcher.fetch(URL)
+        m.get(URL, content=SCHEMA_V2)
+
+        assert fetcher.fetch(URL) is old
+        _wait_for(lambda: fetcher.get_version(URL) == 1)
+        fetcher.refresh_interval = None
+
+    assert fetcher.fetch(URL) is not old
+
+
+def test_failed_refresh_keeps_stale_schema():
+    fetcher = SchemaFetcher(refresh_interval=0)
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, content=SCHEMA_V1)
+        spec = fetcher.fetch(URL)
+        m.get(URL, status_code=503)
+
+        fetcher.is_updated(URL, 0)
+        _wait_for(lambda: m.call_count >= 2 and not fetcher._states[URL].refreshing)
+        fetcher.refresh_interval = None
+
+    assert fetcher.fetch(URL) is spec
+    assert fetcher.get_version(URL) == 0
+
+
+@pytest.fixture
+def refreshing_fetcher(monkeypatch):
+    schema_fetcher.cache.clear()
+    monkeypatch.setattr(schema_fetcher, "refresh_interval", 0)
+    yield schema_fetcher
+    schema_fetcher.cache.clear()
+    schema_fetcher._states.clear()
+
+
+def test_client_picks_up_refreshed_schema(refreshing_fetcher):
+    Client.load_config(dummy={"scheme": "https", "host": "example.com"})
+    client = Client("dummy")
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, content=SCHEMA_V1)
+        old = client.schema
+        m.get(URL, content=SCHEMA_V2)
+
+        _wait_for(lambda: client.schema is not old)
+        refreshing_fetcher.refresh_interval = None
+        _wait_for(lambda: not refreshing_fetcher._states[URL].refreshing)
+
+    assert "/statussen" in client.schema["paths"]
+
+
+def test_schema_is_read_once_per_call(monkeypatch):
+    Client.load_config(dummy={"scheme": "https", "host": "example.com"})
+    client = Client("dummy")
+    client._schema = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "/api/v1"}],
+        "paths": {
+            "/zaken": {"get": {"operationId": "zaak_list"}},
+            "/zaken/{uuid}": {
+                "get": {"operationId": "zaak_read"},
+                "put": {"operationId": "zaak_update"},
+            },
+        },
+    }
+    schema = client._schema
+    reads = []
+
+    def read_schema(self):
+        # a schema swapped by a background refresh would be read next time
+        reads.append(self)
+        return schema
+
+    monkeypatch.setattr(Client, "schema", property(read_schema))
+    monkeypatch.setattr(Client, "validate_requests", True)
+    zaak_url = "https://example.com/api/v1/zaken/1"
+
+    with requests_mock.Mocker() as m:
+        m.get("https://example.com/api/v1/zaken", json=[])
+        m.get(zaak_url, json={"url": zaak_url})
+        m.put(zaak_url, json={"url": zaak_url})
+
+        for call in [
+            lambda: client.list("zaak", fields=["url"]),
+            lambda: client.retrieve("zaak", uuid="1"),
+            lambda: client.update("zaak", {}, uuid="1"),
+            lambda: list(client.iter_list("zaak")),
+        ]:
+            reads.clear()
+            call()
+            assert len(reads) == 1
@@ -0,0 +1,187 @@
+import json
+
+import pytest
+import requests
+
+from benchmarks.stub_server import StubServer
+from zds_client import Client, ClientError
+from zds_client.compact import CompactDecoder
+from zds_client.compression import ResponseTooLarge
+from zds_client.oas import schema_fetcher
+from zds_client.streaming import ListStream
+
+PAGE = {
+    "count": 2,
+    "next": "https://example.com/api/v1/zaken?page=2",
+    "previous": None,
+    "results": [{"url": "a", "omschrijving": "één"}, {"url": "b", "nummer": 12345}],
+    "extra": 3.25,
+}
+
+
+def _chunks(data, size: int) -> list:
+    content = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    return [content[start : start + size] for start in range(0, len(content), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 16, 10000])
+def test_list_stream(size):
+    stream = ListStream(_chunks(PAGE, size))
+
+    assert list(stream) == PAGE["results"]
+    assert stream.count == 2
+    assert stream.next == PAGE["next"]
+    assert stream.meta["extra"] == 3.25
+    assert "results" not in stream.meta
+
+
+@pytest.mark.parametrize(
+    "data", [[], {}, {"results": []}, [1, "two", None, [3]], {"count": 0}]
+)
+def test_list_stream_shapes(data):
+    stream = ListStream(_chunks(data, 2))
+
+    expected = data if isinstance(data, list) else data.get("results", [])
+    assert list(stream) == expected
+
+
+def test_objects_are_yielded_incrementally():
+    chunks = _chunks({"results": [{"index": index} for index in range(100)]}, 10)
+    consumed = []
+
+    def read():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    first = next(ListStream(read()))
+
+    assert first == {"index": 0}
+    assert len(consumed) < 5
+
+
+@pytest.mark.parametrize(
+    "chunks,expected",
+    [
+        ([b'[{"a": 1}', b', "b"]'], {"a": 1}),
+        ([b'["a"', b", 1]"], "a"),
+        ([b"[[1]", b", 2]"], [1]),
+    ],
+)
+def test_no_read_ahead_after_closed_values(chunks, expected):
+    consumed = []
+
+    def read():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    assert next(ListStream(read())) == expected
+    assert len(consumed) == 1
+
+
+def test_numbers_across_chunks():
+    assert list(ListStream([b"[12", b"34.", b"5, tr", b"ue, -", b"1]"])) == [
+        1234.5,
+        True,
+        -1,
+    ]
+
+
+@pytest.mark.parametrize(
+    "content", [b'{"results": [{"a": 1}', b"{,}", b'{"a" 1}', b"[1] [2]"]
+)
+def test_list_stream_invalid(content):
+    with pytest.raises(ValueError):
+        list(ListStream([content]))
+
+
+def test_list_stream_close():
+    closed = []
+    stream = ListStream(_chunks(PAGE, 5), on_close=closed.append)
+
+    next(stream)
+    stream.close()
+    stream.close()
+
+    assert closed == [stream]
+    with pytest.raises(StopIteration):
+        next(stream)
+
+
+@pytest.fixture
+def server():
+    schema_fetcher.cache.clear()
+    with StubServer(objects=25, page_size=10) as server:
+        Client.load_config(stream=server.client_config)
+        yield server
+
+
+def test_client_iter_list(server):
+    client = Client("stream")
+
+    zaken = list(client.iter_list("zaak"))
+
+    assert zaken == server.zaken
+    stats = client.transfer_stats
+    assert stats["requests"] == 3
+    assert stats["response_bytes_uncompressed"] > sum(
+        len(json.dumps(zaak)) for zaak in server.zaken
+    )
+
+
+def test_client_iter_list_compact(server):
+    client = Client("stream")
+
+    zaken = list(client.iter_list("zaak", compact=CompactDecoder()))
+
+    assert zaken == server.zaken
+    # also shared between the pages
+    zaaktypen = {zaak["zaaktype"] for zaak in zaken}
+    assert len({id(zaak["zaaktype"]) for zaak in zaken}) == len(zaaktypen)
+
+
+def test_client_stream_page(server):
+    client = Client("stream")
+
+    with client.request("zaken", "zaak_list", stream=True) as page:
+        first = next(page)
+
+    assert first == server.zaken[0]
+    assert page.count == 25
+
+
+def test_client_stream_errors(server):
+    client = Client("stream")
+
+    with pytest.raises(ClientError):
+        client.request("zaken/unknown", "zaak_read", stream=True)
+
+
+def test_client_stream_max_response_size(server):
+    Client.load_config(
+        stream=dict(server.client_config, compression={"max_response_size": 1000})
+    )
+    client = Client("stream")
+
+    with pytest.raises(ResponseTooLarge):
+        list(client.iter_list("zaak"))
+
+
+class ContentTransport:
+    """
+    Respond with read responses without connection, ignoring ``stream``.
+    """
+
+    def send(self, method, url, **kwargs):
+        kwargs.pop("stream", None)
+        response = requests.get(url, **kwargs)
+        response.raw = None
+        return response
+
+
+def test_client_iter_list_without_connection(server, monkeypatch):
+    monkeypatch.setattr(Client, "transport", ContentTransport())
+    client = Client("stream")
+
+    assert list(client.iter_list("zaak")) == server.zaken
@@ -0,0 +1,177 @@
+import io
+import threading
+import time
+
+import pytest
+import requests
+
+from benchmarks.stub_server import StubServer
+from zds_client import Client
+from zds_client.compression import read_response
+from zds_client.config import ClientConfig
+from zds_client.oas import schema_fetcher
+from zds_client.timeouts import (
+    DeadlineExceeded,
+    deadline,
+    get_remaining,
+    get_timeout,
+    parse_timeout,
+    propagate,
+)
+
+
+class CapturingTransport:
+    def __init__(self):
+        self.kwargs = []
+
+    def send(self, method, url, **kwargs):
+        self.kwargs.append(kwargs)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"[]"
+        return response
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    transport = CapturingTransport()
+    monkeypatch.setattr(Client, "transport", transport)
+    return transport
+
+
+def _get_client(**config) -> Client:
+    Client.load_config(timed=dict(scheme="https", host="timed.example.com", **config))
+    client = Client("timed")
+    client._schema = {"paths": {}}
+    return client
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (None, None),
+        (5, 5),
+        ([1, 2], (1, 2)),
+        ({"connect": 1, "read": 2}, (1, 2)),
+        ({"read": 2}, (None, 2)),
+    ],
+)
+def test_parse_timeout(value, expected):
+    assert parse_timeout(value) == expected
+    assert ClientConfig(timeout=value).timeout == expected
+
+
+def test_parse_timeout_unknown_key():
+    with pytest.raises(ValueError):
+        parse_timeout({"total": 1})
+
+
+def test_configured_timeout(transport):
+    client = _get_client(timeout={"connect": 3.05, "read": 10})
+
+    client.request("zaken", "zaak_list")
+    client.request("zaken", "zaak_list", request_kwargs={"timeout": 1})
+
+    assert transport.kwargs[0]["timeout"] == (3.05, 10)
+    assert transport.kwargs[1]["timeout"] == 1
+
+
+def test_no_timeout(transport):
+    client = _get_client()
+
+    client.request("zaken", "zaak_list")
+
+    assert "timeout" not in transport.kwargs[0]
+
+
+def test_deadline_caps_timeout(transport):
+    client = _get_client(timeout={"connect": 3.05, "read": 10})
+
+    with deadline(5):
+        client.request("zaken", "zaak_list")
+
+    connect, read = transport.kwargs[0]["timeout"]
+    assert connect == 3.05
+    assert 4.5 < read <= 5
+
+
+def test_deadline_exceeded(transport):
+    client = _get_client()
+
+    with deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(DeadlineExceeded):
+            client.request("zaken", "zaak_list")
+
+    assert transport.kwargs == []
+    assert get_remaining() is None
+
+
+def test_deadline_exceeded_during_request():
+    schema_fetcher.cache.clear()
+    with StubServer(objects=1, latency=0.5) as server:
+        Client.load_config(stub=server.client_config)
+        client = Client("stub")
+        client._schema = server.schema
+
+        with deadline(0.1):
+            with pytest.raises(DeadlineExceeded) as exc_info:
+                client.retrieve("zaak", url=server.zaken[0]["url"])
+
+    assert isinstance(exc_info.value.__cause__, requests.Timeout)
+
+
+class DrippingBody(io.RawIOBase):
+    def readinto(self, buffer):
+        time.sleep(0.02)
+        buffer[0:1] = b" "
+        return 1
+
+
+def test_deadline_exceeded_reading_body():
+    response = requests.Response()
+    response.raw = DrippingBody()
+
+    start = time.monotonic()
+    with deadline(0.1):
+        with pytest.raises(DeadlineExceeded):
+            read_response(response)
+
+    assert time.monotonic() - start < 0.2
+
+
+def test_nested_deadline_does_not_extend():
+    with deadline(1):
+        with deadline(10):
+            assert get_remaining() <= 1
+        with deadline(0.5):
+            assert get_remaining() <= 0.5
+
+
+def test_timeout_capped_per_part():
+    with deadline(2):
+        connect, read = get_timeout((1, None))
+
+    assert connect == 1
+    assert 1.5 < read <= 2
+
+
+def test_deadline_propagates_to_threads():
+    remaining = []
+
+    def check():
+        remaining.append(get_remaining())
+
+    with deadline(5):
+        threads = [threading.Thread(target=propagate(check)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    thread = threading.Thread(target=check)
+    thread.start()
+    thread.join()
+
+    assert 4.5 < remaining[0] <= 5
+    assert 4.5 < remaining[1] <= 5
+    assert remaining[2] is None
@@ -0,0 +1,239 @@
+import logging
+import time
+
+import pytest
+import requests
+import requests_mock
+
+from benchmarks.stub_server import StubServer
+from zds_client import Client, ClientError
+from zds_client.hedging import Hedger, HedgingConfig
+from zds_client.oas import schema_fetcher
+from zds_client.tracing import (
+    InMemoryExporter,
+    LoggingExporter,
+    Tracer,
+    continue_trace,
+    get_current_span,
+)
+
+ZAAK_URL = "https://example.com/api/v1/zaken/1"
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "/api/v1"}],
+    "paths": {
+        "/zaken": {"get": {"operationId": "zaak_list"}},
+        "/zaken/{uuid}": {"get": {"operationId": "zaak_read"}},
+    },
+}
+
+TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+@pytest.fixture
+def client():
+    Client.load_config(dummy={"scheme": "https", "host": "example.com"})
+    client = Client("dummy")
+    client._schema = SCHEMA
+    client.tracer = Tracer()
+    return client
+
+
+def test_request_span(client):
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL})
+        client.retrieve("zaak", url=ZAAK_URL)
+
+    (span,) = client.tracer.exporter.spans
+    assert span.name == "zaak_read"
+    assert span.parent_id is None
+    assert span.duration >= 0
+    assert span.attributes == {
+        "zds.service": "dummy",
+        "zds.operation_id": "zaak_read",
+        "zds.retries": 0,
+        "http.method": "GET",
+        "http.url": ZAAK_URL,
+        "http.status_code": 200,
+    }
+    headers = m.last_request.headers
+    assert headers["traceparent"] == span.traceparent
+    assert headers["X-Request-ID"] == span.trace_id
+    assert get_current_span() is None
+
+
+def test_failed_request_span(client):
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, status_code=404, json={"detail": "Not found"})
+        with pytest.raises(ClientError):
+            client.retrieve("zaak", url=ZAAK_URL)
+
+    (span,) = client.tracer.exporter.spans
+    assert span.attributes["http.status_code"] == 404
+    assert span.attributes["error.type"] == "ClientError"
+
+
+def test_no_tracer():
+    Client.load_config(dummy={"scheme": "https", "host": "example.com"})
+    client = Client("dummy")
+    client._schema = SCHEMA
+
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL})
+        client.retrieve("zaak", url=ZAAK_URL)
+
+    assert "traceparent" not in m.last_request.headers
+
+
+def test_continue_trace(client):
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL})
+        with continue_trace(TRACEPARENT, request_id="abc"):
+            client.retrieve("zaak", url=ZAAK_URL)
+        client.retrieve("zaak", url=ZAAK_URL)
+
+    first, second = client.tracer.exporter.spans
+    assert first.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert first.parent_id == "b7ad6b7169203331"
+    assert m.request_history[0].headers["X-Request-ID"] == "abc"
+    # outside of the block, a new trace is started
+    assert second.trace_id != first.trace_id
+    assert second.parent_id is None
+
+
+def test_continue_invalid_trace(client):
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL})
+        with continue_trace("garbage"):
+            client.retrieve("zaak", url=ZAAK_URL)
+
+    (span,) = client.tracer.exporter.spans
+    assert span.parent_id is None
+    assert m.last_request.headers["traceparent"] == span.traceparent
+
+
+def test_nested_spans(client):
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL})
+        with client.tracer.span("handle message") as parent:
+            client.retrieve("zaak", url=ZAAK_URL)
+
+    child, exported_parent = client.tracer.exporter.spans
+    assert exported_parent is parent
+    assert child.parent_id == parent.span_id
+    assert child.trace_id == parent.trace_id
+
+
+def test_hedges_are_retries(client):
+    client.tracer = Tracer()
+    hedger = Hedger(HedgingConfig(min_delay=0.01, budget=1))
+
+    class Transport:
+        delay = 0
+
+        def send(self, method, url, **kwargs):
+            time.sleep(self.delay)
+            response = requests.Response()
+            response.status_code = 200
+            return response
+
+    transport = Transport()
+    for _ in range(20):
+        hedger.send(transport, "GET", ZAAK_URL)
+    transport.delay = 0.2
+
+    with client.tracer.span("zaak_read", {"zds.retries": 0}) as span:
+        hedger.send(transport, "GET", ZAAK_URL)
+
+    assert span.attributes["zds.retries"] == 1
+
+
+def test_exporter_errors_are_logged(client, caplog):
+    class BrokenExporter:
+        def export(self, span):
+            raise RuntimeError("collector down")
+
+    client.tracer = Tracer(exporter=BrokenExporter())
+
+    with requests_mock.Mocker() as m:
+        m.get(ZAAK_URL, json={"url": ZAAK_URL})
+        assert client.retrieve("zaak", url=ZAAK_URL) == {"url": ZAAK_URL}
+
+    assert "Exporting span" in caplog.text
+
+
+def test_logging_exporter(client, caplog):
+    client.tracer = Tracer(exporter=LoggingExporter())
+
+    with requests_mock.Mocker() as m, caplog.at_level(logging.INFO):
+        m.get(ZAAK_URL, json={"url": ZAAK_URL})
+        client.retrieve("zaak", url=ZAAK_URL)
+
+    (record,) = [r for r in caplog.records if r.name == "zds_client.tracing.spans"]
+    assert record.getMessage().startswith("zaak_read took")
+    assert record.attributes["zds.operation_id"] == "zaak_read"
+
+
+@pytest.fixture
+def server():
+    schema_fetcher.cache.clear()
+    with StubServer(objects=25, page_size=10) as server:
+        Client.load_config(stream=server.client_config)
+        yield server
+
+
+def test_schema_and_page_spans(server):
+    client = Client("stream")
+    client.tracer = Tracer(exporter=InMemoryExporter())
+
+    zaken = list(client.iter_list("zaak"))
+
+    assert zaken == server.zaken
+    spans = {span.span_id: span for span in client.tracer.exporter.spans}
+    by_name = {}
+    for span in spans.values():
+        by_name.setdefault(span.name, []).append(span)
+
+    (list_span,) = [span for span in by_name["zaak_list"] if span.parent_id is None]
+    assert list_span.attributes["zds.pages"] == 3
+    (schema_span,) = by_name["schema fetch"]
+    assert schema_span.attributes["zds.service"] == "stream"
+    assert schema_span.parent_id == list_span.span_id
+
+    pages = sorted(by_name["page"], key=lambda span: span.attributes["zds.page"])
+    assert [span.attributes["zds.page"] for span in pages] == [1, 2, 3]
+    assert {span.parent_id for span in pages} == {list_span.span_id}
+    requests = [span for span in by_name["zaak_list"] if span is not list_span]
+    assert {span.parent_id for span in requests} == {page.span_id for page in pages}
+    assert {span.trace_id for span in spans.values()} == {list_span.trace_id}
+
+
+def test_schema_fetch_is_child_of_the_call(server):
+    client = Client("stream")
+    client.tracer = Tracer(exporter=InMemoryExporter())
+
+    client.retrieve("zaak", uuid=server.zaken[0]["uuid"])
+
+    schema_span, request_span = client.tracer.exporter.spans
+    assert schema_span.name == "schema fetch"
+    assert request_span.name == "zaak_read"
+    assert request_span.parent_id is None
+    assert schema_span.parent_id == request_span.span_id
+    assert schema_span.trace_id == request_span.trace_id
+    assert request_span.attributes["http.status_code"] == 200
+
+
+def test_page_spans_stop_early(server):
+    client = Client("stream")
+    client.tracer = Tracer()
+
+    zaken = client.iter_list("zaak")
+    next(zaken)
+    zaken.close()
+
+    names = [span.name for span in client.tracer.exporter.spans]
+    assert names.count("page") == 1
+    assert all(
+        "error.type" not in span.attributes for span in client.tracer.exporter.spans
+    )
@@ -0,0 +1,149 @@
+import gzip
+import json
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from zds_client import Client
+from zds_client.compression import ResponseTooLarge
+from zds_client.oas import schema_fetcher
+from zds_client.timeouts import deadline
+from zds_client.transport import RecordingNotFound, RecordingTransport, ReplayTransport
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    schema_fetcher.cache.clear()
+
+    def set_transport(transport):
+        monkeypatch.setattr(Client, "transport", transport)
+        monkeypatch.setattr(schema_fetcher, "transport", transport)
+        return transport
+
+    yield set_transport
+    schema_fetcher.cache.clear()
+
+
+def _make_calls(client: Client) -> list:
+    page = client.list("zaak", params={"page": 2})
+    zaak = client.retrieve("zaak", url=page["results"][0]["url"])
+    created = client.create("zaak", {"bronorganisatie": "000000000"})
+    return [page, zaak, created]
+
+
+@pytest.mark.parametrize("filename", ["recording.jsonl", "recording.jsonl.gz"])
+def test_record_and_replay(tmp_path, transport, filename):
+    path = str(tmp_path / filename)
+    with StubServer(objects=30, page_size=10) as server:
+        Client.load_config(recorded=server.client_config)
+        recorder = transport(RecordingTransport(path))
+        recorded = _make_calls(Client("recorded"))
+        recorder.close()
+
+    schema_fetcher.cache.clear()
+    replay = transport(ReplayTransport(path))
+    replayed = _make_calls(Client("recorded"))
+
+    # schema + list + retrieve + create
+    assert len(replay) == 4
+    assert replayed == recorded
+
+
+def test_recording_is_json_lines_without_credentials(tmp_path, transport):
+    path = str(tmp_path / "recording.jsonl.gz")
+    with StubServer(objects=5) as server:
+        Client.load_config(
+            recorded=dict(
+                server.client_config,
+                auth={"client_id": "client", "secret": "secret"},
+            )
+        )
+        recorder = transport(RecordingTransport(path))
+        Client("recorded").list("zaak")
+        recorder.flush()
+
+        with gzip.open(path, "rt") as infile:
+            records = [json.loads(line) for line in infile]
+
+    assert [record["method"] for record in records] == ["GET", "GET"]
+    assert records[1]["status"] == 200
+    assert "Accept-Crs" in records[1]["request_headers"]
+    assert "Authorization" not in records[1]["request_headers"]
+    assert json.loads(records[1]["content"])["count"] == 5
+
+
+def test_record_and_replay_iter_list(tmp_path, transport):
+    path = str(tmp_path / "recording.jsonl")
+    with StubServer(objects=25, page_size=10) as server:
+        Client.load_config(recorded=server.client_config)
+        recorder = transport(RecordingTransport(path))
+        recorded = list(Client("recorded").iter_list("zaak"))
+        recorder.close()
+
+    schema_fetcher.cache.clear()
+    transport(ReplayTransport(path))
+    replayed = list(Client("recorded").iter_list("zaak"))
+
+    assert len(recorded) == 25
+    assert replayed == recorded
+
+
+def test_record_streamed_responses(tmp_path, transport):
+    path = str(tmp_path / "recording.jsonl")
+    with StubServer(objects=5) as server:
+        Client.load_config(
+            recorded=dict(server.client_config, compression={"max_response_size": 1000})
+        )
+        recorder = transport(RecordingTransport(path))
+        client = Client("recorded")
+        client.fetch_schema()
+
+        # still read in a streaming way, and not recorded when aborted
+        with pytest.raises(ResponseTooLarge):
+            client.list("zaak")
+        # within a deadline, bodies are streamed too
+        with deadline(5):
+            zaak = client.retrieve("zaak", url=server.zaken[0]["url"])
+        recorder.close()
+
+    with open(path) as infile:
+        records = [json.loads(line) for line in infile]
+    assert [record["url"] for record in records[1:]] == [server.zaken[0]["url"]]
+    assert json.loads(records[1]["content"]) == zaak
+
+
+def test_replay_unknown_request(tmp_path, transport):
+    path = tmp_path / "recording.jsonl"
+    path.write_text("")
+    replay = transport(ReplayTransport(str(path)))
+
+    with pytest.raises(RecordingNotFound):
+        replay.send("GET", "https://example.com/api/v1/zaken")
+
+
+def test_replay_latency(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    record = {
+        "method": "GET",
+        "url": "https://example.com/api/v1/zaken?b=2&a=1",
+        "body_hash": None,
+        "status": 200,
+        "headers": {"Content-Type": "application/json"},
+        "content": "[]",
+        "elapsed": 0.5,
+    }
+    path.write_text(json.dumps(record) + "\n")
+    delays = []
+
+    def latency():
+        delays.append(0.0)
+        return 0.0
+
+    replay = ReplayTransport(str(path), latency=latency)
+    response = replay.send(
+        "GET", "https://example.com/api/v1/zaken", params={"a": 1, "b": 2}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == []
+    assert delays == [0.0]
@@ -0,0 +1,203 @@
+import pytest
+import requests_mock
+
+from benchmarks.schema import get_schema, make_zaak
+from zds_client import Client, ClientError
+from zds_client.validation import ValidationError, get_request_validator
+
+SPEC = get_schema("/api/v1")
+ZRC = "https://zrc.example.com/api/v1"
+
+
+def _valid_zaak() -> dict:
+    zaak = make_zaak(ZRC, 0)
+    for read_only in ("url", "uuid", "status", "einddatum"):
+        del zaak[read_only]
+    return zaak
+
+
+def _errors(data, operation_id="zaak_create", partial=False, spec=SPEC):
+    errors = get_request_validator(spec, operation_id, partial=partial).errors(data)
+    return {error["name"]: error["code"] for error in errors}
+
+
+def test_valid_body():
+    assert _errors(_valid_zaak()) == {}
+
+
+def test_read_only_and_unknown_properties_are_ignored():
+    zaak = dict(_valid_zaak(), url="not a url", status=None, unknown=1)
+
+    assert _errors(zaak) == {}
+
+
+def test_invalid_body():
+    zaak = dict(
+        _valid_zaak(),
+        bronorganisatie="1234567890",
+        startdatum="16-03-2021",
+        zaaktype="zaaktype",
+        vertrouwelijkheidaanduiding="topsecret",
+        omschrijving=None,
+        kenmerken=[{"kenmerk": "a", "bron": 1}, {"bron": "b"}],
+    )
+    del zaak["verantwoordelijkeOrganisatie"]
+
+    assert _errors(zaak) == {
+        "bronorganisatie": "max_length",
+        "startdatum": "invalid",
+        "zaaktype": "invalid",
+        "vertrouwelijkheidaanduiding": "invalid_choice",
+        "omschrijving": "null",
+        "kenmerken.0.bron": "invalid",
+        "kenmerken.1.kenmerk": "required",
+        "verantwoordelijkeOrganisatie": "required",
+    }
+
+
+def test_body_must_be_an_object():
+    assert _errors([]) == {"nonFieldErrors": "invalid"}
+
+
+def test_partial_update_does_not_require_properties():
+    assert _errors({"omschrijving": "foo"}, "zaak_partial_update", partial=True) == {}
+    assert _errors({"omschrijving": "foo"}, "zaak_update") != {}
+
+
+def test_references_and_combinators():
+    spec = {
+        "paths": {
+            "/nodes": {
+                "post": {
+                    "operationId": "node_create",
+                    "requestBody": {"$ref": "#/components/requestBodies/Node"},
+                }
+            }
+        },
+        "components": {
+            "requestBodies": {
+                "Node": {
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/Node"}
+                        }
+                    }
+                }
+            },
+            "schemas": {
+                "Node": {
+                    "allOf": [
+                        {"$ref": "#/components/schemas/Base"},
+                        {
+                            "type": "object",
+                            "properties": {
+                                "children": {
+                                    "type": "array",
+                                    "items": {"$ref": "#/components/schemas/Node"},
+                                    "maxItems": 2,
+                                },
+                                "value": {
+                                    "oneOf": [
+                                        {"type": "integer", "minimum": 0},
+                                        {"type": "string", "pattern": "^[a-z]+$"},
+                                    ]
+                                },
+                            },
+                        },
+                    ]
+                },
+                "Base": {
+                    "type": "object",
+                    "required": ["name"],
+                    "properties": {"name": {"type": "string"}},
+                },
+            },
+        },
+    }
+    valid = {"name": "root", "value": 1, "children": [{"name": "a", "value": "b"}]}
+    invalid = {
+        "value": -1,
+        "children": [{"name": "a", "value": "B"}, {"name": 1}, {"name": "c"}],
+    }
+
+    assert _errors(valid, "node_create", spec=spec) == {}
+    assert _errors(invalid, "node_create", spec=spec) == {
+        "name": "required",
+        "value": "invalid",
+        "children": "max_length",
+        "children.0.value": "invalid",
+        "children.1.name": "invalid",
+    }
+
+
+def test_validators_are_cached():
+    assert get_request_validator(SPEC, "zaak_create") is get_request_validator(
+        SPEC, "zaak_create"
+    )
+
+
+def test_no_request_body():
+    assert _errors({"foo": "bar"}, "zaak_delete") == {}
+
+
+def test_client_validates_before_sending(monkeypatch):
+    monkeypatch.setattr(Client, "validate_requests", True)
+    Client.load_config(zrc={"scheme": "https", "host": "zrc.example.com"})
+    client = Client("zrc")
+    client._schema = SPEC
+
+    with requests_mock.Mocker() as m:
+        m.post(f"{ZRC}/zaken", status_code=201, json={})
+        m.patch(f"{ZRC}/zaken/1", json={})
+        client.create("zaak", _valid_zaak())
+
+        with pytest.raises(ValidationError) as exc_info:
+            client.create("zaak", {"bronorganisatie": "000000000"})
+        client.partial_update("zaak", {"omschrijving": "foo"}, url=f"{ZRC}/zaken/1")
+
+    assert isinstance(exc_info.value, ClientError)
+    assert exc_info.value.args[0]["status"] == 400
+    assert {param["name"] for param in exc_info.value.invalid_params} == {
+        "zaaktype",
+        "verantwoordelijkeOrganisatie",
+        "startdatum",
+    }
+    # the invalid body was never sent
+    assert [request.method for request in m.request_history] == ["POST", "PATCH"]
+
+
+def _spec(properties: dict) -> dict:
+    return {
+        "paths": {
+            "/items": {
+                "post": {
+                    "operationId": "item_create",
+                    "requestBody": {
+                        "content": {
+                            "application/json": {
+                                "schema": {"type": "object", "properties": properties}
+                            }
+                        }
+                    },
+                }
+            }
+        }
+    }
+
+
+def test_never_stricter_than_the_api(caplog):
+    spec = _spec(
+        {
+            "count": {"type": "integer"},
+            # ECMA-262 only: unicode property escape
+            "name": {"type": "string", "pattern": r"^\p{L}+$"},
+            "code": {"type": "string", "pattern": "^[A-Z]+$"},
+        }
+    )
+
+    assert _errors({"count": 1.0, "name": "één"}, "item_create", spec=spec) == {}
+    assert _errors({"count": 1.5, "code": "a"}, "item_create", spec=spec) == {
+        "count": "invalid",
+        "code": "invalid",
+    }
+    assert "\\p{L}" in caplog.text
@@ -0,0 +1,122 @@
+import socket
+
+import pytest
+import requests_mock
+
+from benchmarks.stub_server import StubServer
+from zds_client import Client
+from zds_client.dns import DNSCache
+from zds_client.oas import schema_fetcher
+from zds_client.transport import RequestsTransport
+
+
+@pytest.fixture
+def server():
+    with StubServer(objects=5) as server:
+        yield server
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    schema_fetcher.cache.clear()
+    transport = RequestsTransport(dns_cache=DNSCache())
+    monkeypatch.setattr(Client, "transport", transport)
+    yield transport
+    transport.close()
+
+
+def _get_pool(transport: RequestsTransport, url: str):
+    session = transport.get_session(url)
+    return next(iter(session.get_adapter(url).poolmanager.pools._container.values()))
+
+
+def test_warmup(server, transport):
+    Client.load_config(
+        warm=dict(server.client_config, auth={"client_id": "a", "secret": "b" * 32})
+    )
+
+    results = Client.warmup(["warm"], connections=3)
+
+    assert results == {"warm": None}
+    client = Client("warm")
+    assert client.auth._credentials
+    assert schema_fetcher.cache[f"{client.base_url}schema/openapi.yaml"]
+    pool = _get_pool(transport, client.base_url)
+    assert pool.num_connections == 3
+    assert len([conn for conn in pool.pool.queue if conn is not None]) == 3
+
+    # the requests use the connections that are already open
+    client.retrieve("zaak", url=server.zaken[0]["url"])
+    assert pool.num_connections == 3
+
+
+def test_warmup_failure_is_returned(transport):
+    Client.load_config(down={"scheme": "http", "host": "127.0.0.1", "port": 1})
+
+    results = Client.warmup(["down"])
+
+    assert isinstance(results["down"], Exception)
+
+
+def test_dns_cache(monkeypatch):
+    calls = []
+    getaddrinfo = socket.getaddrinfo
+
+    def counting_getaddrinfo(*args, **kwargs):
+        calls.append(args)
+        return getaddrinfo(*args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", counting_getaddrinfo)
+    dns_cache = DNSCache(ttl=60)
+
+    first = dns_cache.resolve("localhost", 80)
+    second = dns_cache.resolve("localhost", 80)
+    dns_cache.forget("localhost", 80)
+    dns_cache.resolve("localhost", 80)
+
+    assert first == second
+    assert len(calls) == 2
+
+
+def test_requests_resolve_through_dns_cache(server, transport, monkeypatch):
+    Client.load_config(
+        cached=dict(server.client_config, host="zaken.invalid"),
+    )
+    transport.dns_cache.resolve = lambda host, port: socket.getaddrinfo(
+        "127.0.0.1", port, 0, socket.SOCK_STREAM
+    )
+    client = Client("cached")
+    client._schema = server.schema
+
+    zaak = client.retrieve("zaak", uuid=server.zaken[0]["uuid"])
+
+    assert zaak["uuid"] == server.zaken[0]["uuid"]
+
+
+def test_requests_try_each_cached_address(server, transport):
+    Client.load_config(
+        cached=dict(server.client_config, host="zaken.invalid"),
+    )
+    # nothing listens on 127.0.0.2, the connection is refused
+    transport.dns_cache.resolve = lambda host, port: [
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.2", port)),
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port)),
+    ]
+    client = Client("cached")
+    client._schema = server.schema
+
+    zaak = client.retrieve("zaak", uuid=server.zaken[0]["uuid"])
+
+    assert zaak["uuid"] == server.zaken[0]["uuid"]
+
+
+def test_cookies_are_not_persisted(transport):
+    url = "https://example.com/api/v1/zaken"
+
+    with requests_mock.Mocker() as m:
+        m.get(url, json=[], headers={"Set-Cookie": "session=secret; Path=/"})
+        transport.send("GET", url)
+        transport.send("GET", url)
+
+    assert "Cookie" not in m.request_history[1].headers
+    assert len(transport.get_session(url).cookies) == 0
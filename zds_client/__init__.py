@@ -1,9 +1,8 @@
-from pkg_resources import get_distribution
-
 from .auth import ClientAuth
 from .client import Client, ClientError
 from .schema import extract_params, get_operation_url
 
-__version__ = get_distribution("gemma-zds-client").version
+# kept in sync by bumpversion, avoids the (expensive) distribution metadata lookup
+__version__ = "1.0.0"
 
 __all__ = ["Client", "ClientAuth", "ClientError", "extract_params", "get_operation_url"]
@@ -0,0 +1,327 @@
+"""
+Cache backends.
+
+Backends behave like (a subset of) a dictionary, so they can be plugged in anywhere
+a plain ``dict`` is accepted as cache, e.g. ``schema_fetcher.cache``.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from .compat import lazy_import
+
+# only needed by SharedCache, not by the MemoryCache used everywhere at import time
+pickle = lazy_import("pickle")
+sqlite3 = lazy_import("sqlite3")
+
+__all__ = [
+    "MemoryCache",
+    "SharedCache",
+    "delete_prefix",
+    "get_collection_url",
+    "invalidate_url",
+]
+
+_MISSING = object()
+
+
+def delete_prefix(cache, prefix: str) -> int:
+    """
+    Delete all (string) keys starting with ``prefix`` from any cache backend.
+
+    :return: the number of deleted entries
+    """
+    if hasattr(cache, "delete_prefix"):
+        return cache.delete_prefix(prefix)
+    keys = [key for key in cache.keys() if str(key).startswith(prefix)]
+    for key in keys:
+        del cache[key]
+    return len(keys)
+
+
+def invalidate_url(cache, url: str) -> int:
+    """
+    Delete the cached responses of a URL, for any query and credentials.
+
+    :return: the number of deleted entries
+    """
+    # keys are "<url>[?<query>]#<credentials fingerprint>"
+    return delete_prefix(cache, url + "#") + delete_prefix(cache, url + "?")
+
+
+def get_collection_url(url: str) -> str:
+    """
+    Return the URL of the collection of a resource URL.
+    """
+    return url.rstrip("/").rsplit("/", 1)[0]
+
+
+class MemoryCache:
+    """
+    Thread-safe, size-bounded in-memory cache with least-recently-used eviction.
+
+    :param max_entries: the maximum number of entries to keep
+    :param ttl: default time to live of the entries, in seconds. ``None`` means
+      entries don't expire.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (expires at, value)
+        self._entries = OrderedDict()
+
+    def __repr__(self):
+        return "<%s: %d entries>" % (self.__class__.__name__, len(self))
+
+    def get(self, key: Hashable, default=None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def delete_prefix(self, prefix: str) -> int:
+        """
+        Delete all (string) keys starting with ``prefix``.
+
+        :return: the number of deleted entries
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if isinstance(key, str) and key.startswith(prefix)
+            ]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._entries)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedCache:
+    """
+    Cache backed by a local SQLite database, shared by all processes on a node.
+
+    Worker processes pointing to the same file share one copy of the cached data
+    (schemas, responses), instead of each fetching and holding their own. The
+    database is memory-mapped, so lookups are served from the OS page cache. Values
+    are pickled - every lookup returns a fresh copy.
+
+    Writers from multiple threads and processes are serialized by SQLite. When the
+    total size of the values exceeds ``max_size``, the least recently used entries
+    are evicted.
+
+    :param path: path of the database file, created if it doesn't exist
+    :param max_size: the maximum total size of the (pickled) values, in bytes
+    :param ttl: default time to live of the entries, in seconds. ``None`` means
+      entries don't expire.
+    :param timeout: how long to wait for a lock held by another writer, in seconds
+    """
+
+    # don't write on every read to track usage, a coarse granularity suffices
+    touch_interval = 60
+
+    def __init__(
+        self,
+        path: str,
+        max_size: int = 256 * 1024 * 1024,
+        ttl: Optional[float] = None,
+        timeout: float = 10,
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, size INTEGER, "
+                "expires_at REAL, accessed_at REAL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed_at "
+                "ON entries (accessed_at)"
+            )
+
+    def __repr__(self):
+        return "<%s: %s>" % (self.__class__.__name__, self.path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _connection(self) -> "sqlite3.Connection":
+        # connections can't be shared between threads, nor survive a fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA mmap_size={}".format(self.max_size * 2))
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str, default=None) -> Any:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, expires_at, accessed_at FROM entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return default
+
+        value, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at is not None and expires_at < now:
+            self.delete(key)
+            return default
+        if accessed_at < now - self.touch_interval:
+            connection.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return pickle.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), expires_at, now),
+            )
+            self._evict(connection, now)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _evict(self, connection, now: float) -> None:
+        connection.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        (total,) = connection.execute("SELECT TOTAL(size) FROM entries").fetchone()
+        if total <= self.max_size:
+            return
+
+        # evict down to 90% of the maximum, to not evict on every write
+        excess = total - self.max_size * 0.9
+        evict = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ):
+            evict.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM entries WHERE key = ?", evict)
+
+    def delete(self, key: str) -> bool:
+        cursor = self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def delete_prefix(self, prefix: str) -> int:
+        """
+        Delete all keys starting with ``prefix``.
+
+        :return: the number of deleted entries
+        """
+        if not prefix:
+            return self._connection().execute("DELETE FROM entries").rowcount
+        # a range rather than LIKE, so the primary key index is used
+        end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        cursor = self._connection().execute(
+            "DELETE FROM entries WHERE key >= ? AND key < ?", (prefix, end)
+        )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM entries")
+
+    def keys(self) -> list:
+        return [key for (key,) in self._connection().execute("SELECT key FROM entries")]
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        row = (
+            self._connection()
+            .execute("SELECT expires_at FROM entries WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row is not None and (row[0] is None or row[0] >= time.time())
+
+    def __len__(self):
+        (count,) = self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()
+        return count
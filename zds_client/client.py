@@ -1,24 +1,58 @@
 import copy
+import hashlib
+import json
 import logging
 import re
 import warnings
-from typing import Any, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from urllib.parse import urljoin, urlparse
 
-import requests
-import yaml
-from requests.structures import CaseInsensitiveDict
-
+from .cache import get_collection_url, invalidate_url
+from .compact import CompactDecoder
+from .compat import lazy_import
+from .compression import (
+    TransferStats,
+    close_response,
+    get_wire_size,
+    iter_response,
+    read_response,
+)
 from .config import ClientConfig
+from .fields import get_objects, project, validate_selection
+from .hedging import get_hedger
 from .log import Log
 from .oas import schema_fetcher
+from .priority import Slot, get_priority, get_scheduler
+from .profiling import profiled
 from .registry import registry
-from .schema import get_headers, get_operation_url
+from .schema import compile_schema, get_headers, get_operation_url
+from .streaming import ListStream
+from .timeouts import DeadlineExceeded, get_remaining, get_timeout, propagate
+from .tracing import (
+    get_current_span,
+    get_trace_headers,
+    operation_span,
+    traced,
+    use_span,
+)
+from .transport import RequestsTransport
+
+requests = lazy_import("requests")
+yaml = lazy_import("yaml")
 
 logger = logging.getLogger(__name__)
 
 Object = Dict[str, Any]
 
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+}
+
+# the number of credentials (identities) to keep header templates for
+MAX_HEADER_TEMPLATES = 16
+
 UUID_PATTERN = re.compile(
     r"[0-9a-f]{8}\-[0-9a-f]{4}\-4[0-9a-f]{3}\-[89ab][0-9a-f]{3}\-[0-9a-f]{12}",
     flags=re.I,
@@ -32,10 +66,33 @@ class ClientError(Exception):
 class Client:
 
     _schema = None
+    _schema_url = None
+    _schema_version = None
     _log = Log()
+    _transfer_stats = TransferStats()
 
     auth = None
 
+    # cache backend for GET responses, e.g. a zds_client.cache.SharedCache
+    response_cache = None
+
+    # validate request bodies against the schema before sending them, see
+    # zds_client.validation
+    validate_requests = False
+
+    # profiles a sample of the requests, see zds_client.profiling
+    profiler = None
+
+    # records the requests as spans, see zds_client.tracing
+    tracer = None
+
+    # the priority class of the requests, unless set for the block of the call,
+    # see zds_client.priority
+    priority = None
+
+    # sends the requests, see zds_client.transport
+    transport = RequestsTransport()
+
     operation_suffix_mapping = {
         "list": "_list",
         "retrieve": "_read",
@@ -62,9 +119,8 @@ class Client:
             )
 
         self.service = service
-        self.base_path = base_path
-
         self._base_url = None
+        self.base_path = base_path
 
         self.auth = self._config.auth
 
@@ -103,20 +159,90 @@ class Client:
         :param manual: any manual overrides, as kwargs. Note this completely
           overwrites any existing config in the YAML file if specified.
         """
+        registry.update(cls._read_config(path, **manual))
+
+    @classmethod
+    def reload_config(cls, path: str = None, **manual):
+        """
+        Replace the complete client configuration in one atomic operation.
+
+        Takes the same arguments as :meth:`load_config`. Any aliases not present in
+        the new configuration are removed. Client instances that were created before
+        the reload keep using the configuration they were created with.
+        """
+        registry.update(cls._read_config(path, **manual), replace=True)
+
+    @classmethod
+    def warmup(
+        cls,
+        services: Optional[Iterable[str]] = None,
+        connections: int = 2,
+        max_workers: int = 8,
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        Prepare the registered services for their first requests, concurrently.
+
+        For every service, the host name is resolved, ``connections`` connections
+        are opened and kept in the pool of the transport, the JWT is signed and the
+        schema is loaded. Failures are logged and returned rather than raised, so a
+        service that is down doesn't block the start of a worker.
+
+        :param services: the aliases of the services, defaults to all registered
+          services
+        :param connections: the number of connections to open per service
+        :param max_workers: the maximum number of services to warm up concurrently
+        :return: the exception per service alias, ``None`` if all went well
+        """
+        services = list(registry) if services is None else list(services)
+        if not services:
+            return {}
+
+        def warmup_service(alias: str) -> None:
+            client = cls(alias)
+            config = client._config
+            dns_cache = getattr(cls.transport, "dns_cache", None)
+            if dns_cache is not None:
+                dns_cache.resolve(config.host, config.port)
+            if connections and hasattr(cls.transport, "open_connections"):
+                cls.transport.open_connections(client.base_url, connections)
+            if client.auth is not None:
+                client.auth.credentials()
+            client.schema
+
+        workers = min(max_workers, len(services))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                alias: executor.submit(propagate(warmup_service), alias)
+                for alias in services
+            }
+
+        results = {}
+        for alias, future in futures.items():
+            results[alias] = future.exception()
+            if results[alias] is not None:
+                logger.warning(
+                    "Warming up service '%s' failed", alias, exc_info=results[alias]
+                )
+        return results
+
+    @staticmethod
+    def _read_config(path: str = None, **manual) -> Dict[str, ClientConfig]:
+        configs = {}
+
         if path is not None:
             logger.info("Loading config from %s", path)
             with open(path, "r") as config_file:
                 client_configs = yaml.safe_load(config_file)
 
             for alias, _config in client_configs.items():
-                config = ClientConfig.from_dict(_config)
-                registry.register(alias, config)
+                configs[alias] = ClientConfig.from_dict(_config)
 
         if manual:
             logger.info("Applying manual config: %r", manual)
             for alias, _config in manual.items():
-                config = ClientConfig.from_dict(_config)
-                registry.register(alias, config)
+                configs[alias] = ClientConfig.from_dict(_config)
+
+        return configs
 
     @classmethod
     def from_url(cls, detail_url: str) -> "Client":
@@ -130,10 +256,13 @@ class Client:
         bits = re.split(UUID_PATTERN, parsed_url.path)
         base_path = (bits[0].rstrip("/").rsplit("/", 1))[0] + "/"
 
-        # register the config
-        config = ClientConfig.from_url(detail_url)
-        alias = config.base_url
-        registry.register(alias, config)
+        # re-use the config (and credentials) of known services
+        alias = registry.get_alias_for_url(detail_url)
+        if alias is None:
+            # register the config
+            config = ClientConfig.from_url(detail_url)
+            alias = config.base_url
+            registry.register(alias, config)
         return cls(alias, base_path)
 
     @property
@@ -145,10 +274,25 @@ class Client:
             entry for entry in self._log.entries() if entry["service"] == self.service
         )
 
+    @property
+    def transfer_stats(self) -> Dict[str, int]:
+        """
+        Counters of the (compressed and uncompressed) bytes transferred.
+        """
+        return self._transfer_stats.get(self.service)
+
+    @property
+    def base_path(self) -> str:
+        return self._base_path
+
+    @base_path.setter
+    def base_path(self, base_path: str) -> None:
+        self._base_path = base_path
+        self._default_base_url = f"{self._config.base_url}{base_path}"
+
     @property
     def base_url(self) -> str:
-        default = f"{self._config.base_url}{self.base_path}"
-        return self._base_url or default
+        return self._base_url or self._default_base_url
 
     @base_url.setter
     def base_url(self, base_url: str) -> None:
@@ -156,7 +300,10 @@ class Client:
 
     @property
     def schema(self):
-        if self._schema is None:
+        url = self._schema_url
+        if self._schema is None or (
+            url is not None and schema_fetcher.is_updated(url, self._schema_version)
+        ):
             self.fetch_schema()
         return self._schema
 
@@ -171,6 +318,8 @@ class Client:
         """
         pass
 
+    @traced
+    @profiled
     def request(
         self,
         path: str,
@@ -178,40 +327,147 @@ class Client:
         method="GET",
         expected_status=200,
         request_kwargs: Optional[dict] = None,
+        compact: Optional[CompactDecoder] = None,
+        stream: bool = False,
+        schema: Optional[dict] = None,
         **kwargs,
-    ) -> Union[List[Object], Object]:
+    ) -> Union[List[Object], Object, ListStream]:
         """
         Make the HTTP request using requests.
 
         The URL is created based on the path and base URL and any defaults
         from the OAS schema are injected.
 
+        :param compact: a :class:`zds_client.compact.CompactDecoder` to decode the
+          response body with, sharing repeated values between objects
+        :param stream: parse the (list) response incrementally, returning a
+          :class:`zds_client.streaming.ListStream`. Streamed responses are not
+          cached, and are passed to :meth:`post_response` and the log as ``None``.
+        :param schema: the schema the URL was resolved with, defaults to
+          :attr:`schema`. A call reads the schema once, so a schema refreshed in
+          the meantime can't mix two versions in one call.
         :return: a list or dict, the result of calling response.json()
         :raises: :class:`requests.HTTPException` for internal server errors
         :raises: :class:`ClientError` for HTTP 4xx status codes
+        :raises: :class:`zds_client.validation.ValidationError` for invalid request
+          bodies, if :attr:`validate_requests` is enabled
+        :raises: :class:`zds_client.timeouts.DeadlineExceeded` if the deadline of
+          the call is spent
         """
         url = urljoin(self.base_url, path)
+        span = get_current_span() if self.tracer is not None else None
+        if span is not None:
+            span.set_attribute("http.method", method)
+            span.set_attribute("http.url", url)
 
         if request_kwargs:
             kwargs.update(request_kwargs)
 
-        headers = CaseInsensitiveDict(kwargs.pop("headers", {}))
-        headers.setdefault("Accept", "application/json")
-        headers.setdefault("Content-Type", "application/json")
-        schema_headers = get_headers(self.schema, operation)
-        for header, value in schema_headers.items():
-            headers.setdefault(header, value)
-        if self.auth:
-            headers.update(self.auth.credentials())
+        if schema is None:
+            schema = self.schema
+
+        if self.validate_requests and method in ("POST", "PUT", "PATCH"):
+            self._validate_request(schema, operation, method, kwargs.get("json"))
+
+        configured_timeout = kwargs.get("timeout", self._config.timeout)
+        timeout = get_timeout(configured_timeout)
+        # a transport timeout then means the deadline is spent
+        deadline_bound = timeout != configured_timeout
+        if timeout is not None:
+            kwargs["timeout"] = timeout
 
+        headers = self._build_headers(operation, kwargs.pop("headers", None), schema)
         kwargs["headers"] = headers
+        for header, value in get_trace_headers().items():
+            headers.setdefault(header, value)
+
+        cache_key = None
+        if self.response_cache is not None and not stream:
+            cache_key = self._get_cache_key(url, kwargs.get("params"), headers)
+            if method == "GET":
+                cached = self.response_cache.get(cache_key)
+                if cached is not None and cached[0] == expected_status:
+                    if span is not None:
+                        span.set_attribute("http.status_code", cached[0])
+                        span.set_attribute("zds.cache_hit", True)
+                    if compact is not None:
+                        return compact.decode(cached[1])
+                    return json.loads(cached[1])
+
+        request_data = copy.deepcopy(kwargs.get("data", kwargs.get("json", None)))
+        compression = self._config.compression
+        uncompressed_size = None
+        if compression is not None:
+            uncompressed_size = compression.prepare_request(headers, kwargs)
+
+        # read the body in chunks, so that the deadline is checked in between
+        if stream or get_remaining() is not None:
+            kwargs["stream"] = True
 
         pre_id = self.pre_request(method, url, **kwargs)
 
-        response = requests.request(method, url, **kwargs)
+        slot = self._acquire_slot()
+        if span is not None and slot is not None:
+            span.set_attribute("zds.priority", slot.priority)
+        try:
+            hedging = self._config.hedging
+            if hedging is not None and method == "GET":
+                hedger = get_hedger(self.service, hedging)
+                response = hedger.send(self.transport, method, url, **kwargs)
+            else:
+                response = self.transport.send(method, url, **kwargs)
+        except BaseException as exc:
+            if slot is not None:
+                slot.release()
+            if deadline_bound and isinstance(exc, requests.Timeout):
+                raise DeadlineExceeded(
+                    "The deadline was exceeded requesting {url}".format(url=url)
+                ) from exc
+            raise
+        if span is not None:
+            span.set_attribute("http.status_code", response.status_code)
+
+        max_response_size = compression.max_response_size if compression else None
+        if stream and response.status_code == expected_status:
+            self.post_response(pre_id, None)
+            self._log.add(
+                self.service,
+                url,
+                method,
+                dict(headers),
+                request_data,
+                response.status_code,
+                dict(response.headers),
+                None,
+                params=kwargs.get("params"),
+            )
+
+            # don't hold the slot while the caller iterates, it may make requests
+            if slot is not None:
+                slot.release()
+
+            def on_close(list_stream):
+                close_response(response)
+                self._record_transfer(response, list_stream.size, uncompressed_size)
+
+            return ListStream(
+                iter_response(response, max_response_size),
+                decoder=compact.get_json_decoder() if compact is not None else None,
+                on_close=on_close,
+            )
 
         try:
-            response_json = response.json()
+            content = read_response(response, max_response_size)
+        finally:
+            if slot is not None:
+                slot.release()
+        self._record_transfer(response, len(content), uncompressed_size)
+
+        try:
+            if compact is not None:
+                response_json = compact.decode(content)
+            else:
+                response_json = response.json()
         except Exception:
             response_json = None
 
@@ -222,7 +478,7 @@ class Client:
             url,
             method,
             dict(headers),
-            copy.deepcopy(kwargs.get("data", kwargs.get("json", None))),
+            request_data,
             response.status_code,
             dict(response.headers),
             response_json,
@@ -237,8 +493,114 @@ class Client:
             raise ClientError(response_json) from exc
 
         assert response.status_code == expected_status, response_json
+
+        if cache_key is not None:
+            self._update_cache(cache_key, method, response, content)
         return response_json
 
+    def _acquire_slot(self) -> Optional[Slot]:
+        """
+        Wait for a slot to send the request in, if the service has priority lanes.
+        """
+        lanes = self._config.priority
+        if lanes is None:
+            return None
+        return get_scheduler(self.service, lanes).acquire(get_priority(self.priority))
+
+    def _build_headers(
+        self,
+        operation: str,
+        extra_headers: Optional[dict] = None,
+        schema: Optional[dict] = None,
+    ):
+        """
+        Build the request headers from the cached template for the operation.
+
+        The template holds the default headers, the headers required by the schema
+        and the credentials. It's cached on the compiled schema operation, per set
+        of credentials, so rotated credentials or a refreshed schema result in a
+        fresh template.
+        """
+        credentials = self.auth.credentials() if self.auth else {}
+        key = tuple(credentials.items())
+        if schema is None:
+            schema = self.schema
+
+        try:
+            templates = compile_schema(schema).get_operation(operation).header_templates
+        except ValueError:
+            templates = {}
+
+        template = templates.get(key)
+        if template is None:
+            template = requests.structures.CaseInsensitiveDict(DEFAULT_HEADERS)
+            for header, value in get_headers(schema, operation).items():
+                template.setdefault(header, value)
+            template.update(credentials)
+            if len(templates) >= MAX_HEADER_TEMPLATES:
+                templates.clear()
+            templates[key] = template
+
+        headers = template.copy()
+        if extra_headers:
+            headers.update(extra_headers)
+            # the credentials take precedence over the extra headers
+            headers.update(credentials)
+        return headers
+
+    def _validate_request(
+        self, schema: dict, operation: str, method: str, data: Any
+    ) -> None:
+        from .validation import get_request_validator
+
+        if data is None:
+            return
+        try:
+            validator = get_request_validator(
+                schema, operation, partial=method == "PATCH"
+            )
+        except ValueError:
+            # operations that are not in the schema can't be validated
+            return
+        validator.validate(data)
+
+    def _get_cache_key(self, url: str, params, headers) -> str:
+        """
+        Build the response cache key, unique per URL (with query) and credentials.
+        """
+        prepared = requests.models.PreparedRequest()
+        prepared.prepare_url(url, params)
+        authorization = headers.get("Authorization")
+        fingerprint = (
+            hashlib.sha1(authorization.encode("utf-8")).hexdigest()[:16]
+            if authorization
+            else "anonymous"
+        )
+        return "{url}#{fingerprint}".format(url=prepared.url, fingerprint=fingerprint)
+
+    def _update_cache(self, cache_key: str, method: str, response, content: bytes):
+        if method != "GET":
+            # the resource was modified (or deleted): drop the stale copies of any
+            # credentials, and the lists of the collection it may appear in
+            url = cache_key.rsplit("#", 1)[0].split("?", 1)[0]
+            invalidate_url(self.response_cache, url)
+            invalidate_url(self.response_cache, get_collection_url(url))
+        elif "no-store" not in response.headers.get("Cache-Control", ""):
+            self.response_cache.set(cache_key, (response.status_code, content))
+
+    def _record_transfer(
+        self, response, content_size: int, uncompressed_size: Optional[int]
+    ) -> None:
+        request_body = response.request.body if response.request else None
+        request_size = len(request_body or b"")
+        self._transfer_stats.record(
+            self.service,
+            request_bytes=request_size,
+            request_bytes_uncompressed=uncompressed_size or request_size,
+            response_bytes=get_wire_size(response),
+            response_bytes_uncompressed=content_size,
+        )
+
     def post_response(
         self, pre_id: Any, response_data: Optional[Union[dict, list]] = None
     ) -> None:
@@ -247,7 +609,77 @@ class Client:
     def fetch_schema(self) -> None:
         url = urljoin(self.base_url, "schema/openapi.yaml")
         logger.info("Fetching schema at '%s'", url)
-        self._schema = schema_fetcher.fetch(url, {"v": "3"})
+        kwargs = {}
+        timeout = get_timeout(self._config.timeout)
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        # read the version first, so a concurrent refresh is picked up next time
+        version = schema_fetcher.get_version(url)
+        if self.tracer is not None:
+            attributes = {"zds.service": self.service, "http.url": url}
+            with self.tracer.span("schema fetch", attributes):
+                self._schema = schema_fetcher.fetch(url, {"v": "3"}, **kwargs)
+        else:
+            self._schema = schema_fetcher.fetch(url, {"v": "3"}, **kwargs)
+        self._schema_url = url
+        self._schema_version = version
+
+    def _prepare_selection(
+        self,
+        operation_id: str,
+        params: Optional[dict],
+        fields: Optional[Iterable[str]],
+        expand: Optional[Iterable[str]],
+        schema: dict,
+    ) -> Tuple[Optional[dict], Optional[tuple]]:
+        """
+        Pass ``fields``/``expand`` to the API, if supported by the operation.
+
+        Returns the query params and the selection that must be applied client-side.
+        """
+        if not fields and not expand:
+            return params, None
+
+        fields, expand = list(fields or []), list(expand or [])
+        operation = compile_schema(schema).get_operation(operation_id)
+        validate_selection(operation, fields, expand)
+
+        params = dict(params or {})
+        client_fields, client_expand = [], []
+
+        if expand and "expand" in operation.query_parameters:
+            params["expand"] = ",".join(expand)
+        else:
+            client_expand = expand
+
+        if fields and "fields" in operation.query_parameters:
+            # client-side expansion needs the references to expand
+            server_fields = fields + [
+                expansion.split(".", 1)[0]
+                for expansion in client_expand
+                if expansion.split(".", 1)[0] not in fields
+            ]
+            params["fields"] = ",".join(server_fields)
+            if len(server_fields) > len(fields):
+                client_fields = fields
+        else:
+            client_fields = fields
+
+        return params, (client_fields, client_expand)
+
+    def _apply_selection(self, response_data, selection: Optional[tuple]):
+        if not selection:
+            return response_data
+
+        fields, expand = selection
+        objects = get_objects(response_data)
+        if expand:
+            from .resources import expand as expand_objects
+
+            expand_objects(objects, expand)
+        if fields:
+            project(objects, fields)
+        return response_data
 
     def list(
         self,
@@ -255,38 +687,168 @@ class Client:
         params=None,
         query_params=None,
         request_kwargs: Optional[dict] = None,
+        fields: Optional[Iterable[str]] = None,
+        expand: Optional[Iterable[str]] = None,
+        compact: Union[bool, CompactDecoder] = False,
         **path_kwargs,
     ) -> List[Object]:
+        """
+        List the resources of a collection.
+
+        :param fields: only return these fields of the resources. If the API does
+          not support the ``fields`` query parameter, the other fields are dropped
+          client-side.
+        :param expand: embed the resources referenced by these fields under the
+          ``_expand`` key. If the API does not support the ``expand`` query
+          parameter, the references are resolved client-side.
+        :param compact: share repeated strings between the decoded objects, to save
+          memory on large collections. Pass a
+          :class:`zds_client.compact.CompactDecoder` to share them across pages.
+        :raises: :class:`ValueError` if ``fields`` or ``expand`` contain fields
+          that are not in the response schema of the operation, or can't be
+          applied to the read-only records of a compact decoder.
+        """
         op_suffix = self.operation_suffix_mapping["list"]
         operation_id = f"{resource}{op_suffix}"
-        url = get_operation_url(
-            self.schema, operation_id, base_url=self.base_url, **path_kwargs
-        )
-        if query_params and not params:
-            warnings.warn(
-                "Client.list 'query_params' kwarg is deprecated, use 'params' instead.",
-                DeprecationWarning,
+        with operation_span(self, operation_id):
+            schema = self.schema
+            url = get_operation_url(
+                schema, operation_id, base_url=self.base_url, **path_kwargs
             )
-            params = query_params
+            if query_params and not params:
+                warnings.warn(
+                    "Client.list 'query_params' kwarg is deprecated, use 'params' instead.",
+                    DeprecationWarning,
+                )
+                params = query_params
 
-        return self.request(
-            url, operation_id, params=params, request_kwargs=request_kwargs
-        )
+            params, selection = self._prepare_selection(
+                operation_id, params, fields, expand, schema
+            )
+            decoder = self._get_decoder(compact)
+            if decoder is not None and decoder.records and selection and any(selection):
+                raise ValueError(
+                    "Client-side fields and expand can't be applied to records"
+                )
+            response_data = self.request(
+                url,
+                operation_id,
+                params=params,
+                request_kwargs=request_kwargs,
+                compact=decoder,
+                schema=schema,
+            )
+            return self._apply_selection(response_data, selection)
+
+    def iter_list(
+        self,
+        resource: str,
+        params=None,
+        request_kwargs: Optional[dict] = None,
+        compact: Union[bool, CompactDecoder] = False,
+        **path_kwargs,
+    ) -> Iterator[Object]:
+        """
+        Iterate over all resources of a collection, following the pagination.
+
+        The pages are parsed incrementally: every resource is yielded as soon as it
+        is received, without holding the complete page in memory.
+
+        ``compact`` behaves like it does for :meth:`list`.
+
+        With a :attr:`tracer`, the iteration is a span with a child span per page,
+        covering both the request and the parsing of the page.
+        """
+        op_suffix = self.operation_suffix_mapping["list"]
+        operation_id = f"{resource}{op_suffix}"
+        decoder = self._get_decoder(compact)
+
+        tracer = self.tracer
+        list_span = page_span = None
+        if tracer is not None:
+            list_span = tracer.start_span(
+                operation_id,
+                {"zds.service": self.service, "zds.operation_id": operation_id},
+            )
+        pages, error = 0, None
+        try:
+            # the schema may have to be fetched
+            with use_span(list_span):
+                schema = self.schema
+                url = get_operation_url(
+                    schema, operation_id, base_url=self.base_url, **path_kwargs
+                )
+            while url:
+                pages += 1
+                if tracer is not None:
+                    page_span = tracer.start_span(
+                        "page", {"zds.page": pages}, parent=list_span
+                    )
+                # the span is only current while requesting, not across yields
+                with use_span(page_span):
+                    page = self.request(
+                        url,
+                        operation_id,
+                        params=params,
+                        request_kwargs=request_kwargs,
+                        compact=decoder,
+                        stream=True,
+                        schema=schema,
+                    )
+                with page:
+                    yield from page
+                if page_span is not None:
+                    page_span.end()
+                # the next link includes the query parameters
+                url, params = page.next, None
+        except GeneratorExit:
+            # stopped iterating early, not an error
+            raise
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            # ending an ended span does nothing
+            if page_span is not None:
+                page_span.end(error=error)
+            if list_span is not None:
+                list_span.set_attribute("zds.pages", pages)
+                list_span.end(error=error)
 
     def retrieve(
         self,
         resource: str,
         url=None,
         request_kwargs: Optional[dict] = None,
+        fields: Optional[Iterable[str]] = None,
+        expand: Optional[Iterable[str]] = None,
         **path_kwargs,
     ) -> Object:
+        """
+        Retrieve a single resource.
+
+        ``fields`` and ``expand`` behave like they do for :meth:`list`.
+        """
         op_suffix = self.operation_suffix_mapping["retrieve"]
         operation_id = f"{resource}{op_suffix}"
-        if url is None:
-            url = get_operation_url(
-                self.schema, operation_id, base_url=self.base_url, **path_kwargs
+        with operation_span(self, operation_id):
+            schema = self.schema
+            if url is None:
+                url = get_operation_url(
+                    schema, operation_id, base_url=self.base_url, **path_kwargs
+                )
+
+            params, selection = self._prepare_selection(
+                operation_id, None, fields, expand, schema
             )
-        return self.request(url, operation_id, request_kwargs=request_kwargs)
+            response_data = self.request(
+                url,
+                operation_id,
+                params=params,
+                request_kwargs=request_kwargs,
+                schema=schema,
+            )
+            return self._apply_selection(response_data, selection)
 
     def create(
         self,
@@ -297,17 +859,20 @@ class Client:
     ) -> Object:
         op_suffix = self.operation_suffix_mapping["create"]
         operation_id = f"{resource}{op_suffix}"
-        url = get_operation_url(
-            self.schema, operation_id, base_url=self.base_url, **path_kwargs
-        )
-        return self.request(
-            url,
-            operation_id,
-            method="POST",
-            json=data,
-            expected_status=201,
-            request_kwargs=request_kwargs,
-        )
+        with operation_span(self, operation_id):
+            schema = self.schema
+            url = get_operation_url(
+                schema, operation_id, base_url=self.base_url, **path_kwargs
+            )
+            return self.request(
+                url,
+                operation_id,
+                method="POST",
+                json=data,
+                expected_status=201,
+                request_kwargs=request_kwargs,
+                schema=schema,
+            )
 
     def update(
         self,
@@ -319,18 +884,21 @@ class Client:
     ) -> Object:
         op_suffix = self.operation_suffix_mapping["update"]
         operation_id = f"{resource}{op_suffix}"
-        if url is None:
-            url = get_operation_url(
-                self.schema, operation_id, base_url=self.base_url, **path_kwargs
+        with operation_span(self, operation_id):
+            schema = self.schema
+            if url is None:
+                url = get_operation_url(
+                    schema, operation_id, base_url=self.base_url, **path_kwargs
+                )
+            return self.request(
+                url,
+                operation_id,
+                method="PUT",
+                json=data,
+                expected_status=200,
+                request_kwargs=request_kwargs,
+                schema=schema,
             )
-        return self.request(
-            url,
-            operation_id,
-            method="PUT",
-            json=data,
-            expected_status=200,
-            request_kwargs=request_kwargs,
-        )
 
     def partial_update(
         self,
@@ -342,18 +910,21 @@ class Client:
     ) -> Object:
         op_suffix = self.operation_suffix_mapping["partial_update"]
         operation_id = f"{resource}{op_suffix}"
-        if url is None:
-            url = get_operation_url(
-                self.schema, operation_id, base_url=self.base_url, **path_kwargs
+        with operation_span(self, operation_id):
+            schema = self.schema
+            if url is None:
+                url = get_operation_url(
+                    schema, operation_id, base_url=self.base_url, **path_kwargs
+                )
+            return self.request(
+                url,
+                operation_id,
+                method="PATCH",
+                json=data,
+                expected_status=200,
+                request_kwargs=request_kwargs,
+                schema=schema,
             )
-        return self.request(
-            url,
-            operation_id,
-            method="PATCH",
-            json=data,
-            expected_status=200,
-            request_kwargs=request_kwargs,
-        )
 
     def delete(
         self,
@@ -364,17 +935,20 @@ class Client:
     ) -> Object:
         op_suffix = self.operation_suffix_mapping["delete"]
         operation_id = f"{resource}{op_suffix}"
-        if url is None:
-            url = get_operation_url(
-                self.schema, operation_id, base_url=self.base_url, **path_kwargs
+        with operation_span(self, operation_id):
+            schema = self.schema
+            if url is None:
+                url = get_operation_url(
+                    schema, operation_id, base_url=self.base_url, **path_kwargs
+                )
+            return self.request(
+                url,
+                operation_id,
+                method="DELETE",
+                expected_status=204,
+                request_kwargs=request_kwargs,
+                schema=schema,
             )
-        return self.request(
-            url,
-            operation_id,
-            method="DELETE",
-            expected_status=204,
-            request_kwargs=request_kwargs,
-        )
 
     def operation(
         self,
@@ -383,12 +957,34 @@ class Client:
         method="POST",
         url=None,
         request_kwargs: Optional[dict] = None,
+        compact: Union[bool, CompactDecoder] = False,
         **path_kwargs,
     ) -> Union[List[Object], Object]:
-        if url is None:
-            url = get_operation_url(
-                self.schema, operation_id, base_url=self.base_url, **path_kwargs
+        """
+        Call an arbitrary operation, e.g. a search (``zaak__zoek``).
+
+        ``compact`` behaves like it does for :meth:`list`.
+        """
+        with operation_span(self, operation_id):
+            schema = self.schema
+            if url is None:
+                url = get_operation_url(
+                    schema, operation_id, base_url=self.base_url, **path_kwargs
+                )
+            return self.request(
+                url,
+                operation_id,
+                method=method,
+                json=data,
+                request_kwargs=request_kwargs,
+                compact=self._get_decoder(compact),
+                schema=schema,
             )
-        return self.request(
-            url, operation_id, method=method, json=data, request_kwargs=request_kwargs
-        )
+
+    @staticmethod
+    def _get_decoder(compact) -> Optional[CompactDecoder]:
+        if not compact:
+            return None
+        if compact is True:
+            return CompactDecoder()
+        return compact
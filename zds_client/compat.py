@@ -1,9 +1,73 @@
-import jwt as _jwt
+import importlib
+import importlib.util
+import threading
+from typing import Any
 
-if _jwt.__version__ >= "2.0.0":
-    jwt_encode = _jwt.encode
-else:
 
-    def jwt_encode(*args, **kwargs) -> str:
-        encoded = _jwt.encode(*args, **kwargs)
-        return encoded.decode()  # bytestring to string
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    The module is imported with :func:`importlib.import_module` under a lock, so
+    threads using it for the first time at once all get the fully initialized
+    module. Unlike :class:`importlib.util.LazyLoader` (not thread-safe before
+    Python 3.12), nothing is put in :data:`sys.modules` until the real import.
+    """
+
+    __slots__ = ("_name", "_module", "_lock")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<%s: %s>" % (self.__class__.__name__, self._name)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    # e.g. mock.patch("zds_client.oas.requests.get") patches the module itself
+    def __setattr__(self, attr: str, value: Any) -> None:
+        if attr in LazyModule.__slots__:
+            super().__setattr__(attr, value)
+        else:
+            setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._load(), attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Return a :class:`LazyModule`, deferring the import until first attribute access.
+
+    Importing ``requests``, ``yaml`` and ``jwt`` is expensive compared to the rest of
+    this package, and not every consumer of :mod:`zds_client` ends up doing HTTP
+    calls.
+
+    :raises: :class:`ImportError` if the module isn't installed
+    """
+    if importlib.util.find_spec(name) is None:
+        raise ImportError("No module named '{name}'".format(name=name), name=name)
+    return LazyModule(name)
+
+
+_jwt = lazy_import("jwt")
+
+
+def jwt_encode(*args, **kwargs) -> str:
+    encoded = _jwt.encode(*args, **kwargs)
+    # PyJWT < 2.0 returns a bytestring
+    if isinstance(encoded, bytes):
+        return encoded.decode()
+    return encoded
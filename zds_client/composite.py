@@ -0,0 +1,388 @@
+"""
+Composite operations: graphs of create/update steps across services.
+
+Creating a complete dossier takes many requests, most of them referring to the
+objects created before. A :class:`Composite` takes the steps with references
+(:class:`Ref`) to the outputs of earlier steps, and runs every step as soon as the
+steps it refers to are done - independent steps run concurrently, so the wall
+time follows the depth of the graph rather than the number of steps:
+
+>>> dossier = Composite()
+>>> zaak = dossier.create("zaak", zrc_client, "zaak", {"zaaktype": ZAAKTYPE, ...})
+>>> dossier.create("status", zrc_client, "status", {"zaak": zaak, ...})
+>>> document = dossier.create("document", drc_client, "enkelvoudiginformatieobject", {...})
+>>> dossier.create(
+...     "zio", zrc_client, "zaakinformatieobject",
+...     {"zaak": zaak, "informatieobject": document},
+... )
+>>> result = dossier.run()
+>>> result.raise_for_errors()
+>>> result["zaak"].output["url"]
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+from .client import Client, Object
+from .timeouts import propagate
+
+__all__ = ["Composite", "CompositeError", "CompositeResult", "Ref", "StepResult"]
+
+ACTIONS = ("create", "update", "partial_update")
+
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class CompositeError(Exception):
+    """
+    Raised by :meth:`CompositeResult.raise_for_errors` if any step failed.
+    """
+
+    def __init__(self, errors: Dict[str, BaseException]):
+        self.errors = errors
+        super().__init__(
+            "Failed steps: {}".format(
+                ", ".join(
+                    "{} ({!r})".format(name, error) for name, error in errors.items()
+                )
+            )
+        )
+
+
+class Ref:
+    """
+    Reference to (a value in) the output of a step, replaced by that value when
+    the step that contains it is run.
+
+    :param step: the name of the step
+    :param path: the keys to look up in the output, the ``url`` by default
+    """
+
+    __slots__ = ("step", "path")
+
+    def __init__(self, step: str, *path: Union[str, int]):
+        self.step = step
+        self.path = path or ("url",)
+
+    def __repr__(self):
+        return "%s(%s)" % (
+            self.__class__.__name__,
+            ", ".join(repr(bit) for bit in (self.step,) + self.path),
+        )
+
+    def __getitem__(self, key: Union[str, int]) -> "Ref":
+        """
+        Refer to another value of the output, e.g. ``ref["identificatie"]``.
+        """
+        if self.path == ("url",):
+            return Ref(self.step, key)
+        return Ref(self.step, *self.path, key)
+
+    def resolve(self, outputs: Dict[str, Any]) -> Any:
+        value = outputs[self.step]
+        for key in self.path:
+            value = value[key]
+        return value
+
+
+def _find_refs(value: Any) -> Iterator[Ref]:
+    if isinstance(value, Ref):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _find_refs(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _find_refs(item)
+
+
+def _resolve(value: Any, outputs: Dict[str, Any]) -> Any:
+    if isinstance(value, Ref):
+        return value.resolve(outputs)
+    if isinstance(value, dict):
+        return {key: _resolve(item, outputs) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_resolve(item, outputs) for item in value)
+    return value
+
+
+class _Step:
+    __slots__ = (
+        "name",
+        "client",
+        "action",
+        "resource",
+        "data",
+        "url",
+        "path_kwargs",
+        "dependencies",
+    )
+
+    def __init__(self, name, client, action, resource, data, url, path_kwargs, after):
+        self.name = name
+        self.client = client
+        self.action = action
+        self.resource = resource
+        self.data = data
+        self.url = url
+        self.path_kwargs = path_kwargs
+        refs = _find_refs([data, url, path_kwargs])
+        dependencies = [ref.step for ref in refs]
+        dependencies += [ref.step if isinstance(ref, Ref) else ref for ref in after]
+        # keep the order, for predictable error messages
+        self.dependencies = tuple(dict.fromkeys(dependencies))
+
+    def run(self, outputs: Dict[str, Any]) -> Object:
+        data = _resolve(self.data, outputs)
+        path_kwargs = _resolve(self.path_kwargs, outputs)
+        if self.action == "create":
+            return self.client.create(self.resource, data, **path_kwargs)
+        method = getattr(self.client, self.action)
+        url = _resolve(self.url, outputs)
+        return method(self.resource, data, url=url, **path_kwargs)
+
+
+class StepResult:
+    """
+    The outcome of a step.
+
+    :ivar status: ``"done"``, ``"failed"`` or ``"skipped"`` (because a step it
+      depends on didn't succeed)
+    :ivar output: the response data, for steps that are done
+    :ivar error: the exception raised by a failed step
+    :ivar duration: the number of seconds the step took
+    """
+
+    __slots__ = ("name", "status", "output", "error", "duration")
+
+    def __init__(self, name: str, status: str, output=None, error=None, duration=0.0):
+        self.name = name
+        self.status = status
+        self.output = output
+        self.error = error
+        self.duration = duration
+
+    def __repr__(self):
+        return "<%s: %s %s>" % (self.__class__.__name__, self.name, self.status)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == DONE
+
+
+class CompositeResult:
+    """
+    The results of all steps of a :class:`Composite`, by step name in the order
+    the steps were added.
+    """
+
+    def __init__(self, results: Dict[str, StepResult], duration: float):
+        self.results = results
+        self.duration = duration
+
+    def __repr__(self):
+        return "<%s: %d done, %d failed, %d skipped>" % (
+            self.__class__.__name__,
+            len(self._with_status(DONE)),
+            len(self.errors),
+            len(self.skipped),
+        )
+
+    def __getitem__(self, name: str) -> StepResult:
+        return self.results[name]
+
+    def __iter__(self) -> Iterator[StepResult]:
+        return iter(self.results.values())
+
+    def __len__(self):
+        return len(self.results)
+
+    def _with_status(self, status: str) -> List[str]:
+        return [
+            name for name, result in self.results.items() if result.status == status
+        ]
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results.values())
+
+    @property
+    def outputs(self) -> Dict[str, Object]:
+        return {
+            name: result.output for name, result in self.results.items() if result.ok
+        }
+
+    @property
+    def errors(self) -> Dict[str, BaseException]:
+        return {
+            name: result.error
+            for name, result in self.results.items()
+            if result.status == FAILED
+        }
+
+    @property
+    def skipped(self) -> List[str]:
+        return self._with_status(SKIPPED)
+
+    def raise_for_errors(self) -> None:
+        """
+        :raises: :class:`CompositeError` if any of the steps failed
+        """
+        errors = self.errors
+        if errors:
+            raise CompositeError(errors)
+
+
+class Composite:
+    """
+    A graph of create/update steps, run concurrently in dependency order.
+
+    Steps refer to the outputs of earlier steps with :class:`Ref` placeholders,
+    anywhere in their data, URL or path parameters. Adding a step returns a
+    :class:`Ref` to the URL of its output. A step can only refer to steps that were
+    added before it, so the graph can't have cycles.
+    """
+
+    def __init__(self):
+        self._steps: Dict[str, _Step] = {}
+
+    def __repr__(self):
+        return "<%s: %d steps>" % (self.__class__.__name__, len(self._steps))
+
+    def __len__(self):
+        return len(self._steps)
+
+    def add(
+        self,
+        name: str,
+        client: Client,
+        action: str,
+        resource: str,
+        data: dict,
+        url: Union[str, Ref, None] = None,
+        after: Iterable[Union[str, Ref]] = (),
+        **path_kwargs,
+    ) -> Ref:
+        """
+        Add a step calling ``client.<action>(resource, data, ...)``.
+
+        :param name: the unique name of the step
+        :param action: ``"create"``, ``"update"`` or ``"partial_update"``
+        :param url: the URL of the resource to update
+        :param after: steps that must be done first, besides the referred ones
+        :raises: :class:`ValueError` for unknown actions, duplicate names and
+          references to unknown steps
+        """
+        if action not in ACTIONS:
+            raise ValueError(
+                "Unknown action '{}', use one of: {}".format(action, ", ".join(ACTIONS))
+            )
+        if name in self._steps:
+            raise ValueError("Step '{}' was already added".format(name))
+        step = _Step(name, client, action, resource, data, url, path_kwargs, after)
+        unknown = [dep for dep in step.dependencies if dep not in self._steps]
+        if unknown:
+            raise ValueError(
+                "Step '{}' refers to unknown steps: {}".format(name, ", ".join(unknown))
+            )
+        self._steps[name] = step
+        return Ref(name)
+
+    def create(self, name: str, client: Client, resource: str, data: dict, **kwargs):
+        return self.add(name, client, "create", resource, data, **kwargs)
+
+    def update(
+        self, name: str, client: Client, resource: str, data: dict, url, **kwargs
+    ):
+        return self.add(name, client, "update", resource, data, url=url, **kwargs)
+
+    def partial_update(
+        self, name: str, client: Client, resource: str, data: dict, url, **kwargs
+    ):
+        return self.add(
+            name, client, "partial_update", resource, data, url=url, **kwargs
+        )
+
+    def get_depth(self) -> int:
+        """
+        Return the number of steps on the longest dependency chain, the number of
+        sequential rounds of requests needed.
+        """
+        depths = {}
+        for name, step in self._steps.items():
+            depths[name] = 1 + max(
+                (depths[dep] for dep in step.dependencies), default=0
+            )
+        return max(depths.values(), default=0)
+
+    def run(self, max_workers: int = 8) -> CompositeResult:
+        """
+        Run the steps, each as soon as the steps it depends on are done.
+
+        A failed step doesn't stop the others, but the steps depending on it
+        (directly or indirectly) are skipped. The context of the caller, such as
+        the deadline and the current trace span, applies to all steps.
+
+        :param max_workers: the maximum number of concurrent requests
+        :return: the result of every step
+        """
+        start = time.perf_counter()
+        results: Dict[str, StepResult] = {}
+        outputs: Dict[str, Any] = {}
+        waiting = {name: set(step.dependencies) for name, step in self._steps.items()}
+        dependents: Dict[str, List[str]] = {name: [] for name in self._steps}
+        for name, step in self._steps.items():
+            for dependency in step.dependencies:
+                dependents[dependency].append(name)
+
+        def run_step(step: _Step) -> StepResult:
+            step_start = time.perf_counter()
+            try:
+                output = step.run(outputs)
+            except Exception as exc:
+                return StepResult(
+                    step.name,
+                    FAILED,
+                    error=exc,
+                    duration=time.perf_counter() - step_start,
+                )
+            return StepResult(
+                step.name, DONE, output, duration=time.perf_counter() - step_start
+            )
+
+        def skip(name: str) -> None:
+            for dependent in dependents[name]:
+                if dependent not in results:
+                    results[dependent] = StepResult(dependent, SKIPPED)
+                    waiting.pop(dependent, None)
+                    skip(dependent)
+
+        workers = max(1, min(max_workers, len(self._steps)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            running = {}
+
+            def submit_ready() -> None:
+                for name in [name for name, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    future = executor.submit(propagate(run_step), self._steps[name])
+                    running[future] = name
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = results[name] = future.result()
+                    if result.ok:
+                        outputs[name] = result.output
+                        for dependent in dependents[name]:
+                            if dependent in waiting:
+                                waiting[dependent].discard(name)
+                    else:
+                        skip(name)
+                submit_ready()
+
+        ordered = {name: results[name] for name in self._steps}
+        return CompositeResult(ordered, time.perf_counter() - start)
@@ -0,0 +1,267 @@
+"""
+Compression of request bodies and negotiation of compressed responses.
+
+Compression is configured per service, e.g. in the YAML config:
+
+.. code-block:: yaml
+
+    zrc:
+      scheme: https
+      host: zaken.example.com
+      compression:
+        accept: [zstd, br, gzip]
+        request_threshold: 4096
+        max_response_size: 52428800
+
+Decoding ``br`` and ``zstd`` responses requires the optional ``brotli`` and
+``zstandard`` packages respectively (supported by ``urllib3`` 2.x). Encodings that
+can't be decoded are not advertised.
+"""
+import gzip
+import json
+import logging
+import threading
+from typing import Dict, Iterable, Iterator, Optional
+
+from .timeouts import DeadlineExceeded, check_deadline, is_deadline_spent
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["CompressionConfig", "ResponseTooLarge", "TransferStats"]
+
+CHUNK_SIZE = 16 * 1024
+
+
+class ResponseTooLarge(Exception):
+    """
+    The (decompressed) response body exceeds the configured maximum size.
+    """
+
+
+def get_supported_encodings() -> tuple:
+    from urllib3.util.request import ACCEPT_ENCODING
+
+    return tuple(encoding.strip() for encoding in ACCEPT_ENCODING.split(","))
+
+
+class CompressionConfig:
+    """
+    Compression settings of a service.
+
+    :param accept: the response encodings to negotiate, in order of preference.
+      ``None`` leaves the ``Accept-Encoding`` header to ``requests``.
+    :param request_threshold: gzip request bodies of at least this many bytes.
+      ``None`` disables request compression - note that the server must support
+      ``Content-Encoding: gzip`` request bodies.
+    :param max_response_size: the maximum size of the decompressed response body,
+      in bytes. Responses are read in a streaming way, so that a (malicious or
+      accidental) huge response is aborted early.
+    :param level: the gzip compression level for request bodies
+    """
+
+    __slots__ = (
+        "accept",
+        "request_threshold",
+        "max_response_size",
+        "level",
+        "accept_encoding",
+    )
+
+    def __init__(
+        self,
+        accept: Optional[Iterable[str]] = None,
+        request_threshold: Optional[int] = None,
+        max_response_size: Optional[int] = None,
+        level: int = 6,
+    ):
+        self.accept = tuple(accept) if accept is not None else None
+        self.request_threshold = request_threshold
+        self.max_response_size = max_response_size
+        self.level = level
+        # sent with every request, so negotiated (and warned about) only once
+        self.accept_encoding = self._get_accept_encoding()
+
+    def __repr__(self):
+        return "<%s: accept=%r request_threshold=%r max_response_size=%r>" % (
+            self.__class__.__name__,
+            self.accept,
+            self.request_threshold,
+            self.max_response_size,
+        )
+
+    @classmethod
+    def from_dict(cls, _config: dict) -> "CompressionConfig":
+        return cls(**_config)
+
+    def _get_accept_encoding(self) -> Optional[str]:
+        if self.accept is None:
+            return None
+        supported = get_supported_encodings()
+        unsupported = [
+            encoding for encoding in self.accept if encoding not in supported
+        ]
+        if unsupported:
+            logger.warning(
+                "Response encoding(s) %s can't be decoded and are not accepted",
+                ", ".join(unsupported),
+            )
+        return (
+            ", ".join(encoding for encoding in self.accept if encoding in supported)
+            or "identity"
+        )
+
+    def prepare_request(self, headers, kwargs: dict) -> Optional[int]:
+        """
+        Set the request headers and compress the request body, in place.
+
+        :return: the uncompressed size of the body, if it was compressed
+        """
+        accept_encoding = self.accept_encoding
+        if accept_encoding is not None:
+            headers.setdefault("Accept-Encoding", accept_encoding)
+
+        if self.max_response_size is not None:
+            kwargs["stream"] = True
+
+        if self.request_threshold is None or "Content-Encoding" in headers:
+            return None
+
+        if kwargs.get("json") is not None:
+            body = json.dumps(kwargs["json"]).encode("utf-8")
+        elif isinstance(kwargs.get("data"), (bytes, str)):
+            body = kwargs["data"]
+            body = body.encode("utf-8") if isinstance(body, str) else body
+        else:
+            return None
+
+        if len(body) < self.request_threshold:
+            return None
+
+        kwargs.pop("json", None)
+        kwargs["data"] = gzip.compress(body, compresslevel=self.level)
+        headers["Content-Encoding"] = "gzip"
+        return len(body)
+
+
+def read_response(response, max_size: Optional[int] = None) -> bytes:
+    """
+    Read the (streamed) response body, enforcing a maximum decompressed size.
+
+    The body is decompressed chunk by chunk and the response content is set, so
+    that the usual :class:`requests.Response` API keeps working.
+
+    :raises: :class:`ResponseTooLarge` if the body exceeds ``max_size`` bytes
+    """
+    if response._content is not False:
+        # already consumed, e.g. not a streaming response
+        return response.content
+
+    response._content = b"".join(iter_response(response, max_size))
+    return response._content
+
+
+def iter_response(response, max_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Iterate over the decompressed chunks of a streamed response body.
+
+    :raises: :class:`ResponseTooLarge` if the body exceeds ``max_size`` bytes
+    :raises: :class:`zds_client.timeouts.DeadlineExceeded` if the deadline of the
+      call is spent while reading
+    """
+    size = 0
+    if response._content is not False:
+        # already read, e.g. responses of transports that don't stream
+        chunks = iter([response._content] if response._content else [])
+    else:
+        chunks = response.iter_content(CHUNK_SIZE)
+    while True:
+        try:
+            check_deadline()
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        except DeadlineExceeded:
+            close_response(response)
+            raise
+        except Exception as exc:
+            if not is_deadline_spent():
+                raise
+            close_response(response)
+            raise DeadlineExceeded(
+                "The deadline was exceeded reading {url}".format(url=response.url)
+            ) from exc
+
+        size += len(chunk)
+        if max_size is not None and size > max_size:
+            close_response(response)
+            raise ResponseTooLarge(
+                "Response body of {url} exceeds {max_size} bytes".format(
+                    url=response.url, max_size=max_size
+                )
+            )
+        yield chunk
+
+
+def close_response(response) -> None:
+    """
+    Close the connection of a response, if it has one.
+    """
+    # responses without connection, e.g. of transports that don't stream, can't
+    # be closed
+    if getattr(response, "raw", None) is not None:
+        response.close()
+
+
+def get_wire_size(response) -> int:
+    """
+    Return the number of (compressed) response body bytes received.
+    """
+    raw = getattr(response, "raw", None)
+    try:
+        return raw.tell()
+    except Exception:
+        return len(response.content)
+
+
+class TransferStats:
+    """
+    Thread-safe counters of the bytes transferred, per service.
+
+    Request bytes count the bodies sent, response bytes the bodies received -
+    both as transferred (compressed) and uncompressed.
+    """
+
+    fields = (
+        "requests",
+        "request_bytes",
+        "request_bytes_uncompressed",
+        "response_bytes",
+        "response_bytes_uncompressed",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, service: str, **values: int) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(service, dict.fromkeys(self.fields, 0))
+            stats["requests"] += 1
+            for field, value in values.items():
+                stats[field] += value
+
+    def get(self, service: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats.get(service) or dict.fromkeys(self.fields, 0))
+
+    def totals(self) -> Dict[str, int]:
+        totals = dict.fromkeys(self.fields, 0)
+        with self._lock:
+            for stats in self._stats.values():
+                for field, value in stats.items():
+                    totals[field] += value
+        return totals
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
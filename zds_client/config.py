@@ -1,28 +1,98 @@
+from typing import Optional, Tuple
 from urllib.parse import urlparse
 
 from .auth import ClientAuth
+from .compression import CompressionConfig
+from .hedging import HedgingConfig
+from .priority import PriorityConfig
+from .timeouts import Timeout, parse_timeout
 
 default_ports = {"https": 443, "http": 80}
 
 
 class ClientConfig:
+    """
+    Immutable connection configuration of a single service.
+
+    The base URL is calculated once, as it's read on every request.
+    """
+
+    __slots__ = (
+        "scheme",
+        "host",
+        "port",
+        "auth",
+        "compression",
+        "hedging",
+        "priority",
+        "timeout",
+        "base_url",
+    )
+
     def __init__(
         self,
         scheme: str = "https",
         host: str = "localhost",
         port: int = None,
         auth: ClientAuth = None,
+        compression: Optional[CompressionConfig] = None,
+        hedging: Optional[HedgingConfig] = None,
+        timeout: Optional[Timeout] = None,
+        priority: Optional[PriorityConfig] = None,
     ):
-        self.scheme = scheme
-        self.host = host
-        self.port = port if port else default_ports[scheme]
-        self.auth = auth
+        port = int(port) if port else default_ports[scheme]
+        if isinstance(compression, dict):
+            compression = CompressionConfig.from_dict(compression)
+        if isinstance(hedging, dict):
+            hedging = HedgingConfig.from_dict(hedging)
+        if isinstance(priority, dict):
+            priority = PriorityConfig.from_dict(priority)
+        _set = super().__setattr__
+        _set("scheme", scheme)
+        _set("host", host)
+        _set("port", port)
+        _set("auth", auth)
+        _set("compression", compression)
+        _set("hedging", hedging)
+        _set("priority", priority)
+        _set("timeout", parse_timeout(timeout))
+        _set("base_url", get_base_url(scheme, host, port))
 
     def __repr__(self):
         return "<%s: %s>" % (self.__class__.__name__, self.base_url)
 
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % self.__class__.__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is immutable" % self.__class__.__name__)
+
+    def __eq__(self, other):
+        if not isinstance(other, ClientConfig):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __reduce__(self):
+        return (self.__class__, self._key())
+
+    def _key(self) -> Tuple:
+        return (
+            self.scheme,
+            self.host,
+            self.port,
+            self.auth,
+            self.compression,
+            self.hedging,
+            self.timeout,
+            self.priority,
+        )
+
     @classmethod
     def from_dict(cls, _config: dict) -> "ClientConfig":
+        _config = dict(_config)
         _auth = _config.pop("auth", None)
         auth = None if not _auth else ClientAuth(**_auth)
         return cls(**_config, auth=auth)
@@ -39,16 +109,23 @@ class ClientConfig:
         # register the config
         return cls.from_dict({"scheme": parsed_url.scheme, "host": host, "port": port})
 
-    @property
-    def base_url(self) -> str:
-        """
-        Calculate the base URL, without the api root base path.
-        """
-        base = "{}://{}".format(self.scheme, self.host)
 
-        # if it's the default ports, we don't need to be explicit
-        default_port = default_ports[self.scheme]
-        if self.port == default_port:
-            return base
+def get_base_url(scheme: str, host: str, port: int = None) -> str:
+    """
+    Calculate the base URL, without the api root base path.
+    """
+    base = "{}://{}".format(scheme, host)
+
+    # if it's the default ports, we don't need to be explicit
+    if not port or int(port) == default_ports.get(scheme):
+        return base
+
+    return "{}:{}".format(base, port)
+
 
-        return "{}:{}".format(base, self.port)
+def url_to_base_url(url: str) -> str:
+    """
+    Reduce an arbitrary URL to the base URL of the service hosting it.
+    """
+    parsed_url = urlparse(url)
+    return get_base_url(parsed_url.scheme, parsed_url.hostname, parsed_url.port)
@@ -0,0 +1,50 @@
+"""
+Cache DNS lookups, so new connections don't block on the resolver.
+"""
+import socket
+from typing import List
+
+from .cache import MemoryCache
+
+__all__ = ["DNSCache", "dns_cache"]
+
+
+class DNSCache:
+    """
+    Cache the addresses of host names for a limited time.
+
+    :param ttl: the number of seconds to keep the addresses of a host
+    :param max_entries: the maximum number of hosts to keep the addresses of
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 256):
+        self.ttl = ttl
+        self._cache = MemoryCache(max_entries=max_entries, ttl=ttl)
+
+    def __repr__(self):
+        return "<%s: ttl=%r>" % (self.__class__.__name__, self.ttl)
+
+    def resolve(self, host: str, port: int) -> List[tuple]:
+        """
+        Return the (cached) :func:`socket.getaddrinfo` results for a TCP connection.
+
+        :raises: :class:`socket.gaierror` if the host can't be resolved
+        """
+        key = (host, port)
+        addresses = self._cache.get(key)
+        if addresses is None:
+            addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+            self._cache.set(key, addresses)
+        return addresses
+
+    def forget(self, host: str, port: int) -> None:
+        """
+        Drop the addresses of a host, e.g. after connecting to it failed.
+        """
+        self._cache.delete((host, port))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+dns_cache = DNSCache()
@@ -0,0 +1,72 @@
+"""
+Select the fields of (and expand references in) API responses.
+
+Newer versions of the ZGW APIs support the ``fields`` and ``expand`` query
+parameters. For operations that don't, the same result is produced client-side.
+"""
+from typing import Any, Iterable, List, Optional
+
+from .schema import Operation
+
+__all__ = ["EXPAND_KEY", "get_objects", "project", "validate_selection"]
+
+EXPAND_KEY = "_expand"
+
+
+def _root(field: str) -> str:
+    return field.split(".", 1)[0]
+
+
+def validate_selection(
+    operation: Operation,
+    fields: Optional[Iterable[str]] = None,
+    expand: Optional[Iterable[str]] = None,
+) -> None:
+    """
+    Check the selected fields and expansions against the operation response schema.
+
+    Nested fields and expansions (``"status.statustype"``) are checked by their
+    first component only.
+
+    :raises: :class:`ValueError` for fields that are not in the response schema
+    """
+    properties = operation.response_properties
+    if properties is None:
+        return
+
+    known = properties | {EXPAND_KEY}
+    unknown = sorted(
+        {_root(field) for field in list(fields or []) + list(expand or [])} - known
+    )
+    if unknown:
+        raise ValueError(
+            "Unknown field(s) {fields} for operation {operation}".format(
+                fields=", ".join(unknown), operation=operation.operation_id
+            )
+        )
+
+
+def get_objects(data: Any) -> List[dict]:
+    """
+    Return the resource objects in a (paginated) list or detail response.
+    """
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        return data["results"]
+    if isinstance(data, dict):
+        return [data]
+    return []
+
+
+def project(objects: List[dict], fields: Iterable[str]) -> None:
+    """
+    Drop all keys but the selected ``fields`` from the objects, in place.
+
+    Projecting in place releases the dropped values immediately, rather than keeping
+    the complete objects alive next to the projected copies.
+    """
+    keep = {_root(field) for field in fields} | {EXPAND_KEY}
+    for obj in objects:
+        for key in [key for key in obj if key not in keep]:
+            del obj[key]
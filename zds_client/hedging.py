@@ -0,0 +1,254 @@
+"""
+Hedged GET requests, to cut the tail latency of slow services.
+
+When a GET request takes longer than a percentile of the recently observed
+latencies of the service, a second, identical request is sent and whichever
+response arrives first is used. The extra load is capped by a budget: a fraction
+of the requests that may be hedged.
+
+Hedging is enabled per service in the configuration:
+
+.. code-block:: yaml
+
+    zrc:
+      scheme: https
+      host: zaken.example.com
+      hedging:
+        percentile: 95
+        budget: 0.05
+        workers: 32
+
+Hedgeable requests of a service are sent from a thread pool of ``workers``
+threads, so the calling thread can return the first response. When the pool is
+busy, requests are sent from the calling thread without hedging, rather than
+queueing for a thread.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+from .compression import close_response
+from .timeouts import propagate
+from .tracing import record_retry
+
+__all__ = ["HedgingConfig", "Hedger", "get_hedger"]
+
+
+class HedgingConfig:
+    """
+    Hedging settings of a service.
+
+    :param percentile: send the hedge request once the request takes longer than
+      this percentile of the observed latencies
+    :param budget: the maximum fraction of requests that may be hedged
+    :param min_delay: never hedge sooner than this many seconds
+    :param max_delay: never wait longer than this many seconds before hedging
+    :param window: the number of recent latencies to calculate the percentile of
+    :param min_samples: don't hedge before this many latencies are observed
+    :param workers: the number of threads sending the hedgeable requests of the
+      service, two per request
+    """
+
+    __slots__ = (
+        "percentile",
+        "budget",
+        "min_delay",
+        "max_delay",
+        "window",
+        "min_samples",
+        "workers",
+    )
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        budget: float = 0.05,
+        min_delay: float = 0.01,
+        max_delay: Optional[float] = None,
+        window: int = 1000,
+        min_samples: int = 20,
+        workers: int = 32,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError("The percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.workers = workers
+
+    def __repr__(self):
+        return "<%s: percentile=%r budget=%r>" % (
+            self.__class__.__name__,
+            self.percentile,
+            self.budget,
+        )
+
+    @classmethod
+    def from_dict(cls, _config: dict) -> "HedgingConfig":
+        return cls(**_config)
+
+
+class Hedger:
+    """
+    Track the latencies and hedging budget of a service, and send hedged requests.
+
+    Requests can't be aborted once they are sent - the response that loses the race
+    is closed when it arrives, and a hedge that didn't start yet is cancelled.
+    """
+
+    # the maximum number of hedges that can be saved up in the budget
+    max_tokens = 10
+
+    # latencies observed before the delay is recalculated
+    recalculate_interval = 16
+
+    def __init__(self, config: HedgingConfig, executor: ThreadPoolExecutor = None):
+        self.config = config
+        self._executor = executor
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=config.window)
+        self._tokens = 0.0
+        self._delay = None
+        self._observed = 0
+        # the number of threads of the executor that are (reserved to be) busy
+        self._busy = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.config.workers,
+                        thread_name_prefix="zds-client-hedging",
+                    )
+        return self._executor
+
+    @property
+    def delay(self) -> Optional[float]:
+        """
+        The number of seconds after which a request is hedged, if enough latencies
+        were observed.
+        """
+        return self._delay
+
+    def observe(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._observed += 1
+            if self._delay is None or self._observed % self.recalculate_interval == 0:
+                self._delay = self._calculate_delay()
+
+    def _calculate_delay(self) -> Optional[float]:
+        if len(self._latencies) < self.config.min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        index = min(
+            len(latencies) - 1, int(len(latencies) * self.config.percentile / 100)
+        )
+        delay = max(latencies[index], self.config.min_delay)
+        if self.config.max_delay is not None:
+            delay = min(delay, self.config.max_delay)
+        return delay
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedged += 1
+            return True
+
+    def send(self, transport, method: str, url: str, **kwargs):
+        """
+        Send the request through ``transport``, hedging it when it's slow.
+        """
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.config.budget)
+            delay = self._delay
+            # reserve threads for the primary and the hedge, so neither queues -
+            # time spent queueing would count towards the delay
+            can_hedge = (
+                delay is not None
+                and self._tokens >= 1
+                and self._busy + 2 <= self.config.workers
+            )
+            if can_hedge:
+                self._busy += 2
+
+        # without a hedge possible, don't bother with the thread pool
+        if not can_hedge:
+            return self._send(transport, method, url, kwargs)
+
+        primary = self._submit(transport, method, url, kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_token():
+            self._release_thread()
+            return primary.result()
+
+        record_retry()
+        hedge = self._submit(transport, method, url, kwargs)
+        futures = [primary, hedge]
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            winner = done.pop()
+            futures.remove(winner)
+            if winner.exception() is None or not futures:
+                break
+
+        loser = futures[0] if futures else None
+        if loser is not None and not loser.cancel():
+            loser.add_done_callback(_close_response)
+        if winner is hedge and winner.exception() is None:
+            self.hedge_wins += 1
+        return winner.result()
+
+    def _submit(self, transport, method: str, url: str, kwargs: dict):
+        # the deadline, trace and priority of the call apply in the thread too
+        future = self.executor.submit(
+            propagate(self._send), transport, method, url, kwargs
+        )
+        future.add_done_callback(lambda future: self._release_thread())
+        return future
+
+    def _release_thread(self) -> None:
+        with self._lock:
+            self._busy -= 1
+
+    def _send(self, transport, method: str, url: str, kwargs: dict):
+        start = time.perf_counter()
+        response = transport.send(method, url, **kwargs)
+        self.observe(time.perf_counter() - start)
+        return response
+
+
+def _close_response(future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    close_response(future.result())
+
+
+_hedgers: Dict[str, Hedger] = {}
+_lock = threading.Lock()
+
+
+def get_hedger(service: str, config: HedgingConfig) -> Hedger:
+    """
+    Return the hedger of a service, shared by all its clients.
+    """
+    hedger = _hedgers.get(service)
+    if hedger is None or hedger.config is not config:
+        with _lock:
+            hedger = _hedgers.get(service)
+            if hedger is None or hedger.config is not config:
+                hedger = _hedgers[service] = Hedger(config)
+    return hedger
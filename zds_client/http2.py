@@ -0,0 +1,205 @@
+"""
+HTTP/2 transport, multiplexing concurrent requests over one connection per host.
+
+Requires ``httpx`` with HTTP/2 support, available as extra:
+
+.. code-block:: bash
+
+    pip install gemma-zds-client[http2]
+
+>>> Client.transport = HTTP2Transport()
+
+Servers that don't negotiate HTTP/2 (through TLS ALPN) are spoken to over
+HTTP/1.1. Responses are converted to :class:`requests.Response` objects, and
+transport errors to the matching :mod:`requests` exceptions, so the rest of the
+client (and its callers) can't tell the difference.
+"""
+import threading
+from typing import Optional
+
+from .compat import lazy_import
+from .transport import get_host_url
+
+requests = lazy_import("requests")
+urllib3_exceptions = lazy_import("urllib3.exceptions")
+
+__all__ = ["HTTP2Transport"]
+
+
+class _RawResponse:
+    """
+    Stand-in for the urllib3 response of :attr:`requests.Response.raw`.
+
+    Errors reading the body are raised as the matching urllib3 exceptions, which
+    :meth:`requests.Response.iter_content` turns into :mod:`requests` exceptions.
+    """
+
+    def __init__(self, response, httpx):
+        self._response = response
+        self._httpx = httpx
+
+    def stream(self, chunk_size: int = None, decode_content: bool = True):
+        httpx = self._httpx
+        url = str(self._response.url)
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.TimeoutException as exc:
+            raise urllib3_exceptions.ReadTimeoutError(None, url, str(exc)) from exc
+        except httpx.DecodingError as exc:
+            raise urllib3_exceptions.DecodeError(str(exc)) from exc
+        except httpx.TransportError as exc:
+            raise urllib3_exceptions.ProtocolError(str(exc), exc) from exc
+
+    def tell(self) -> int:
+        # the number of (compressed) bytes received
+        return self._response.num_bytes_downloaded
+
+    def close(self) -> None:
+        self._response.close()
+
+    def release_conn(self) -> None:
+        self._response.close()
+
+
+class HTTP2Transport:
+    """
+    Send requests with ``httpx``, over HTTP/2 where the server supports it.
+
+    One ``httpx.Client`` is kept per host, which multiplexes concurrent requests
+    over a single connection.
+
+    :param prior_knowledge: speak HTTP/2 without negotiating it first, e.g. to
+      plain ``http://`` servers. There is no fallback to HTTP/1.1 then.
+    :param verify: verify the TLS certificates, or the path to a CA bundle
+    :param max_connections: the maximum number of connections per host
+    """
+
+    def __init__(
+        self,
+        prior_knowledge: bool = False,
+        verify=True,
+        max_connections: Optional[int] = None,
+    ):
+        try:
+            import h2  # noqa
+            import httpx
+        except ImportError as exc:
+            raise ImportError(
+                "HTTP2Transport requires httpx with HTTP/2 support, install "
+                "'gemma-zds-client[http2]'"
+            ) from exc
+
+        self._httpx = httpx
+        self.prior_knowledge = prior_knowledge
+        self.verify = verify
+        self.max_connections = max_connections
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<%s: %d hosts>" % (self.__class__.__name__, len(self._clients))
+
+    def get_client(self, url: str):
+        """
+        Return the ``httpx.Client`` for the host of the URL.
+        """
+        key = get_host_url(url)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._clients[key] = self._httpx.Client(
+                        http1=not self.prior_knowledge,
+                        http2=True,
+                        verify=self.verify,
+                        limits=self._httpx.Limits(max_connections=self.max_connections),
+                        timeout=None,
+                    )
+        return client
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        params=None,
+        headers=None,
+        data=None,
+        json=None,
+        timeout=None,
+        stream: bool = False,
+        allow_redirects: bool = True,
+        **kwargs,
+    ) -> "requests.Response":
+        if kwargs:
+            raise TypeError(
+                "Unsupported arguments for HTTP2Transport: %s"
+                % ", ".join(sorted(kwargs))
+            )
+
+        httpx = self._httpx
+        client = self.get_client(url)
+        content = None
+        if isinstance(data, (bytes, str)):
+            content, data = data, None
+        request = client.build_request(
+            method,
+            url,
+            params=params,
+            headers=headers,
+            content=content,
+            data=data,
+            json=json,
+            timeout=self._get_timeout(timeout),
+        )
+        try:
+            response = client.send(
+                request, stream=stream, follow_redirects=allow_redirects
+            )
+        except httpx.ConnectTimeout as exc:
+            raise requests.ConnectTimeout(str(exc)) from exc
+        except httpx.TimeoutException as exc:
+            raise requests.ReadTimeout(str(exc)) from exc
+        except httpx.TransportError as exc:
+            raise requests.ConnectionError(str(exc)) from exc
+        return self._to_requests_response(request, response, stream)
+
+    def _get_timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self._httpx.Timeout(
+                connect=connect, read=read, write=read, pool=connect
+            )
+        return self._httpx.Timeout(timeout)
+
+    def _to_requests_response(self, request, response, stream: bool):
+        prepared = requests.PreparedRequest()
+        prepared.method = request.method
+        prepared.url = str(request.url)
+        prepared.headers = requests.structures.CaseInsensitiveDict(
+            request.headers.items()
+        )
+        prepared.body = request.content or None
+
+        result = requests.Response()
+        result.status_code = response.status_code
+        result.reason = response.reason_phrase
+        result.url = str(response.url)
+        result.headers = requests.structures.CaseInsensitiveDict(
+            response.headers.items()
+        )
+        result.encoding = response.charset_encoding
+        result.request = prepared
+        result.raw = _RawResponse(response, self._httpx)
+        # e.g. "HTTP/2" or "HTTP/1.1"
+        result.http_version = response.http_version
+        if not stream:
+            result._content = response.read()
+            result.elapsed = response.elapsed
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
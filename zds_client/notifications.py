@@ -0,0 +1,157 @@
+"""
+Invalidate cached data with notifications from the notification component (NRC).
+
+Services publish a notification for every change of a resource. Feeding these to a
+:class:`CacheInvalidator`, e.g. from a webhook view or a queue consumer, drops the
+affected entries from :attr:`Client.response_cache` and the resolver caches, so
+the caches can keep (ZRC, DRC...) data for a long time without serving stale
+objects:
+
+>>> Client.response_cache = MemoryCache(max_entries=10000, ttl=24 * 60 * 60)
+>>> ...
+>>> def webhook(request):
+...     handle_notification(request.body)
+...     return HttpResponse(status=204)
+"""
+import json
+import logging
+from typing import Iterable, List, Optional, Union
+
+from .cache import get_collection_url, invalidate_url
+from .client import Client
+from .resources import Resolver, resolver as default_resolver
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["CacheInvalidator", "handle_notification", "parse_notification"]
+
+REQUIRED_KEYS = ("kanaal", "hoofdObject", "resource", "resourceUrl", "actie")
+
+
+def parse_notification(notification: Union[dict, str, bytes]) -> dict:
+    """
+    Parse and check a notification payload.
+
+    :raises: :class:`ValueError` if the payload is not a valid notification
+    """
+    if isinstance(notification, (str, bytes)):
+        notification = json.loads(notification)
+    if not isinstance(notification, dict):
+        raise ValueError("A notification must be a JSON object")
+    missing = [key for key in REQUIRED_KEYS if not notification.get(key)]
+    if missing:
+        raise ValueError(
+            "Notification is missing the key(s): {}".format(", ".join(missing))
+        )
+    return notification
+
+
+class CacheInvalidator:
+    """
+    Invalidate the cache entries affected by a notification.
+
+    For the changed resource and its main object (``hoofdObject``, e.g. the zaak
+    of a status, which embeds a reference to it), the cached responses of any
+    query and credentials are dropped, as well as the cached lists of both their
+    collections. Other cached data is left alone.
+
+    :param response_cache: the response cache to invalidate, defaults to
+      :attr:`Client.response_cache` at the time of the notification
+    :param resolvers: the :class:`zds_client.resources.Resolver` instances to
+      invalidate, defaults to the shared resolver
+    :param refresh: whether to fetch the cached resources that were changed (but
+      not destroyed) again right away, rather than on the next access
+    """
+
+    def __init__(
+        self,
+        response_cache=None,
+        resolvers: Optional[Iterable[Resolver]] = None,
+        refresh: bool = False,
+    ):
+        self._response_cache = response_cache
+        self.resolvers = [default_resolver] if resolvers is None else list(resolvers)
+        self.refresh = refresh
+
+    @property
+    def response_cache(self):
+        if self._response_cache is not None:
+            return self._response_cache
+        return Client.response_cache
+
+    def handle(self, notification: Union[dict, str, bytes]) -> int:
+        """
+        Invalidate (and optionally refresh) the entries affected by a notification.
+
+        :param notification: the notification, as dict or JSON
+        :return: the number of invalidated cache entries
+        :raises: :class:`ValueError` if the payload is not a valid notification
+        """
+        notification = parse_notification(notification)
+        resource_url = notification["resourceUrl"]
+        main_url = notification["hoofdObject"]
+
+        urls = [resource_url]
+        if main_url != resource_url:
+            urls.append(main_url)
+
+        invalidated = 0
+        cached = []
+        for url in urls:
+            count = self._invalidate_resource(url)
+            if count:
+                cached.append(url)
+            invalidated += count
+            # e.g. the zaak lists show (data of) the changed status too
+            invalidated += self._invalidate_collection(url)
+
+        logger.debug(
+            "Notification %s %s invalidated %d cache entries",
+            notification["actie"],
+            resource_url,
+            invalidated,
+        )
+
+        if self.refresh:
+            if notification["actie"] == "destroy":
+                cached = [url for url in cached if url != resource_url]
+            self._refresh(cached)
+        return invalidated
+
+    def _invalidate_resource(self, url: str) -> int:
+        count = 0
+        cache = self.response_cache
+        if cache is not None:
+            count += invalidate_url(cache, url)
+        for resolver in self.resolvers:
+            count += int(bool(resolver.cache.delete(url)))
+        return count
+
+    def _invalidate_collection(self, url: str) -> int:
+        cache = self.response_cache
+        if cache is None:
+            return 0
+        return invalidate_url(cache, get_collection_url(url))
+
+    def _refresh(self, urls: List[str]) -> None:
+        if not urls or not self.resolvers:
+            return
+        # failures are logged, the resources are fetched again on next access
+        self.resolvers[0]._fetch_all(urls)
+        for resolver in self.resolvers[1:]:
+            for url in urls:
+                data = self.resolvers[0].cache.get(url)
+                if data is not None:
+                    resolver.cache.set(url, data)
+
+
+def handle_notification(
+    notification: Union[dict, str, bytes], refresh: bool = False
+) -> int:
+    """
+    Invalidate the :attr:`Client.response_cache` and shared resolver entries
+    affected by a notification.
+
+    See :class:`CacheInvalidator`.
+    """
+    return CacheInvalidator(refresh=refresh).handle(notification)
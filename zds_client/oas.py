@@ -1,11 +1,57 @@
 """
 Manage OpenAPI Specification 3.0.x schemas.
 """
-import requests
-import yaml
+import hashlib
+import logging
+import threading
+import time
+from typing import Optional
+
+from .compat import lazy_import
 
 __all__ = ["schema_fetcher"]
 
+logger = logging.getLogger(__name__)
+
+# the cache key of the digest of a schema, next to the schema itself
+DIGEST_KEY = "{url}#sha1"
+
+requests = lazy_import("requests")
+yaml = lazy_import("yaml")
+
+
+def _get_digest(content) -> str:
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha1(content).hexdigest()
+
+
+class _SchemaState:
+    """
+    Refresh bookkeeping of a single schema URL.
+    """
+
+    __slots__ = (
+        "args",
+        "kwargs",
+        "etag",
+        "last_modified",
+        "digest",
+        "version",
+        "expires",
+        "refreshing",
+    )
+
+    def __init__(self, args, kwargs, response, digest: str, expires: float):
+        self.args = args
+        self.kwargs = {key: value for key, value in kwargs.items() if key != "timeout"}
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.digest = digest
+        self.version = 0
+        self.expires = expires
+        self.refreshing = False
+
 
 class SchemaFetcher:
     """
@@ -13,10 +59,37 @@ class SchemaFetcher:
 
     Caching is done based on the URL of the schema. The schema is parsed from
     YAML and the resulting dictionary is returned/stored.
+
+    With a ``refresh_interval``, cached schemas are revalidated in the background
+    once they are older than the interval (stale-while-revalidate): the stale
+    schema is served until a conditional request (``If-None-Match`` or
+    ``If-Modified-Since``) returns a changed schema. The new schema is compiled
+    before it replaces the old one in the cache. Schemas are never mutated, so
+    code holding on to the old schema keeps a consistent snapshot.
+
+    The cache may return a fresh copy of the schema on every lookup, e.g. a
+    :class:`zds_client.cache.SharedCache`. The digest of the schema is cached as
+    well, and every process keeps the schemas it loaded by digest, so an unchanged
+    schema is loaded once per process and compiled once (see
+    :func:`zds_client.schema.compile_schema`), not once per client.
+
+    :param refresh_interval: the number of seconds after which a schema is
+      revalidated, ``None`` to never refresh schemas
+    :param refresh_timeout: the timeout of the requests revalidating schemas
     """
 
-    def __init__(self):
+    def __init__(
+        self, refresh_interval: Optional[float] = None, refresh_timeout: float = 10
+    ):
         self.cache = {}
+        # e.g. a zds_client.transport.ReplayTransport, defaults to requests.get
+        self.transport = None
+        self.refresh_interval = refresh_interval
+        self.refresh_timeout = refresh_timeout
+        self._states = {}
+        # url -> (digest, schema) of the schemas loaded by this process
+        self._loaded = {}
+        self._lock = threading.Lock()
 
     def fetch(self, url: str, *args, **kwargs) -> dict:
         """
@@ -30,22 +103,139 @@ class SchemaFetcher:
           resolve
         :raises: :class:`ValueError` if the API-spec is not a OAS 3.0.x spec
         """
-        if url in self.cache:
-            return self.cache[url]
+        spec = self._get_cached(url)
+        if spec is not None:
+            self.is_updated(url, None)
+            return spec
 
-        response = requests.get(url, *args, **kwargs)
+        response = self._get(url, *args, **kwargs)
         response.raise_for_status()
+        spec = self._parse(response)
+        digest = _get_digest(response.content)
+
+        if self.refresh_interval is not None:
+            self._states[url] = _SchemaState(
+                args,
+                kwargs,
+                response,
+                digest,
+                time.monotonic() + self.refresh_interval,
+            )
+        self._store(url, spec, digest)
 
+        return spec
+
+    def _get_cached(self, url: str) -> Optional[dict]:
+        digest = self.cache.get(DIGEST_KEY.format(url=url))
+        loaded = self._loaded.get(url)
+        if digest is not None and loaded is not None and loaded[0] == digest:
+            return loaded[1]
+
+        spec = self.cache.get(url)
+        if spec is not None and digest is not None:
+            self._loaded[url] = (digest, spec)
+        return spec
+
+    def _store(self, url: str, spec: dict, digest: str) -> None:
+        # the schema first: a reader seeing the new digest also gets the new schema
+        self.cache[url] = spec
+        self.cache[DIGEST_KEY.format(url=url)] = digest
+        self._loaded[url] = (digest, spec)
+
+    def _get(self, url: str, *args, **kwargs):
+        if self.transport is None:
+            return requests.get(url, *args, **kwargs)
+        return self.transport.send("GET", url, *args, **kwargs)
+
+    def _parse(self, response) -> dict:
         spec = yaml.safe_load(response.content)
         spec_version = response.headers.get(
             "X-OAS-Version", spec.get("openapi", spec.get("swagger", ""))
         )
         if not spec_version.startswith("3.0"):
             raise ValueError("Unsupported spec version: {}".format(spec_version))
+        return spec
 
-        self.cache[url] = spec
+    def get_version(self, url: str) -> int:
+        """
+        Return the version of the schema, incremented every time it's replaced.
+        """
+        state = self._states.get(url)
+        return state.version if state is not None else 0
 
-        return spec
+    def is_updated(self, url: str, version: Optional[int]) -> bool:
+        """
+        Check if the schema was replaced since ``version``, revalidating it in the
+        background if it's stale.
+
+        This is cheap enough to call on every schema access.
+        """
+        if self.refresh_interval is None:
+            return False
+        state = self._states.get(url)
+        if state is None:
+            return False
+        if state.expires < time.monotonic() and not state.refreshing:
+            with self._lock:
+                start, state.refreshing = not state.refreshing, True
+            if start:
+                threading.Thread(
+                    target=self._refresh_in_background,
+                    args=(url,),
+                    name="zds-client-schema-refresh",
+                    daemon=True,
+                ).start()
+        return version is not None and state.version != version
+
+    def _refresh_in_background(self, url: str) -> None:
+        try:
+            self.refresh(url)
+        except Exception:
+            logger.warning("Refreshing schema '%s' failed", url, exc_info=True)
+        finally:
+            state = self._states.get(url)
+            if state is not None:
+                state.expires = time.monotonic() + (self.refresh_interval or 0)
+                state.refreshing = False
+
+    def refresh(self, url: str) -> bool:
+        """
+        Revalidate a cached schema, replacing it if it changed.
+
+        :return: whether the schema was replaced
+        """
+        # circular import
+        from .schema import compile_schema
+
+        state = self._states[url]
+        headers = dict(state.kwargs.get("headers") or {})
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+        kwargs = dict(state.kwargs, headers=headers, timeout=self.refresh_timeout)
+
+        response = self._get(url, *state.args, **kwargs)
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+
+        digest = _get_digest(response.content)
+        if digest == state.digest:
+            return False
+
+        spec = self._parse(response)
+        # index the new schema before any request gets to see it
+        compile_schema(spec).path_matcher
+
+        with self._lock:
+            state.etag = response.headers.get("ETag")
+            state.last_modified = response.headers.get("Last-Modified")
+            state.digest = digest
+            self._store(url, spec, digest)
+            state.version += 1
+        logger.info("Schema '%s' was updated", url)
+        return True
 
 
 # sentinel instance, with a cache
@@ -54,5 +244,6 @@ schema_fetcher = SchemaFetcher()
 Sentinel schema fetcher instance, used by :class:`zds_client.client.Client`.
 
 Note that you can mutate ``schema_fetcher.cache`` to replace it with another cache
-backend, for example.
+backend, for example a :class:`zds_client.cache.SharedCache` to share the schemas
+between worker processes.
 """
@@ -0,0 +1,300 @@
+"""
+Priority lanes, keeping interactive calls fast while batch jobs load a service.
+
+Every call has a priority class: ``"interactive"``, ``"default"`` or ``"batch"``.
+Set it for the calls within a block, or for all calls of a client:
+
+>>> with priority("interactive"):
+...     zaak = client.retrieve("zaak", uuid=uuid)
+>>> batch_client.priority = "batch"
+
+The priority of the block takes precedence over the one of the client.
+
+With priority lanes enabled for a service, the number of concurrent requests to
+the service is limited to a number of slots, shared by all its clients. Calls
+waiting for a slot get one by the weight of their class, and some slots are
+reserved for the highest class, so interactive calls don't queue behind a flood
+of batch requests:
+
+.. code-block:: yaml
+
+    zrc:
+      scheme: https
+      host: zaken.example.com
+      priority:
+        slots: 10
+        reserved: 2
+        weights:
+          interactive: 8
+          default: 4
+          batch: 1
+
+Each slot should have a connection, so keep the number of slots at or below the
+``pool_maxsize`` of the transport. A request holds its slot until its response
+was read - a streamed response (:meth:`Client.iter_list`) only until its headers
+arrived, so that calls made while iterating don't wait for the iteration. A
+thread holding a slot never waits for another one: its nested requests share the
+slot.
+"""
+import contextlib
+import threading
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from .timeouts import DeadlineExceeded, get_remaining
+
+__all__ = [
+    "PriorityConfig",
+    "PriorityScheduler",
+    "get_priority",
+    "get_scheduler",
+    "priority",
+]
+
+INTERACTIVE = "interactive"
+DEFAULT = "default"
+BATCH = "batch"
+
+DEFAULT_WEIGHTS = {INTERACTIVE: 8, DEFAULT: 4, BATCH: 1}
+
+_priority = ContextVar("zds_client_priority", default=None)
+
+
+@contextlib.contextmanager
+def priority(name: str):
+    """
+    Set the priority class of the client calls within the block.
+    """
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def get_priority(default: Optional[str] = None) -> str:
+    """
+    Return the priority class of the current block, or else ``default``, or else
+    ``"default"``.
+    """
+    return _priority.get() or default or DEFAULT
+
+
+class PriorityConfig:
+    """
+    Priority lane settings of a service.
+
+    :param slots: the maximum number of concurrent requests to the service
+    :param reserved: the number of slots only the class with the highest weight
+      may use
+    :param weights: the weight of each priority class, added to (or overriding)
+      the default weights
+    """
+
+    __slots__ = ("slots", "reserved", "weights")
+
+    def __init__(
+        self,
+        slots: int = 10,
+        reserved: int = 1,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        if slots < 1:
+            raise ValueError("At least one slot is needed")
+        if not 0 <= reserved < slots:
+            raise ValueError("The number of reserved slots must be below the slots")
+        if any(weight <= 0 for weight in weights.values()):
+            raise ValueError("The weights must be positive")
+        self.slots = slots
+        self.reserved = reserved
+        self.weights = weights
+
+    def __repr__(self):
+        return "<%s: slots=%r reserved=%r>" % (
+            self.__class__.__name__,
+            self.slots,
+            self.reserved,
+        )
+
+    @classmethod
+    def from_dict(cls, _config: dict) -> "PriorityConfig":
+        return cls(**_config)
+
+
+class Slot:
+    """
+    A slot of a :class:`PriorityScheduler`, held until it's released.
+
+    A nested slot, acquired by a thread already holding one, shares that slot and
+    releases nothing.
+    """
+
+    __slots__ = ("scheduler", "priority", "_held", "_released")
+
+    def __init__(
+        self, scheduler: "PriorityScheduler", priority: str, held: Optional[list] = None
+    ):
+        self.scheduler = scheduler
+        self.priority = priority
+        # the number of slots held by the acquiring thread, None if nested
+        self._held = held
+        self._released = held is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def release(self) -> None:
+        # released when the response is read or closed, whichever comes first
+        if not self._released:
+            self._released = True
+            self.scheduler._release(self.priority, self._held)
+
+
+class _Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class PriorityScheduler:
+    """
+    Hand out a limited number of slots by priority class.
+
+    Waiting calls are served by stride scheduling: every class gets a share of the
+    slots that become free proportional to its weight, and calls of the same class
+    are served first come, first served.
+    """
+
+    def __init__(self, config: PriorityConfig):
+        self.config = config
+        self._lock = threading.Lock()
+        self._free = config.slots
+        self._in_use = Counter()
+        self._queues = {name: deque() for name in config.weights}
+        self._passes = {name: 0.0 for name in config.weights}
+        self._virtual_time = 0.0
+        self._local = threading.local()
+        top = max(config.weights.values())
+        self._unreserved = {
+            name for name, weight in config.weights.items() if weight < top
+        }
+
+    def __repr__(self):
+        return "<%s: %d/%d slots free>" % (
+            self.__class__.__name__,
+            self._free,
+            self.config.slots,
+        )
+
+    @property
+    def in_use(self) -> Dict[str, int]:
+        """
+        The number of slots in use per priority class.
+        """
+        with self._lock:
+            return {name: count for name, count in self._in_use.items() if count}
+
+    @property
+    def waiting(self) -> Dict[str, int]:
+        """
+        The number of calls waiting for a slot per priority class.
+        """
+        with self._lock:
+            return {name: len(queue) for name, queue in self._queues.items() if queue}
+
+    def acquire(self, priority: str = DEFAULT) -> Slot:
+        """
+        Wait for a slot for a call of the priority class.
+
+        A thread already holding a slot gets a nested slot right away.
+
+        :raises: :class:`ValueError` for unknown priority classes
+        :raises: :class:`zds_client.timeouts.DeadlineExceeded` if the deadline of
+          the call is spent while waiting
+        """
+        queue = self._queues.get(priority)
+        if queue is None:
+            raise ValueError(
+                "Unknown priority '{}', use one of: {}".format(
+                    priority, ", ".join(self._queues)
+                )
+            )
+        held = getattr(self._local, "held", None)
+        if held is None:
+            held = self._local.held = [0]
+        if held[0]:
+            # waiting while holding a slot could deadlock once all slots are held
+            return Slot(self, priority)
+
+        waiter = _Waiter()
+        with self._lock:
+            if not queue:
+                # don't let an idle class save up credit
+                self._passes[priority] = max(self._passes[priority], self._virtual_time)
+            queue.append(waiter)
+            self._dispatch()
+
+        if not waiter.granted and not waiter.event.wait(get_remaining()):
+            with self._lock:
+                if not waiter.granted:
+                    queue.remove(waiter)
+                    raise DeadlineExceeded(
+                        "The deadline was exceeded waiting for a slot"
+                    )
+        with self._lock:
+            held[0] += 1
+        return Slot(self, priority, held)
+
+    def _release(self, priority: str, held: list) -> None:
+        with self._lock:
+            held[0] -= 1
+            self._free += 1
+            self._in_use[priority] -= 1
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        # called with the lock held
+        while self._free:
+            candidates = [
+                name
+                for name, queue in self._queues.items()
+                if queue
+                and (self._free > self.config.reserved or name not in self._unreserved)
+            ]
+            if not candidates:
+                return
+            name = min(
+                candidates,
+                key=lambda lane: (self._passes[lane], -self.config.weights[lane]),
+            )
+            self._virtual_time = self._passes[name]
+            self._passes[name] += 1 / self.config.weights[name]
+            waiter = self._queues[name].popleft()
+            self._free -= 1
+            self._in_use[name] += 1
+            waiter.granted = True
+            waiter.event.set()
+
+
+_schedulers: Dict[str, PriorityScheduler] = {}
+_lock = threading.Lock()
+
+
+def get_scheduler(service: str, config: PriorityConfig) -> PriorityScheduler:
+    """
+    Return the scheduler of a service, shared by all its clients.
+    """
+    scheduler = _schedulers.get(service)
+    if scheduler is None or scheduler.config is not config:
+        with _lock:
+            scheduler = _schedulers.get(service)
+            if scheduler is None or scheduler.config is not config:
+                scheduler = _schedulers[service] = PriorityScheduler(config)
+    return scheduler
@@ -0,0 +1,229 @@
+"""
+Sampling profiler of the requests made by the client.
+
+Profiling every call is too expensive under production load, so only a fraction
+of the calls of :meth:`Client.request` is profiled. The results are aggregated per
+operation:
+
+>>> Client.profiler = Profiler(rate=0.01)
+>>> ...
+>>> Client.profiler.dump_stats("/tmp/profiles")  # one pstats file per operation
+
+Two modes are supported:
+
+* ``"cprofile"`` (deterministic) profiles the sampled calls with :mod:`cProfile`.
+  The results are :class:`pstats.Stats`, which can be dumped for tools such as
+  snakeviz, gprof2dot or flameprof.
+* ``"stack"`` (statistical) samples the stack of the threads running sampled calls
+  every ``interval`` seconds of wall-clock time, so time spent waiting on the
+  network shows up as well. The results are dumped as folded stacks, the input of
+  ``flamegraph.pl`` and speedscope.
+
+Without a profiler (the default), the overhead is a single attribute lookup.
+"""
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List
+
+__all__ = ["Profiler"]
+
+MODES = ("cprofile", "stack")
+
+
+class Profiler:
+    """
+    Profile a random sample of the requests, aggregated per operation.
+
+    :param rate: the fraction of the calls to profile, between 0 and 1
+    :param mode: ``"cprofile"`` or ``"stack"``, see the module documentation
+    :param interval: the stack sampling interval in seconds, for the stack mode
+    """
+
+    def __init__(self, rate: float = 0.01, mode: str = "cprofile", interval=0.001):
+        if mode not in MODES:
+            raise ValueError(
+                "Unknown mode '{}', use one of: {}".format(mode, ", ".join(MODES))
+            )
+        self.rate = rate
+        self.mode = mode
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._samples = Counter()
+        # cProfile mode: operation -> pstats.Stats
+        self._stats = {}
+        # only one cProfile profiler can be active at a time (per thread, or per
+        # process since Python 3.12)
+        self._profiling = threading.Lock()
+        # stack mode: thread id -> (operation, outermost profiled frame)
+        self._active = {}
+        self._stacks = Counter()
+        self._wake = threading.Event()
+        self._sampler = None
+
+    def __repr__(self):
+        return "<%s: %s, rate=%s>" % (self.__class__.__name__, self.mode, self.rate)
+
+    @property
+    def samples(self) -> Dict[str, int]:
+        """
+        The number of profiled calls per operation.
+        """
+        with self._lock:
+            return dict(self._samples)
+
+    def should_sample(self) -> bool:
+        return random.random() < self.rate
+
+    def profile(self, operation: str, func: Callable, *args, **kwargs):
+        """
+        Call ``func``, profiling it under the name of ``operation``.
+        """
+        if self.mode == "cprofile":
+            return self._run_cprofile(operation, func, args, kwargs)
+        return self._run_sampled(operation, func, args, kwargs)
+
+    def _run_cprofile(self, operation, func, args, kwargs):
+        import cProfile
+
+        if not self._profiling.acquire(blocking=False):
+            # another call is being profiled already
+            return func(*args, **kwargs)
+        try:
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                self._add_profile(operation, profile)
+        finally:
+            self._profiling.release()
+
+    def _add_profile(self, operation: str, profile) -> None:
+        import pstats
+
+        profile.create_stats()
+        with self._lock:
+            self._samples[operation] += 1
+            stats = self._stats.get(operation)
+            if stats is None:
+                self._stats[operation] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+
+    def _run_sampled(self, operation, func, args, kwargs):
+        ident = threading.get_ident()
+        if ident in self._active:
+            # nested call, already covered by the outer one
+            return func(*args, **kwargs)
+        with self._lock:
+            self._samples[operation] += 1
+            self._active[ident] = (operation, sys._getframe())
+            self._wake.set()
+            if self._sampler is None:
+                self._sampler = threading.Thread(
+                    target=self._sample_stacks,
+                    name="zds-client-profiler",
+                    daemon=True,
+                )
+                self._sampler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                del self._active[ident]
+                if not self._active:
+                    self._wake.clear()
+
+    def _sample_stacks(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            frames = sys._current_frames()
+            for ident, (operation, outer) in active:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None and frame is not outer:
+                    stack.append(_describe(frame))
+                    frame = frame.f_back
+                if frame is None:
+                    # the call finished in the meantime
+                    continue
+                stack.append(operation)
+                folded = ";".join(reversed(stack))
+                with self._lock:
+                    self._stacks[folded] += 1
+
+    def get_stats(self) -> dict:
+        """
+        Return the :class:`pstats.Stats` per operation, for the cProfile mode.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def get_folded_stacks(self) -> Dict[str, int]:
+        """
+        Return the number of samples per folded stack, for the stack mode.
+
+        The stacks start with the operation, followed by the frames from the
+        outermost to the innermost, separated by semicolons.
+        """
+        with self._lock:
+            return dict(self._stacks)
+
+    def dump_stats(self, directory: str) -> List[str]:
+        """
+        Write the stats of every operation to ``<directory>/<operation>.pstats``.
+
+        :return: the paths of the written files
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for operation, stats in sorted(self.get_stats().items()):
+            path = os.path.join(directory, "{}.pstats".format(operation))
+            stats.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def dump_folded(self, path: str) -> None:
+        """
+        Write the folded stacks to ``path``, one ``<stack> <samples>`` per line.
+        """
+        with open(path, "w") as output:
+            for stack, count in sorted(self.get_folded_stacks().items()):
+                output.write("{} {}\n".format(stack, count))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._stats.clear()
+            self._stacks.clear()
+
+
+def _describe(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return "{}:{}".format(frame.f_globals.get("__name__", "?"), name)
+
+
+def profiled(method: Callable) -> Callable:
+    """
+    Profile calls of a :class:`Client` method that takes the operation as second
+    argument, if the client has a profiler.
+    """
+
+    @functools.wraps(method)
+    def wrapper(client, path, operation, *args, **kwargs):
+        profiler = client.profiler
+        if profiler is None or not profiler.should_sample():
+            return method(client, path, operation, *args, **kwargs)
+        return profiler.profile(
+            operation, method, client, path, operation, *args, **kwargs
+        )
+
+    return wrapper
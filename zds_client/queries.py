@@ -0,0 +1,176 @@
+"""
+Split queries with many filter values into requests the services can handle.
+
+Filtering on thousands of values doesn't fit in a single URL. :func:`iter_list_in`
+splits the values into chunks that do fit, lists the chunks concurrently and
+streams back the merged results:
+
+>>> zaken = iter_list_in(Client("zrc"), "zaak", "zaaktype__in", zaaktype_urls)
+>>> for zaak in zaken:
+...     process(zaak)
+"""
+import queue
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Union
+from urllib.parse import quote_plus, urlencode, urljoin
+
+from .client import Client, Object
+from .compact import CompactDecoder
+from .schema import get_operation_url
+from .timeouts import propagate
+
+__all__ = ["iter_list_in", "split_values"]
+
+# conservative, proxies and servers commonly limit the request line to 4 or 8 KB
+DEFAULT_MAX_URL_LENGTH = 2000
+
+_DONE = object()
+
+
+class _Failure:
+    __slots__ = ("exception",)
+
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+def split_values(
+    url: str,
+    name: str,
+    values: Iterable[str],
+    params: Optional[dict] = None,
+    max_url_length: int = DEFAULT_MAX_URL_LENGTH,
+) -> List[List[str]]:
+    """
+    Split the values of a comma separated (``__in``) filter into chunks, so the
+    URL of every chunk is at most ``max_url_length`` long.
+
+    A value that doesn't fit on its own gets a chunk of its own.
+
+    :param url: the URL of the list operation
+    :param name: the name of the query parameter
+    :param params: the other query parameters
+    """
+    query = urlencode(params or {})
+    base_length = len(url) + 1 + len(query) + (1 if query else 0)
+    # "name=" and "&" if there are other parameters
+    base_length += len(quote_plus(name)) + 1
+
+    chunks, chunk, length = [], [], base_length
+    for value in values:
+        # commas are encoded as "%2C"
+        value_length = len(quote_plus(value)) + (3 if chunk else 0)
+        if chunk and length + value_length > max_url_length:
+            chunks.append(chunk)
+            chunk, length = [], base_length
+            value_length -= 3
+        chunk.append(value)
+        length += value_length
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def iter_list_in(
+    client: Client,
+    resource: str,
+    name: str,
+    values: Iterable[str],
+    params: Optional[dict] = None,
+    max_url_length: int = DEFAULT_MAX_URL_LENGTH,
+    max_workers: int = 8,
+    compact: Union[bool, CompactDecoder] = False,
+    **path_kwargs,
+) -> Iterator[Object]:
+    """
+    Iterate over the resources matching any of the filter values.
+
+    Filters with the ``__in`` suffix take comma separated values, and are split
+    in chunks by URL length (see :func:`split_values`). Other filters are queried
+    one value at a time. The chunks are listed concurrently with
+    :meth:`Client.iter_list`, and the resources are yielded as they come in - in no
+    particular order, without duplicates (by ``url``).
+
+    Stopping the iteration early cancels the outstanding requests.
+
+    :param name: the name of the filter, e.g. ``"zaaktype"`` or ``"uuid__in"``
+    :param values: the filter values, duplicates are ignored
+    :param params: other query parameters, applied to every chunk
+    :param max_workers: the maximum number of concurrent requests
+    :param compact: shared by all chunks, see :meth:`Client.list`
+    :raises: the first error of any of the requests, while iterating
+    """
+    values = list(dict.fromkeys(values))
+    if not values:
+        return
+
+    operation_id = "{}{}".format(resource, Client.operation_suffix_mapping["list"])
+    url = urljoin(
+        client.base_url,
+        get_operation_url(
+            client.schema, operation_id, base_url=client.base_url, **path_kwargs
+        ),
+    )
+    if name.endswith("__in"):
+        chunks = split_values(url, name, values, params, max_url_length)
+    else:
+        chunks = [[value] for value in values]
+    decoder = client._get_decoder(compact)
+
+    # bounded, so slow consumers hold back the requests rather than buffer all
+    results = queue.Queue(maxsize=1000)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch(chunk: List[str]) -> None:
+        if stop.is_set():
+            return
+        try:
+            query = dict(params or {}, **{name: ",".join(chunk)})
+            objects = client.iter_list(
+                resource, params=query, compact=decoder, **path_kwargs
+            )
+            try:
+                for obj in objects:
+                    if not put(obj):
+                        return
+            finally:
+                objects.close()
+        except BaseException as exc:
+            put(_Failure(exc))
+            return
+        put(_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(chunks)))
+    futures = [executor.submit(propagate(fetch), chunk) for chunk in chunks]
+    seen = set()
+    pending = len(chunks)
+    try:
+        while pending:
+            item = results.get()
+            if item is _DONE:
+                pending -= 1
+                continue
+            if isinstance(item, _Failure):
+                raise item.exception
+            obj_url = item.get("url") if isinstance(item, Mapping) else None
+            if obj_url is not None:
+                if obj_url in seen:
+                    continue
+                seen.add(obj_url)
+            yield item
+    finally:
+        stop.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
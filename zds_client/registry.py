@@ -1,28 +1,96 @@
 import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .config import ClientConfig, url_to_base_url
 
 logger = logging.getLogger(__name__)
 
 
 class ClientRegistry:
+    """
+    Thread-safe registry of service aliases and their configuration.
+
+    Writes replace the internal state as a whole (copy-on-write), so lookups never
+    need to take the lock and always see a consistent snapshot. Clients keep a
+    reference to the config they were created with, so (re)loading the registry
+    does not affect clients that are in use.
+    """
+
     def __init__(self):
-        self._registry = {}
+        self._lock = threading.Lock()
+        # (alias -> config, base URL -> aliases)
+        self._state = ({}, {})
 
-    def __getitem__(self, key):
-        return self._registry[key]
+    def __getitem__(self, key) -> ClientConfig:
+        return self._state[0][key]
 
     def __delitem__(self, key):
-        del self._registry[key]
+        with self._lock:
+            registry = dict(self._state[0])
+            del registry[key]
+            self._swap(registry)
 
     def __setitem__(self, key, value):
-        if key in self._registry:
-            logger.debug("Overwriting config for '%s'", key)
-        self._registry[key] = value
+        self.register(key, value)
 
     def __contains__(self, key):
-        return key in self._registry
+        return key in self._state[0]
+
+    def __iter__(self):
+        return iter(self._state[0])
+
+    def __len__(self):
+        return len(self._state[0])
+
+    def items(self) -> List[Tuple[str, ClientConfig]]:
+        return list(self._state[0].items())
+
+    def register(self, alias: str, config: ClientConfig):
+        self.update({alias: config})
+
+    def update(self, configs: Dict[str, ClientConfig], replace: bool = False):
+        """
+        Register multiple configs in one atomic operation.
+
+        :param configs: mapping of alias to :class:`ClientConfig`
+        :param replace: drop all existing configs, rather than merging ``configs``
+          into them
+        """
+        with self._lock:
+            registry = {} if replace else dict(self._state[0])
+            for alias, config in configs.items():
+                if registry.get(alias, config) != config:
+                    logger.debug("Overwriting config for '%s'", alias)
+                registry[alias] = config
+            self._swap(registry)
+
+    def get_aliases(self, base_url: str) -> Tuple[str, ...]:
+        """
+        Look up the aliases registered for a base URL, e.g. ``https://example.com``.
+        """
+        return self._state[1].get(base_url.rstrip("/"), ())
+
+    def get_alias_for_url(self, url: str) -> Optional[str]:
+        """
+        Look up the alias of the service hosting an arbitrary URL.
+
+        Explicitly named aliases take precedence over aliases registered through
+        :meth:`zds_client.client.Client.from_url`.
+        """
+        aliases = self.get_aliases(url_to_base_url(url))
+        return aliases[0] if aliases else None
+
+    def _swap(self, registry: Dict[str, ClientConfig]) -> None:
+        by_base_url = {}
+        for alias, config in registry.items():
+            by_base_url.setdefault(config.base_url, []).append(alias)
 
-    def register(self, alias: str, config: dict):
-        self._registry[alias] = config
+        reverse = {
+            base_url: tuple(sorted(aliases, key=lambda alias: alias == base_url))
+            for base_url, aliases in by_base_url.items()
+        }
+        self._state = (registry, reverse)
 
 
 registry = ClientRegistry()
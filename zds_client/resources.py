@@ -0,0 +1,332 @@
+"""
+Lazy, object-level access to API resources.
+
+Instead of plain dicts, resources are wrapped in lightweight :class:`Resource`
+proxies. Attribute access on a proxy resolves URL references to other (known)
+services on first access, and wraps nested data only when it's accessed:
+
+>>> zaak = resolver.retrieve(Client("zrc"), "zaak", uuid="...")
+>>> zaak.zaaktype.omschrijving  # fetches the zaaktype from the ZTC
+'Melding openbare ruimte'
+>>> zaak["zaaktype"]  # item access gives the raw value
+'https://ztc.example.com/api/v1/zaaktypen/...'
+
+Looping over many proxies can be sped up by prefetching their references
+concurrently:
+
+>>> zaken = resolver.list(Client("zrc"), "zaak")
+>>> resolver.prefetch(zaken, "zaaktype", "status.statustype")
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, List, Optional
+
+from .cache import MemoryCache
+from .client import Client
+from .fields import EXPAND_KEY
+from .registry import registry
+from .routing import Route, Router
+from .timeouts import check_deadline, propagate
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["Resolver", "Resource", "expand", "resolver"]
+
+
+class Resolver:
+    """
+    Resolve URL references to :class:`Resource` proxies.
+
+    Resolved objects are stored in a cache that is shared by all proxies of the
+    resolver, and one client is kept per API, so schemas are only looked up once.
+
+    :param cache: a cache backend, keyed by URL. Defaults to a
+      :class:`zds_client.cache.MemoryCache`.
+    :param max_workers: the maximum number of concurrent requests made by
+      :meth:`prefetch`
+    :param router: the :class:`zds_client.routing.Router` to find the service and
+      operation of references with
+    """
+
+    def __init__(self, cache=None, max_workers: int = 8, router: Router = None):
+        self.cache = MemoryCache(max_entries=10000) if cache is None else cache
+        self.max_workers = max_workers
+        self.router = Router() if router is None else router
+
+    def is_reference(self, value: Any) -> bool:
+        """
+        Determine if a value is a reference to a resource of a known service.
+        """
+        return (
+            isinstance(value, str)
+            and value.startswith(("http://", "https://"))
+            and registry.get_alias_for_url(value) is not None
+        )
+
+    def get_client(self, url: str) -> Client:
+        return self.router.get_client(url)
+
+    def fetch(self, url: str, route: Optional[Route] = None) -> dict:
+        """
+        Retrieve the data of a resource by URL, using the cache.
+
+        :param route: the route of the URL, if already known
+        :raises: :class:`ValueError` if the schema has no retrieve operation for
+          the URL
+        """
+        data = self.cache.get(url)
+        if data is None:
+            if route is None:
+                route = self.router.route(url)
+            suffix = Client.operation_suffix_mapping["retrieve"]
+            if route is None or not route.operation_id.endswith(suffix):
+                raise ValueError("No retrieve operation found for '{}'".format(url))
+            resource = route.operation_id[: -len(suffix)]
+            data = route.client.retrieve(resource, url=url)
+            self.cache.set(url, data)
+        return data
+
+    def get(self, url: str) -> "Resource":
+        """
+        Return a proxy for the resource at ``url``, without fetching it.
+        """
+        return Resource(url=url, resolver=self)
+
+    def retrieve(self, client: Client, resource: str, **kwargs) -> "Resource":
+        """
+        Retrieve a resource through ``client`` and wrap it in a proxy.
+
+        Any keyword arguments are passed down to :meth:`Client.retrieve`.
+        """
+        data = client.retrieve(resource, **kwargs)
+        if data.get("url"):
+            self.cache.set(data["url"], data)
+        return Resource(data, resolver=self)
+
+    def list(self, client: Client, resource: str, **kwargs) -> List["Resource"]:
+        """
+        List resources through ``client`` and wrap them in proxies.
+
+        Any keyword arguments are passed down to :meth:`Client.list`. For paginated
+        responses, only the results of the page are returned.
+        """
+        response = client.list(resource, **kwargs)
+        if isinstance(response, dict):
+            response = response["results"]
+        return [Resource(data, resolver=self) for data in response]
+
+    def prefetch(self, resources: Iterable["Resource"], *fields: str) -> None:
+        """
+        Resolve the references in ``fields`` of all ``resources`` concurrently.
+
+        Fields may be dotted paths to prefetch references of references, for
+        example ``"status.statustype"``. Failures are logged rather than raised,
+        accessing the failed reference will raise the error again.
+        """
+        resources = list(resources)
+        for field in fields:
+            current = resources
+            for name in field.split("."):
+                urls = self._collect_references(current, name)
+                self._fetch_all([url for url in urls if url not in self.cache])
+                current = [self.get(url) for url in urls]
+
+    def _collect_references(self, resources: List["Resource"], name: str) -> list:
+        urls = {}
+        for resource in resources:
+            try:
+                value = resource.get(name)
+            except Exception:
+                continue
+            values = value if isinstance(value, list) else [value]
+            for item in values:
+                if self.is_reference(item):
+                    urls[item] = None
+        return list(urls)
+
+    def _fetch_all(self, urls: List[str]) -> None:
+        if not urls:
+            return
+
+        def fetch(url, route):
+            try:
+                self.fetch(url, route=route)
+            except Exception:
+                logger.warning("Prefetching '%s' failed", url, exc_info=True)
+
+        # route up front, so the schemas are fetched once rather than concurrently
+        routes = {}
+        for url in urls:
+            try:
+                routes[url] = self.router.route(url)
+            except Exception:
+                logger.warning("Prefetching '%s' failed", url, exc_info=True)
+
+        workers = min(self.max_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(propagate(fetch), routes, routes.values()))
+        # failures are only logged, but a spent deadline applies to the caller
+        check_deadline()
+
+    def wrap(self, value: Any) -> Any:
+        """
+        Wrap (nested) data and references in proxies.
+        """
+        if isinstance(value, dict):
+            return Resource(value, resolver=self)
+        if isinstance(value, list):
+            return [self.wrap(item) for item in value]
+        if self.is_reference(value):
+            return self.get(value)
+        return value
+
+
+class Resource:
+    """
+    Lightweight proxy of an API resource.
+
+    Item access returns the raw (JSON) values, attribute access returns wrapped
+    values: nested objects become proxies themselves and URL references to known
+    services become proxies that fetch the referenced resource on first access.
+
+    :param data: the (JSON) data of the resource, if already known
+    :param url: the URL of the resource, used to fetch ``data`` lazily
+    :param resolver: the :class:`Resolver` to resolve references with, defaults
+      to the shared :data:`resolver`
+    """
+
+    __slots__ = ("_url", "_data", "_resolver", "_attributes")
+
+    def __init__(
+        self,
+        data: Optional[dict] = None,
+        url: Optional[str] = None,
+        resolver: Optional[Resolver] = None,
+    ):
+        if data is None and url is None:
+            raise ValueError("Either 'data' or 'url' is required")
+        self._url = url if url is not None else data.get("url")
+        self._data = data
+        self._resolver = resolver or _get_default_resolver()
+        self._attributes = None
+
+    def __repr__(self):
+        if self._url is not None:
+            return "<%s: %s>" % (self.__class__.__name__, self._url)
+        return "<%s: %r>" % (self.__class__.__name__, self._data)
+
+    @property
+    def url(self) -> Optional[str]:
+        return self._url
+
+    @property
+    def data(self) -> dict:
+        """
+        The raw data of the resource, fetched on first access if needed.
+        """
+        if self._data is None:
+            self._data = self._resolver.fetch(self._url)
+        return self._data
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._data is not None or self._url in self._resolver.cache
+
+    def get(self, key: str, default=None) -> Any:
+        return self.data.get(key, default)
+
+    def keys(self):
+        return self.data.keys()
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.data
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __getattr__(self, name: str) -> Any:
+        # guard against recursion for (not yet set) private attributes
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        if self._attributes is None:
+            self._attributes = {}
+        elif name in self._attributes:
+            return self._attributes[name]
+
+        try:
+            value = self.data[name]
+        except KeyError:
+            raise AttributeError(
+                "%r has no attribute %r" % (self.__class__.__name__, name)
+            )
+
+        wrapped = self._attributes[name] = self._resolver.wrap(value)
+        return wrapped
+
+
+def expand(
+    objects: List[dict], expansions: Iterable[str], resolver: Optional[Resolver] = None
+) -> None:
+    """
+    Expand URL references in ``objects`` client-side, in place.
+
+    The referenced objects are embedded under the ``_expand`` key, mirroring the
+    ``expand`` query parameter of the ZGW APIs. Nested expansions are supported
+    with dotted paths, e.g. ``"status.statustype"``. The references of all objects
+    are fetched in one concurrent sweep per level. Only references to configured
+    services are expanded, other URLs are left as is.
+    """
+    resolver = resolver or _get_default_resolver()
+    for expansion in expansions:
+        _expand_level(objects, expansion.split("."), resolver)
+
+
+def _expand_level(objects: List[dict], names: List[str], resolver: Resolver):
+    name, rest = names[0], names[1:]
+    # only fetch references to configured services, other URLs could send the
+    # credentials anywhere
+    is_reference = resolver.is_reference
+
+    urls = set()
+    for obj in objects:
+        value = obj.get(name)
+        for item in value if isinstance(value, list) else [value]:
+            if is_reference(item) and item not in resolver.cache:
+                urls.add(item)
+    resolver._fetch_all(list(urls))
+
+    def resolve(url):
+        # copy, the cached data is shared and nested expansions add keys
+        return dict(resolver.fetch(url)) if is_reference(url) else url
+
+    children = []
+    for obj in objects:
+        value = obj.get(name)
+        if value is None:
+            continue
+        if isinstance(value, list):
+            expanded = [resolve(item) for item in value]
+            children += [item for item in expanded if isinstance(item, dict)]
+        else:
+            expanded = resolve(value)
+            if isinstance(expanded, dict):
+                children.append(expanded)
+        obj.setdefault(EXPAND_KEY, {})[name] = expanded
+
+    if rest and children:
+        _expand_level(children, rest, resolver)
+
+
+def _get_default_resolver() -> Resolver:
+    return resolver
+
+
+# sentinel instance, with a shared cache
+resolver = Resolver()
+"""
+Sentinel resolver instance, used by :class:`Resource` proxies by default.
+"""
@@ -0,0 +1,136 @@
+"""
+Route URLs to the service, operation and path parameters they belong to.
+
+>>> route = router.route("https://zaken.example.com/api/v1/zaken/1234")
+>>> route.service, route.operation_id, route.params
+('zrc', 'zaak_read', {'uuid': '1234'})
+
+The API roots of the services are kept in a trie of URL segments, so the service
+is found in a single walk over the URL. The rest of the path is matched against
+the compiled schema of the service, see :meth:`CompiledSchema.match_url`.
+"""
+import threading
+from collections import namedtuple
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .client import Client
+from .config import url_to_base_url
+from .schema import compile_schema
+
+__all__ = ["Route", "Router", "router"]
+
+Route = namedtuple("Route", ["service", "operation_id", "params", "client"])
+
+
+class _Node:
+    __slots__ = ("client", "children")
+
+    def __init__(self):
+        self.client = None
+        self.children = {}
+
+
+def _split_url(url: str) -> Tuple[str, list]:
+    """
+    Split a URL in its base URL and path segments, dropping the query string.
+    """
+    start = url.find("://")
+    start = url.find("/", start + 3) if start != -1 else -1
+    if start == -1:
+        return url, []
+    path = url[start + 1 :]
+    if "?" in path or "#" in path:
+        path = path.split("?", 1)[0].split("#", 1)[0]
+    return url[:start], path.split("/")
+
+
+class Router:
+    """
+    Route URLs to (service alias, operation, path parameters).
+
+    Services are added with :meth:`add`, or discovered through
+    :meth:`Client.from_url` for URLs of known hosts that don't match any of the
+    added services. One client is kept per API root, so the schema of a service
+    is compiled and indexed once.
+    """
+
+    def __init__(self):
+        self._roots = {}
+        self._lock = threading.Lock()
+
+    def add(self, client: Client) -> Client:
+        """
+        Route the URLs under the API root (base URL) of the client to it.
+
+        :return: the client routed to, which is an earlier added client if there
+          is one for the API root
+        """
+        base, segments = _split_url(client.base_url)
+        base = url_to_base_url(base)
+        with self._lock:
+            node = self._roots.setdefault(base, _Node())
+            for segment in segments:
+                if segment:
+                    node = node.children.setdefault(segment, _Node())
+            if node.client is None:
+                node.client = client
+            return node.client
+
+    def _lookup(self, url: str) -> Optional[Tuple[Client, str]]:
+        base, segments = _split_url(url)
+        node = self._roots.get(base)
+        if node is None:
+            node = self._roots.get(url_to_base_url(base))
+            if node is None:
+                return None
+
+        found, consumed = node.client, 0
+        for index, segment in enumerate(segments):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.client is not None:
+                found, consumed = node.client, index + 1
+        if found is None:
+            return None
+        return found, "/" + "/".join(segments[consumed:])
+
+    def get_client(self, url: str) -> Client:
+        """
+        Return the client of the service hosting the URL.
+        """
+        found = self._lookup(url)
+        if found is not None:
+            return found[0]
+        return self.add(Client.from_url(url))
+
+    def route(self, url: str, method: str = "GET") -> Optional[Route]:
+        """
+        Route a URL to its service and operation.
+
+        :return: the route, or ``None`` if the schema of the service has no
+          operation (with the given method) for the URL
+        """
+        found = self._lookup(url)
+        if found is None:
+            self.get_client(url)
+            found = self._lookup(url)
+        client, path = found
+        match = compile_schema(client.schema).match_url(path, method=method)
+        if match is None:
+            return None
+        operation, params = match
+        return Route(client.service, operation.operation_id, params, client)
+
+    def route_many(
+        self, urls: Iterable[str], method: str = "GET"
+    ) -> Iterator[Optional[Route]]:
+        """
+        Route each of the URLs with :meth:`route`, lazily.
+        """
+        route = self.route
+        for url in urls:
+            yield route(url, method=method)
+
+
+router = Router()
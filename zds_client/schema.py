@@ -1,5 +1,9 @@
+import functools
 import logging
-from typing import List, Tuple
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
@@ -8,6 +12,13 @@ DEFAULT_PATH_PARAMETERS = {"version": "1"}
 
 TYPE_ARRAY = "array"
 
+_NOT_COMPUTED = object()
+
+PARAMETER_PATTERN = re.compile(r"{([^{}/]+)}")
+
+# the URL query parameters, as in extract_params, match a single path segment
+PARAMETER_REGEX = "[^/]+"
+
 DEFAULT_SERVERS = [
     {
         "url": "/",
@@ -27,25 +38,18 @@ def get_operation_url(
 
     base_path = urlparse(url).path
 
-    for path, methods in spec["paths"].items():
-        for name, method in methods.items():
-            if name == "parameters":
-                continue
+    path = compile_schema(spec).get_operation(operation).path
+    if not pattern_only:
+        format_kwargs = DEFAULT_PATH_PARAMETERS.copy()
+        format_kwargs.update(**kwargs)
+        path = path.format(**format_kwargs)
 
-            if method["operationId"] == operation:
-                format_kwargs = DEFAULT_PATH_PARAMETERS.copy()
-                format_kwargs.update(**kwargs)
-                if not pattern_only:
-                    path = path.format(**format_kwargs)
+    # if both base_path ends with a slash and path starts with one,
+    # we need to join them together correctly, so drop one slash
+    if base_path.endswith("/") and path.startswith("/"):
+        path = path[1:]
 
-                # if both base_path ends with a slash and path starts with one,
-                # we need to join them together correctly, so drop one slash
-                if base_path.endswith("/") and path.startswith("/"):
-                    path = path[1:]
-
-                return "{base_path}{path}".format(base_path=base_path, path=path)
-
-    raise ValueError("Operation {operation} not found".format(operation=operation))
+    return "{base_path}{path}".format(base_path=base_path, path=path)
 
 
 def path_to_bits(path: str, transform=reversed) -> list:
@@ -68,6 +72,9 @@ def extract_params(url: str, pattern: str) -> dict:
     >>> url = 'https://example.com/zrc/api/v1/zaken/1234'
     >>> extract_params(url, pattern)
     {'uuid': '1234'}
+
+    To process many URLs, use :func:`compile_pattern` or
+    :meth:`CompiledSchema.match_url` instead.
     """
     path_url = urlparse(url).path
     path_pattern = urlparse(pattern).path
@@ -83,6 +90,148 @@ def extract_params(url: str, pattern: str) -> dict:
     }
 
 
+def get_path(url: str) -> str:
+    """
+    Strip the scheme, host, query string and fragment from a URL.
+
+    A cheaper alternative to ``urlparse(url).path`` for hot loops.
+    """
+    start = url.find("://")
+    if start != -1:
+        start = url.find("/", start + 3)
+        if start == -1:
+            return ""
+        url = url[start:]
+    if "?" in url or "#" in url:
+        url = url.split("?", 1)[0].split("#", 1)[0]
+    return url
+
+
+def _pattern_to_regex(pattern: str, group_prefix: str = None) -> Tuple[str, tuple]:
+    """
+    Convert the segments of a path template to a regex and its parameter names.
+
+    Parameters become named groups if a ``group_prefix`` is given.
+    """
+    regex_segments = []
+    names = []
+    for segment in path_to_bits(urlparse(pattern).path, transform=iter):
+        parts = PARAMETER_PATTERN.split(segment)
+        regex = []
+        # the split alternates literal text and parameter names
+        for index, part in enumerate(parts):
+            if index % 2 == 0:
+                regex.append(re.escape(part))
+                continue
+            if group_prefix is None:
+                regex.append("(%s)" % PARAMETER_REGEX)
+            else:
+                regex.append(
+                    "(?P<%s%d>%s)" % (group_prefix, len(names), PARAMETER_REGEX)
+                )
+            names.append(part)
+        regex_segments.append("".join(regex))
+    return "/".join(regex_segments), tuple(names)
+
+
+class PathPattern:
+    """
+    A path template, compiled to extract the parameters of many URLs efficiently.
+
+    Like :func:`extract_params`, URLs are matched by the end of their path, so they
+    may be hosted on a sub path. Unlike it, the literal parts of the path must
+    match as well, otherwise there's no match at all.
+
+    >>> pattern = compile_pattern("/api/v1/zaken/{uuid}")
+    >>> pattern.match("https://example.com/zrc/api/v1/zaken/1234")
+    {'uuid': '1234'}
+    """
+
+    __slots__ = ("pattern", "names", "_search")
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        regex, self.names = _pattern_to_regex(pattern)
+        self._search = re.compile("(?:^|/)%s/?$" % regex).search
+
+    def __repr__(self):
+        return "<%s: %s>" % (self.__class__.__name__, self.pattern)
+
+    def match(self, url: str) -> Optional[Dict[str, str]]:
+        """
+        Extract the parameters of the URL, ``None`` if it doesn't match.
+        """
+        match = self._search(get_path(url))
+        if match is None:
+            return None
+        return dict(zip(self.names, match.groups()))
+
+    def match_many(self, urls: Iterable[str]) -> Iterator[Optional[Dict[str, str]]]:
+        """
+        Extract the parameters of each of the URLs, lazily.
+        """
+        search, names, _get_path = self._search, self.names, get_path
+        for url in urls:
+            match = search(_get_path(url))
+            yield None if match is None else dict(zip(names, match.groups()))
+
+
+@functools.lru_cache(maxsize=256)
+def compile_pattern(pattern: str) -> PathPattern:
+    """
+    Return the (cached) :class:`PathPattern` of a path template.
+    """
+    return PathPattern(pattern)
+
+
+def _get_specificity(pattern: str) -> tuple:
+    # literal segments before parameters, so ``/zaken/_zoek`` wins from
+    # ``/zaken/{uuid}``
+    return tuple(
+        "{" in segment for segment in path_to_bits(urlparse(pattern).path, iter)
+    )
+
+
+class PathMatcher:
+    """
+    Match URLs against many path templates at once, with a single regex search.
+
+    URLs are matched by the end of their path. When multiple templates match, the
+    longest one wins, and literal segments win from parameters.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = sorted(set(patterns), key=_get_specificity)
+        self._groups = {}
+        alternatives = []
+        for index, pattern in enumerate(self.patterns):
+            prefix = "p%d_" % index
+            regex, names = _pattern_to_regex(pattern, group_prefix=prefix)
+            groups = tuple("%s%d" % (prefix, number) for number in range(len(names)))
+            # the empty marker group closes last, identifying the alternative
+            marker = "m%d" % index
+            alternatives.append("%s(?P<%s>)" % (regex, marker))
+            self._groups[marker] = (pattern, names, groups)
+        self._search = re.compile("(?:^|/)(?:%s)/?$" % "|".join(alternatives)).search
+
+    def match(self, url: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """
+        Return the matching path template and the extracted parameters.
+        """
+        match = self._search(get_path(url))
+        if match is None:
+            return None
+        pattern, names, groups = self._groups[match.lastgroup]
+        return pattern, {name: match.group(group) for name, group in zip(names, groups)}
+
+    def match_many(
+        self, urls: Iterable[str]
+    ) -> Iterator[Optional[Tuple[str, Dict[str, str]]]]:
+        match = self.match
+        for url in urls:
+            yield match(url)
+
+
 def separate_params(params: List[dict]) -> Tuple[List, List[str]]:
     """Separate parameters explicitly defined and referenced by `$ref`"""
     reference_params = []
@@ -105,26 +254,30 @@ def filter_header_reference_params(params: list, spec: dict) -> list:
     header_params = []
 
     for param in params:
-        reference = param.get("$ref")
-        # Local reference case (parameter in specification document)
-        if reference[:2] == "#/":
-            split_path = reference[2:].split("/")
-            tmp_parameter = spec
-            for parent in split_path:
-                tmp_parameter = tmp_parameter.get(parent)
-
-            if tmp_parameter["in"] == "header" and tmp_parameter["required"]:
-                header_params.append(tmp_parameter)
-        # TODO Remote reference case (parameter in a document on the same server)
-        elif "//" not in reference:
-            raise NotImplementedError("To be implemented")
-        # TODO URL reference case (parameter in a document on another server)
-        elif "//" in reference:
-            raise NotImplementedError("To be implemented")
+        tmp_parameter = resolve_reference(spec, param["$ref"])
+        if tmp_parameter["in"] == "header" and tmp_parameter["required"]:
+            header_params.append(tmp_parameter)
 
     return header_params
 
 
+def resolve_reference(spec: dict, reference: str) -> dict:
+    """Look up the object referenced by a `$ref` in the specification"""
+    # Local reference case (parameter in specification document)
+    if reference[:2] == "#/":
+        split_path = reference[2:].split("/")
+        tmp_object = spec
+        for parent in split_path:
+            tmp_object = tmp_object.get(parent)
+        return tmp_object
+    # TODO Remote reference case (parameter in a document on the same server)
+    elif "//" not in reference:
+        raise NotImplementedError("To be implemented")
+    # TODO URL reference case (parameter in a document on another server)
+    else:
+        raise NotImplementedError("To be implemented")
+
+
 def filter_header_params(params: list, spec: dict) -> list:
     """Extract parameters required for headers"""
     # Separate the parameters that use references
@@ -142,20 +295,69 @@ def get_headers(spec: dict, operation: str) -> dict:
     """
     Extract required headers and use the default value from the API spec.
     """
-    headers = {}
+    try:
+        _operation = compile_schema(spec).get_operation(operation)
+    except ValueError:
+        return {}
+    return dict(_operation.headers)
 
-    for path, methods in spec["paths"].items():
-        path_parameters = filter_header_params(methods.get("parameters", []), spec)
-        for name, method in methods.items():
-            if name == "parameters":
-                continue
 
-            if method["operationId"] != operation:
-                continue
+class Operation:
+    """
+    A single operation of an OAS schema, with its derived data computed once.
+    """
 
-            method_parameters = filter_header_params(method.get("parameters", []), spec)
+    __slots__ = (
+        "spec",
+        "operation_id",
+        "path",
+        "method",
+        "definition",
+        "path_parameters",
+        "header_templates",
+        "request_validators",
+        "_headers",
+        "_query_parameters",
+        "_response_properties",
+    )
 
-            for param in path_parameters + method_parameters:
+    def __init__(
+        self, spec: dict, path: str, method: str, definition: dict, path_parameters
+    ):
+        self.spec = spec
+        self.operation_id = definition["operationId"]
+        self.path = path
+        self.method = method.upper()
+        self.definition = definition
+        self.path_parameters = path_parameters
+        # complete request headers, per set of credentials - see Client.request
+        self.header_templates = {}
+        # see zds_client.validation.get_request_validator
+        self.request_validators = {}
+        self._headers = None
+        self._query_parameters = None
+        self._response_properties = _NOT_COMPUTED
+
+    def __repr__(self):
+        return "<%s: %s %s %s>" % (
+            self.__class__.__name__,
+            self.operation_id,
+            self.method,
+            self.path,
+        )
+
+    @property
+    def parameters(self) -> List[dict]:
+        return self.path_parameters + self.definition.get("parameters", [])
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """
+        The required headers, with the default value from the API spec.
+        """
+        if self._headers is None:
+            headers = {}
+            for param in filter_header_params(self.parameters, self.spec):
                 enum = param["schema"].get("enum", [])
                 default = param["schema"].get("default")
 
@@ -163,5 +365,158 @@ def get_headers(spec: dict, operation: str) -> dict:
                     len(enum) == 1 or default
                 ), "Can't choose an appropriate default header value"
                 headers[param["name"]] = default or enum[0]
+            self._headers = headers
+        return self._headers
+
+    @property
+    def query_parameters(self) -> FrozenSet[str]:
+        """
+        The names of the query parameters supported by the operation.
+        """
+        if self._query_parameters is None:
+            names = set()
+            for param in self.parameters:
+                if "$ref" in param:
+                    param = resolve_reference(self.spec, param["$ref"])
+                if param.get("in") == "query":
+                    names.add(param["name"])
+            self._query_parameters = frozenset(names)
+        return self._query_parameters
+
+    @property
+    def response_properties(self) -> Optional[FrozenSet[str]]:
+        """
+        The property names of the resource(s) returned by the operation.
+
+        For paginated list responses, these are the properties of the items in the
+        ``results``. ``None`` is returned if they can't be determined.
+        """
+        if self._response_properties is _NOT_COMPUTED:
+            self._response_properties = self._get_response_properties()
+        return self._response_properties
+
+    def _get_response_properties(self) -> Optional[FrozenSet[str]]:
+        for status, response in sorted(self.definition.get("responses", {}).items()):
+            if not str(status).startswith("2"):
+                continue
+            if "$ref" in response:
+                response = resolve_reference(self.spec, response["$ref"])
+            content = response.get("content", {}).get("application/json", {})
+            if "schema" not in content:
+                continue
+
+            schema = self._resolve_schema(content["schema"])
+            if schema.get("type") == "array":
+                schema = self._resolve_schema(schema.get("items", {}))
+            elif "results" in schema.get("properties", {}):
+                results = self._resolve_schema(schema["properties"]["results"])
+                schema = self._resolve_schema(results.get("items", {}))
+
+            properties = set(schema.get("properties", {}))
+            for sub_schema in schema.get("allOf", []):
+                sub_schema = self._resolve_schema(sub_schema)
+                properties.update(sub_schema.get("properties", {}))
+            return frozenset(properties) or None
+        return None
 
-    return headers
+    def _resolve_schema(self, schema: dict) -> dict:
+        while "$ref" in schema:
+            schema = resolve_reference(self.spec, schema["$ref"])
+        return schema
+
+
+class CompiledSchema:
+    """
+    Index of the operations of an OAS schema, to avoid scanning all paths.
+
+    Use :func:`compile_schema` to obtain (cached) instances.
+    """
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.operations = {}
+        # the operations per path and (upper case) method
+        self.paths = {}
+        self._path_matcher = None
+
+        for path, methods in spec["paths"].items():
+            path_parameters = methods.get("parameters", [])
+            for name, method in methods.items():
+                if name == "parameters" or not isinstance(method, dict):
+                    continue
+                if "operationId" not in method:
+                    continue
+                operation = Operation(spec, path, name, method, path_parameters)
+                # the first occurrence wins, as with a linear scan
+                operation = self.operations.setdefault(method["operationId"], operation)
+                self.paths.setdefault(path, {})[operation.method] = operation
+
+    def get_operation(self, operation: str) -> Operation:
+        try:
+            return self.operations[operation]
+        except KeyError:
+            raise ValueError(
+                "Operation {operation} not found".format(operation=operation)
+            )
+
+    @property
+    def path_matcher(self) -> PathMatcher:
+        if self._path_matcher is None:
+            self._path_matcher = PathMatcher(self.paths)
+        return self._path_matcher
+
+    def match_url(
+        self, url: str, method: str = "GET"
+    ) -> Optional[Tuple[Operation, Dict[str, str]]]:
+        """
+        Find the operation for a URL and extract its path parameters.
+
+        :return: the operation and the parameters, or ``None`` if no path of the
+          schema (with the given method) matches
+        """
+        match = self.path_matcher.match(url)
+        if match is None:
+            return None
+        operation = self.paths[match[0]].get(method.upper())
+        if operation is None:
+            return None
+        return operation, match[1]
+
+    def match_urls(
+        self, urls: Iterable[str], method: str = "GET"
+    ) -> Iterator[Optional[Tuple[Operation, Dict[str, str]]]]:
+        """
+        Match each of the URLs with :meth:`match_url`, lazily.
+        """
+        match, paths, method = self.path_matcher.match, self.paths, method.upper()
+        for url in urls:
+            matched = match(url)
+            operation = None if matched is None else paths[matched[0]].get(method)
+            yield None if operation is None else (operation, matched[1])
+
+
+_compiled_schemas = OrderedDict()
+_compiled_schemas_lock = threading.Lock()
+
+MAX_COMPILED_SCHEMAS = 64
+
+
+def compile_schema(spec: dict) -> CompiledSchema:
+    """
+    Return the (cached) :class:`CompiledSchema` for an OAS schema.
+
+    Schemas are identified by object identity. Compiled schemas keep a reference to
+    their schema, so the identity is never re-used by another schema while cached.
+    Schemas are treated as immutable: if you mutate one, compile a fresh copy.
+    """
+    key = id(spec)
+    compiled = _compiled_schemas.get(key)
+    if compiled is not None and compiled.spec is spec:
+        return compiled
+
+    compiled = CompiledSchema(spec)
+    with _compiled_schemas_lock:
+        _compiled_schemas[key] = compiled
+        while len(_compiled_schemas) > MAX_COMPILED_SCHEMAS:
+            _compiled_schemas.popitem(last=False)
+    return compiled
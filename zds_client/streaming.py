@@ -0,0 +1,201 @@
+"""
+Incremental parsing of (paginated) list responses.
+
+A list page is parsed while it's being received: the objects in its ``results``
+are yielded one by one as soon as they are complete, so processing can start
+before the whole page is downloaded and the page is never held in memory as a
+whole:
+
+>>> for zaak in client.iter_list("zaak", params={"page_size": 5000}):
+...     process(zaak)
+"""
+import codecs
+import json
+import re
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+__all__ = ["ListStream"]
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+# keep the parsed part of the buffer around until it's this long
+MAX_CONSUMED = 64 * 1024
+
+
+class ListStream:
+    """
+    Iterate over the objects of a list response, parsing it incrementally.
+
+    Both paginated responses (an object with the objects in ``results``) and plain
+    arrays are supported. The other keys of a paginated response, such as
+    ``count`` and ``next``, are collected in :attr:`meta` while parsing - keys
+    after the ``results`` are only available once all objects were consumed.
+
+    :param chunks: the (decompressed) chunks of the response body
+    :param decoder: the :class:`json.JSONDecoder` to decode the objects with
+    :param on_close: called once the stream is exhausted or closed
+    :raises: :class:`ValueError` (a :class:`json.JSONDecodeError`) for an invalid
+      or truncated response body, while iterating
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        decoder: Optional[json.JSONDecoder] = None,
+        on_close: Optional[Callable[["ListStream"], None]] = None,
+    ):
+        self.meta = {}
+        self.size = 0
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = decoder or json.JSONDecoder()
+        self._on_close = on_close
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._closed = False
+        self._iterator = self._parse()
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        return next(self._iterator)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def count(self) -> Optional[int]:
+        return self.meta.get("count")
+
+    @property
+    def next(self) -> Optional[str]:
+        return self.meta.get("next")
+
+    def close(self) -> None:
+        """
+        Stop parsing, e.g. to stop iterating early.
+        """
+        self._iterator.close()
+        self._finish()
+
+    def _finish(self) -> None:
+        if not self._closed:
+            self._closed = True
+            if self._on_close is not None:
+                self._on_close(self)
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            chunk = b""
+        self.size += len(chunk)
+        text = self._text.decode(chunk, final=self._eof)
+        if self._pos > MAX_CONSUMED:
+            self._buffer, self._pos = self._buffer[self._pos :], 0
+        self._buffer += text
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def _peek(self) -> str:
+        """
+        Skip whitespace and return the next character, without consuming it.
+        """
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise self._error("Unexpected end of the response")
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise self._error("Expecting '{}'".format(char))
+        self._pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # most likely incomplete, unless there's no more data
+                if not self._fill():
+                    raise
+                continue
+            # a number may continue in the next chunk, e.g. "3." is decoded as 3 -
+            # objects, arrays and strings end with their closing character
+            if (
+                self._buffer[self._pos] not in '{["'
+                and (end == len(self._buffer) or self._buffer[end] in NUMBER_CHARS)
+                and self._fill()
+            ):
+                continue
+            self._pos = end
+            return value
+
+    def _items(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            char = self._peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self._error("Expecting ',' or ']'")
+
+    def _parse(self) -> Iterator[Any]:
+        try:
+            yield from self._document()
+            self._expect_end()
+        finally:
+            self._finish()
+
+    def _document(self) -> Iterator[Any]:
+        if self._peek() == "[":
+            yield from self._items()
+            return
+
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise self._error("Expecting a property name")
+            self._expect(":")
+            if key == "results" and self._peek() == "[":
+                yield from self._items()
+            else:
+                self.meta[key] = self._value()
+            char = self._peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise self._error("Expecting ',' or '}'")
+
+    def _expect_end(self) -> None:
+        # read the body to the end, e.g. so a recording transport gets all of it
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                raise self._error("Extra data")
+            if not self._fill():
+                return
@@ -0,0 +1,151 @@
+"""
+Timeouts and deadlines of client calls.
+
+Connect and read timeouts are configured per service:
+
+.. code-block:: yaml
+
+    zrc:
+      scheme: https
+      host: zaken.example.com
+      timeout:
+        connect: 3.05
+        read: 10
+
+A deadline limits the total duration of everything done within it - multiple
+requests, looping over pages or resolving references. Deadlines nest: an inner
+deadline can't extend the outer one. Every request gets the remaining budget as
+its timeout, and no request is started once the deadline is spent:
+
+>>> with deadline(5):
+...     zaak = client.retrieve("zaak", uuid=uuid)
+...     statussen = client.list("status", params={"zaak": zaak["url"]})
+
+Connect and read timeouts of the transport that were capped by the deadline are
+raised as :class:`DeadlineExceeded` as well. Note that a read timeout limits the
+wait for each read from the connection, not the duration of the response as a
+whole. Within a deadline, response bodies are therefore read in chunks, checking
+the deadline in between: a server sending a body very slowly can overrun the
+deadline by at most the time it takes to send a single chunk (16 KiB).
+"""
+import contextlib
+import time
+from contextvars import ContextVar, copy_context
+from typing import Callable, Optional, Tuple, Union
+
+__all__ = [
+    "DeadlineExceeded",
+    "check_deadline",
+    "deadline",
+    "get_remaining",
+    "get_timeout",
+    "is_deadline_spent",
+    "parse_timeout",
+    "propagate",
+]
+
+Timeout = Union[float, Tuple[Optional[float], Optional[float]]]
+
+_deadline = ContextVar("zds_client_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    The deadline of the call is spent.
+    """
+
+
+@contextlib.contextmanager
+def deadline(seconds: float):
+    """
+    Limit the total duration of the client calls within the block.
+    """
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        expires = min(expires, current)
+    token = _deadline.set(expires)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def get_remaining() -> Optional[float]:
+    """
+    Return the seconds left before the current deadline, ``None`` without deadline.
+    """
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return expires - time.monotonic()
+
+
+def check_deadline() -> Optional[float]:
+    """
+    Raise :class:`DeadlineExceeded` if the current deadline is spent, otherwise
+    return the remaining seconds.
+    """
+    remaining = get_remaining()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("The deadline was exceeded by %.3fs" % -remaining)
+    return remaining
+
+
+def is_deadline_spent() -> bool:
+    """
+    Return whether there's a current deadline, and it's spent.
+    """
+    remaining = get_remaining()
+    return remaining is not None and remaining <= 0
+
+
+def parse_timeout(value) -> Optional[Timeout]:
+    """
+    Normalize a configured timeout to the format :mod:`requests` accepts.
+
+    :param value: ``None``, a number of seconds for both the connect and read
+      timeout, a ``[connect, read]`` pair or a ``{"connect": ..., "read": ...}``
+      mapping
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, dict):
+        unknown = set(value) - {"connect", "read"}
+        if unknown:
+            raise ValueError("Unknown timeout keys: %s" % ", ".join(sorted(unknown)))
+        return (value.get("connect"), value.get("read"))
+    connect, read = value
+    return (connect, read)
+
+
+def get_timeout(timeout: Optional[Timeout]) -> Optional[Timeout]:
+    """
+    Cap the timeout of a request to the remaining budget of the current deadline.
+
+    :raises: :class:`DeadlineExceeded` if the deadline is spent
+    """
+    remaining = check_deadline()
+    if remaining is None:
+        return timeout
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(
+            remaining if part is None else min(part, remaining) for part in timeout
+        )
+    return min(timeout, remaining)
+
+
+def propagate(func: Callable) -> Callable:
+    """
+    Run ``func`` in a copy of the current context, e.g. in another thread, so that
+    the deadline applies there too.
+    """
+    context = copy_context()
+
+    def wrapper(*args, **kwargs):
+        # a context can only be entered by one thread at a time
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,347 @@
+"""
+Distributed tracing of the requests made by the client.
+
+With a tracer set, every request of the client becomes a span, with child spans
+for fetching schemas and the pages of :meth:`Client.iter_list`. The
+W3C ``traceparent`` and ``X-Request-ID`` headers are sent along, so the spans can
+be correlated with the spans and logs of the services:
+
+>>> Client.tracer = Tracer(exporter=LoggingExporter())
+
+Incoming trace context, e.g. of the web request being handled, is continued with
+:func:`continue_trace`. Spans are sent to the exporter when they end. Exporters
+are objects with an ``export(span)`` method, adapting to the tracing backend in
+use.
+"""
+import functools
+import logging
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "InMemoryExporter",
+    "LoggingExporter",
+    "Span",
+    "Tracer",
+    "continue_trace",
+    "get_current_span",
+    "get_request_id",
+]
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span = ContextVar("zds_client_span", default=None)
+_request_id = ContextVar("zds_client_request_id", default=None)
+# the span of a public client call, to be taken over by its request
+_operation_span = ContextVar("zds_client_operation_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return "{:0{width}x}".format(random.getrandbits(bits), width=bits // 4)
+
+
+class Span:
+    """
+    A timed operation within a trace.
+
+    :param name: the name of the span
+    :param trace_id: the trace the span belongs to, 32 hex characters
+    :param parent_id: the span id of the parent span, if any
+    :param tracer: the :class:`Tracer` exporting the span when it ends. Spans
+      without tracer only carry (remote) trace context.
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_time",
+        "end_time",
+        "error",
+        "_tracer",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        tracer: Optional["Tracer"] = None,
+        span_id: Optional[str] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id or _new_id(64)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.end_time = None
+        self.error = None
+        self._tracer = tracer
+
+    def __repr__(self):
+        return "<%s: %s %s>" % (self.__class__.__name__, self.name, self.span_id)
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    @property
+    def traceparent(self) -> str:
+        return "00-{}-{}-01".format(self.trace_id, self.span_id)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = time.time()
+        if error is not None:
+            self.error = error
+            self.attributes["error.type"] = type(error).__name__
+        if self._tracer is not None:
+            self._tracer.export(self)
+
+
+class Tracer:
+    """
+    Create spans and send them to an exporter when they end.
+
+    :param exporter: an object with an ``export(span)`` method, defaults to an
+      :class:`InMemoryExporter`
+    """
+
+    def __init__(self, exporter=None):
+        self.exporter = InMemoryExporter() if exporter is None else exporter
+
+    def __repr__(self):
+        return "<%s: %r>" % (self.__class__.__name__, self.exporter)
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[Span] = None,
+    ) -> Span:
+        """
+        Start a span, a child of ``parent`` or else of the current span.
+
+        The span is not made the current span, see :meth:`span` and :func:`use_span`.
+        """
+        parent = parent or _current_span.get()
+        return Span(
+            name,
+            trace_id=parent.trace_id if parent is not None else _new_id(128),
+            parent_id=parent.span_id if parent is not None else None,
+            attributes=attributes,
+            tracer=self,
+        )
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """
+        Run the block in a new (current) span, ending it on exit.
+        """
+        span = self.start_span(name, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.end(error=exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def export(self, span: Span) -> None:
+        try:
+            self.exporter.export(span)
+        except Exception:
+            logger.warning("Exporting span %r failed", span, exc_info=True)
+
+
+class InMemoryExporter:
+    """
+    Collect the ended spans in memory, e.g. for tests.
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def __repr__(self):
+        return "<%s: %d spans>" % (self.__class__.__name__, len(self.spans))
+
+    def export(self, span: Span) -> None:
+        # list.append is atomic, spans may end in several threads
+        self.spans.append(span)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class LoggingExporter:
+    """
+    Log the ended spans, with the span data as ``extra`` of the log records.
+    """
+
+    def __init__(self, logger_name: str = "zds_client.tracing.spans"):
+        self.logger = logging.getLogger(logger_name)
+
+    def export(self, span: Span) -> None:
+        self.logger.info(
+            "%s took %.1f ms",
+            span.name,
+            span.duration * 1000,
+            extra={
+                "trace_id": span.trace_id,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "attributes": span.attributes,
+            },
+        )
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def get_request_id() -> Optional[str]:
+    """
+    Return the request id to send as ``X-Request-ID``: the id of the incoming
+    request if continued with :func:`continue_trace`, otherwise the trace id.
+    """
+    request_id = _request_id.get()
+    if request_id is not None:
+        return request_id
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def get_trace_headers() -> Dict[str, str]:
+    """
+    Return the headers propagating the current trace context, if any.
+    """
+    span = _current_span.get()
+    if span is None:
+        return {}
+    return {"traceparent": span.traceparent, "X-Request-ID": get_request_id()}
+
+
+@contextmanager
+def use_span(span: Optional[Span]):
+    """
+    Make ``span`` the current span within the block, without ending it.
+
+    Without span (``None``), the current span is left as is.
+    """
+    if span is None:
+        yield None
+        return
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def continue_trace(traceparent: Optional[str] = None, request_id: Optional[str] = None):
+    """
+    Continue the trace of an incoming request within the block.
+
+    Spans started within the block become children of the remote span, and
+    requests propagate the incoming request id. An invalid ``traceparent`` is
+    ignored, starting a new trace.
+
+    >>> with continue_trace(request.headers.get("traceparent"),
+    ...                     request.headers.get("X-Request-ID")):
+    ...     ...
+    """
+    match = TRACEPARENT.match(traceparent.strip().lower()) if traceparent else None
+    remote = None
+    if match is not None:
+        trace_id, span_id, _ = match.groups()
+        remote = Span("remote", trace_id=trace_id, span_id=span_id)
+
+    span_token = _current_span.set(remote)
+    request_id_token = _request_id.set(request_id)
+    try:
+        yield remote
+    finally:
+        _request_id.reset(request_id_token)
+        _current_span.reset(span_token)
+
+
+def record_retry() -> None:
+    """
+    Count an extra attempt of the request of the current span.
+    """
+    span = _current_span.get()
+    if span is not None and span._tracer is not None:
+        span.attributes["zds.retries"] = span.attributes.get("zds.retries", 0) + 1
+
+
+def _get_attributes(client, operation: str) -> Dict[str, Any]:
+    return {
+        "zds.service": client.service,
+        "zds.operation_id": operation,
+        "zds.retries": 0,
+    }
+
+
+@contextmanager
+def operation_span(client, operation: str):
+    """
+    Run a public :class:`Client` call in a span, if the client has a tracer.
+
+    The span is opened before the URL of the operation is resolved, so that
+    fetching the schema becomes a child span. The request of the call takes the
+    span over instead of starting its own, see :func:`traced`.
+    """
+    tracer = client.tracer
+    if tracer is None:
+        yield None
+        return
+    with tracer.span(operation, _get_attributes(client, operation)) as span:
+        token = _operation_span.set(span)
+        try:
+            yield span
+        finally:
+            _operation_span.reset(token)
+
+
+def traced(method: Callable) -> Callable:
+    """
+    Run calls of a :class:`Client` method that takes the operation as second
+    argument in a span, if the client has a tracer.
+
+    Within :func:`operation_span`, the first call for the same operation runs in
+    that span.
+    """
+
+    @functools.wraps(method)
+    def wrapper(client, path, operation, *args, **kwargs):
+        tracer = client.tracer
+        if tracer is None:
+            return method(client, path, operation, *args, **kwargs)
+        span = _operation_span.get()
+        if span is not None and span is _current_span.get() and span.name == operation:
+            # taken over once, further requests of the call get their own span
+            _operation_span.set(None)
+            return method(client, path, operation, *args, **kwargs)
+        with tracer.span(operation, _get_attributes(client, operation)):
+            return method(client, path, operation, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,462 @@
+"""
+Transports send the HTTP requests of the :class:`zds_client.client.Client`.
+
+Besides the default transport using ``requests``, requests and responses can be
+recorded to a file and replayed later, e.g. to load test services without hitting
+the real backends, or to reproduce production incidents:
+
+>>> Client.transport = RecordingTransport("/var/log/zds/recording.jsonl.gz")
+>>> ...
+>>> Client.transport = ReplayTransport("/var/log/zds/recording.jsonl.gz")
+"""
+import base64
+import functools
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .compat import lazy_import
+from .dns import DNSCache, dns_cache as default_dns_cache
+
+requests = lazy_import("requests")
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "RecordingNotFound",
+    "RecordingTransport",
+    "ReplayTransport",
+    "RequestsTransport",
+]
+
+# request headers that are never written to a recording
+REDACTED_HEADERS = {"authorization", "cookie", "proxy-authorization"}
+
+# response headers describing the transfer encoding, not the (recorded) content
+TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class RequestsTransport:
+    """
+    Send requests with :mod:`requests`, through a session per host.
+
+    The sessions keep connections open between requests, in a pool per host.
+    Unlike :class:`requests.Session` normally does, cookies are not persisted
+    between requests.
+
+    :param pool_maxsize: the maximum number of connections to keep open per host
+    :param dns_cache: the :class:`zds_client.dns.DNSCache` to resolve host names
+      of new connections with, or ``None`` to resolve them every time
+    """
+
+    def __init__(
+        self, pool_maxsize: int = 10, dns_cache: Optional[DNSCache] = default_dns_cache
+    ):
+        self.pool_maxsize = pool_maxsize
+        self.dns_cache = dns_cache
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<%s: %d sessions>" % (self.__class__.__name__, len(self._sessions))
+
+    def get_session(self, url: str) -> "requests.Session":
+        """
+        Return the session for the host of the URL.
+        """
+        key = get_host_url(url)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._sessions[key] = self._create_session()
+        return session
+
+    def _create_session(self) -> "requests.Session":
+        # deferred, http.cookiejar is slow to import
+        from http.cookiejar import DefaultCookiePolicy
+
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = _get_adapter_class()(
+            dns_cache=self.dns_cache,
+            pool_connections=1,
+            pool_maxsize=self.pool_maxsize,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def send(self, method: str, url: str, params=None, **kwargs) -> "requests.Response":
+        return self.get_session(url).request(method, url, params=params, **kwargs)
+
+    def open_connections(self, url: str, number: int) -> int:
+        """
+        Open connections to the host of the URL and keep them in its pool.
+
+        :return: the number of open connections in the pool
+        """
+        session = self.get_session(url)
+        adapter = session.get_adapter(url)
+        request = requests.Request("GET", url).prepare()
+        if hasattr(adapter, "get_connection_with_tls_context"):
+            pool = adapter.get_connection_with_tls_context(
+                request, verify=session.verify, cert=session.cert
+            )
+        else:
+            pool = adapter.get_connection(url)
+
+        # there's no public API to fill a pool, this works for urllib3 1.26 and 2.x
+        connections = []
+        try:
+            for _ in range(min(number, self.pool_maxsize)):
+                connection = pool._get_conn()
+                connections.append(connection)
+                if connection.sock is None:
+                    connection.connect()
+        finally:
+            for connection in connections:
+                pool._put_conn(connection)
+        return len(connections)
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+def get_host_url(url: str) -> str:
+    """
+    Return the scheme and network location of the URL, e.g. ``https://host:8000``.
+    """
+    start = url.find("://")
+    end = url.find("/", start + 3) if start != -1 else -1
+    return url if end == -1 else url[:end]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_adapter_class():
+    """
+    Build the :class:`requests.adapters.HTTPAdapter` resolving host names through a
+    :class:`zds_client.dns.DNSCache`.
+
+    The classes are built on first use, so that ``requests`` is imported lazily.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class CachedDNSMixin:
+        dns_cache = None
+
+        def _new_conn(self):
+            # connect to the cached addresses in turn, like
+            # ``urllib3.util.connection.create_connection`` - TLS still verifies
+            # ``self.host``
+            host = self._dns_host
+            error = None
+            try:
+                for address in self.dns_cache.resolve(host, self.port):
+                    self._dns_host = address[4][0]
+                    try:
+                        return super()._new_conn()
+                    except Exception as exc:
+                        error = exc
+            finally:
+                self._dns_host = host
+            self.dns_cache.forget(host, self.port)
+            raise error
+
+    class CachedDNSAdapter(HTTPAdapter):
+        def __init__(self, dns_cache: Optional[DNSCache] = None, **kwargs):
+            self.dns_cache = dns_cache
+            super().__init__(**kwargs)
+
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            if self.dns_cache is None:
+                return
+            attrs = {"dns_cache": self.dns_cache}
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": type(
+                    "HTTPConnectionPool",
+                    (HTTPConnectionPool,),
+                    {
+                        "ConnectionCls": type(
+                            "HTTPConnection", (CachedDNSMixin, HTTPConnection), attrs
+                        )
+                    },
+                ),
+                "https": type(
+                    "HTTPSConnectionPool",
+                    (HTTPSConnectionPool,),
+                    {
+                        "ConnectionCls": type(
+                            "HTTPSConnection", (CachedDNSMixin, HTTPSConnection), attrs
+                        )
+                    },
+                ),
+            }
+
+    return CachedDNSAdapter
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize the URL for matching, ignoring the order of the query parameters.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+
+def hash_body(body: Union[bytes, str, None], headers=None) -> Optional[str]:
+    """
+    Hash a request body, as sent. Compressed bodies are hashed decompressed.
+    """
+    if not body:
+        return None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if headers is not None and headers.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return hashlib.sha256(body).hexdigest()
+
+
+class RecordingTransport:
+    """
+    Record all requests and responses to an append-only JSON Lines file.
+
+    Records are written by a background thread, so the overhead for the calling
+    thread is limited to building the record. Paths ending in ``.gz`` are gzip
+    compressed. Credentials (``Authorization`` and cookie headers) are never
+    recorded.
+
+    Streamed response bodies are recorded as they are read, so they're still read
+    in a streaming way (e.g. enforcing a maximum response size or a deadline). A
+    streamed response is recorded once its body was read completely - responses
+    that were closed early are not recorded.
+
+    :param path: the file to append the records to
+    :param transport: the transport actually sending the requests, defaults to
+      :class:`RequestsTransport`
+    :param max_queue: the maximum number of records waiting to be written. When
+      the writer can't keep up, records are dropped rather than blocking requests.
+    """
+
+    def __init__(self, path: str, transport=None, max_queue: int = 10000):
+        self.path = path
+        self.transport = transport or RequestsTransport()
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+    def send(self, method: str, url: str, params=None, **kwargs) -> "requests.Response":
+        start = time.perf_counter()
+        response = self.transport.send(method, url, params=params, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        if response._content is False:
+            self._tee(method, response, elapsed)
+        else:
+            self._put(self._get_record(method, response, elapsed, response.content))
+        return response
+
+    def _put(self, record: dict) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _tee(self, method: str, response, elapsed: float) -> None:
+        # both iterating and reading ``response.content`` go through iter_content
+        iter_content = response.iter_content
+
+        def tee(chunk_size=1, decode_unicode=False):
+            chunks = []
+            for chunk in iter_content(chunk_size, decode_unicode):
+                chunks.append(
+                    chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                )
+                yield chunk
+            content = b"".join(chunks)
+            self._put(self._get_record(method, response, elapsed, content))
+
+        response.iter_content = tee
+
+    def _get_record(
+        self, method: str, response, elapsed: float, content: bytes
+    ) -> dict:
+        request = response.request
+        record = {
+            "timestamp": time.time(),
+            "method": method.upper(),
+            "url": request.url if request is not None else response.url,
+            "body_hash": hash_body(request.body, request.headers) if request else None,
+            "request_headers": {
+                header: value
+                for header, value in (request.headers if request else {}).items()
+                if header.lower() not in REDACTED_HEADERS
+            },
+            "status": response.status_code,
+            "headers": {
+                header: value
+                for header, value in response.headers.items()
+                if header.lower() not in TRANSFER_HEADERS
+            },
+            "elapsed": elapsed,
+        }
+        try:
+            record["content"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            record["content_b64"] = base64.b64encode(content).decode("ascii")
+        return record
+
+    def _write(self) -> None:
+        closed = False
+        while not closed:
+            # batch the records that are waiting, to limit the file opens
+            records = [self._queue.get()]
+            while len(records) < 1000:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closed = None in records
+            try:
+                self._append([record for record in records if record is not None])
+            except Exception:
+                logger.exception("Writing the recording to %s failed", self.path)
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+
+    def _append(self, records: list) -> None:
+        with _open(self.path, "a") as outfile:
+            for record in records:
+                outfile.write(json.dumps(record) + "\n")
+
+    def flush(self) -> None:
+        """
+        Block until all pending records are written.
+        """
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join()
+
+
+class RecordingNotFound(LookupError):
+    """
+    No recording matches the request.
+    """
+
+
+class ReplayTransport:
+    """
+    Serve recorded responses, matched on method, URL and request body.
+
+    Recordings are loaded in memory once, so responses are served at high
+    throughput. When a request matches multiple recordings, they are served in
+    turn.
+
+    :param path: the recording file, as written by :class:`RecordingTransport`
+    :param latency: ``"recorded"`` to delay each response with its recorded
+      duration, a callable returning a delay in seconds, or ``None`` to not delay
+      responses at all
+    """
+
+    def __init__(
+        self, path: str, latency: Union[None, str, Callable[[], float]] = None
+    ):
+        self.path = path
+        self.latency = latency
+        self._recordings = {}
+
+        recordings = {}
+        with _open(path, "r") as infile:
+            for line in infile:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "content_b64" in record:
+                    record["content"] = base64.b64decode(record["content_b64"])
+                else:
+                    record["content"] = record["content"].encode("utf-8")
+                key = (
+                    record["method"],
+                    normalize_url(record["url"]),
+                    record["body_hash"],
+                )
+                recordings.setdefault(key, []).append(record)
+
+        self._recordings = {
+            key: itertools.cycle(records) for key, records in recordings.items()
+        }
+        self.size = sum(len(records) for records in recordings.values())
+
+    def __len__(self):
+        return self.size
+
+    def send(self, method: str, url: str, params=None, **kwargs) -> "requests.Response":
+        request = requests.Request(
+            method=method,
+            url=url,
+            headers=kwargs.get("headers"),
+            params=params,
+            data=kwargs.get("data"),
+            json=kwargs.get("json"),
+        ).prepare()
+        key = (
+            method.upper(),
+            normalize_url(request.url),
+            hash_body(request.body, request.headers),
+        )
+        try:
+            record = next(self._recordings[key])
+        except KeyError:
+            raise RecordingNotFound("No recording for {} {}".format(method, url))
+
+        delay = self._get_delay(record)
+        if delay:
+            time.sleep(delay)
+
+        from http.client import responses
+
+        response = requests.Response()
+        response.status_code = record["status"]
+        response.headers = requests.structures.CaseInsensitiveDict(record["headers"])
+        # like a live response, read (by requests) unless streamed
+        response.raw = io.BytesIO(record["content"])
+        if not kwargs.get("stream"):
+            response._content = response.raw.read()
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.reason = responses.get(record["status"], "")
+        return response
+
+    def _get_delay(self, record: dict) -> float:
+        if self.latency == "recorded":
+            return record["elapsed"]
+        if callable(self.latency):
+            return self.latency()
+        return 0
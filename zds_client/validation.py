@@ -0,0 +1,476 @@
+"""
+Validate request bodies locally, against the ``requestBody`` schema of the operation.
+
+Invalid payloads are otherwise only rejected by the API, with a 400 response. The
+validators are compiled once per operation and cached with the compiled schema,
+so they're cheap enough to run on every call:
+
+>>> Client.validate_requests = True
+>>> client.create("zaak", {"bronorganisatie": "000000000"})
+Traceback (most recent call last):
+  ...
+ValidationError: ... 'invalidParams': [{'name': 'zaaktype', 'code': 'required', ...
+
+Bulk pipelines can validate records without sending them:
+
+>>> validator = get_request_validator(client.schema, "zaak_create")
+>>> validator.errors(record)
+[]
+
+The supported subset of the OAS 3.0 schema object is what the APIs use: ``type``,
+``nullable``, ``enum``, ``format`` (``date``, ``date-time``, ``uri`` and
+``uuid``), string lengths and ``pattern``, number bounds, array items and
+lengths, object ``properties``, ``required`` and ``additionalProperties``
+schemas, ``allOf``, ``anyOf``, ``oneOf`` and ``$ref``. Like the APIs, unknown and
+read-only properties are ignored rather than rejected.
+
+Validation is never stricter than the APIs: integral numbers like ``1.0`` are
+valid integers, and patterns that Python can't compile (ECMA-262 only syntax)
+are not checked.
+"""
+import datetime
+import functools
+import logging
+import re
+import uuid
+from typing import Any, Callable, Dict, List
+from urllib.parse import urlparse
+
+from .client import ClientError
+from .schema import compile_schema, resolve_reference
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["RequestValidator", "ValidationError", "get_request_validator"]
+
+# validate(value, path, errors) -> False if the value has the wrong type
+Check = Callable[[Any, str, list], Any]
+
+NON_FIELD_ERRORS = "nonFieldErrors"
+
+DATE_PATTERN = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+
+DATETIME_PATTERN = re.compile(
+    r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$"
+)
+
+TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list, tuple),
+    "object": (dict,),
+}
+
+
+class ValidationError(ClientError):
+    """
+    The request body doesn't match the schema of the operation.
+
+    Like for a 400 response of the API, the argument is the error payload, with
+    the errors per field in ``invalidParams``.
+    """
+
+    def __init__(self, invalid_params: List[dict]):
+        super().__init__(
+            {
+                "code": "invalid",
+                "title": "Invalid input.",
+                "status": 400,
+                "detail": "",
+                "invalidParams": invalid_params,
+            }
+        )
+
+    @property
+    def invalid_params(self) -> List[dict]:
+        return self.args[0]["invalidParams"]
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_pattern(pattern: str):
+    """
+    Compile a pattern on first use, ``None`` if it's not a valid Python regex.
+    """
+    try:
+        return re.compile(pattern).search
+    except re.error:
+        logger.warning("Pattern %r can't be compiled and is not validated", pattern)
+        return None
+
+
+def _error(errors: list, path: str, code: str, reason: str) -> None:
+    errors.append({"name": path or NON_FIELD_ERRORS, "code": code, "reason": reason})
+
+
+def _join(path: str, name) -> str:
+    return "{}.{}".format(path, name) if path else str(name)
+
+
+def _is_date(value: str) -> bool:
+    # cheaper than strptime
+    match = DATE_PATTERN.match(value)
+    if match is None:
+        return False
+    try:
+        datetime.date(*map(int, match.groups()))
+    except ValueError:
+        return False
+    return True
+
+
+def _is_uri(value: str) -> bool:
+    parsed = urlparse(value)
+    return bool(parsed.scheme and parsed.netloc)
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+FORMATS = {
+    "date": _is_date,
+    "date-time": lambda value: DATETIME_PATTERN.match(value) is not None,
+    "uri": _is_uri,
+    "uuid": _is_uuid,
+}
+
+
+class _Compiler:
+    """
+    Compile schema objects to validation functions.
+
+    :param partial: don't check required properties, for partial updates
+    """
+
+    def __init__(self, spec: dict, partial: bool = False):
+        self.spec = spec
+        self.partial = partial
+        self._references = {}
+
+    def compile(self, schema: dict) -> Check:
+        if "$ref" in schema:
+            return self._compile_reference(schema["$ref"])
+
+        checks = []
+        nullable = schema.get("nullable", False)
+        _type = schema.get("type")
+
+        if _type in TYPES:
+            checks.append(self._compile_type(_type))
+        if "enum" in schema:
+            checks.append(self._compile_enum(schema["enum"]))
+        if _type == "string" or _type is None:
+            checks.extend(self._compile_string(schema))
+        if _type in ("integer", "number"):
+            checks.extend(self._compile_number(schema))
+        if _type == "array" or "items" in schema:
+            checks.extend(self._compile_array(schema))
+        if _type == "object" or "properties" in schema:
+            checks.extend(self._compile_object(schema))
+        for sub_schema in schema.get("allOf", []):
+            checks.append(self.compile(sub_schema))
+        for keyword in ("anyOf", "oneOf"):
+            if keyword in schema:
+                checks.append(self._compile_any_of(schema[keyword]))
+
+        def validate(value, path, errors):
+            if value is None:
+                if not nullable and _type is not None:
+                    _error(errors, path, "null", "This field may not be null.")
+                return
+            for check in checks:
+                if check(value, path, errors) is False:
+                    return
+
+        return validate
+
+    def _compile_reference(self, reference: str) -> Check:
+        if reference in self._references:
+            # (mutually) recursive schema, resolved once compiled
+            cell = self._references[reference]
+            return lambda value, path, errors: cell[0](value, path, errors)
+
+        cell = self._references[reference] = [None]
+        cell[0] = self.compile(resolve_reference(self.spec, reference))
+        return cell[0]
+
+    def _compile_type(self, _type: str) -> Check:
+        types = TYPES[_type]
+        reason = "Invalid type, expected {}.".format(_type)
+        exclude_bool = _type in ("integer", "number")
+
+        def check(value, path, errors):
+            if _type == "integer" and isinstance(value, float) and value.is_integer():
+                # accepted by the APIs, e.g. 1.0
+                return
+            if not isinstance(value, types) or (
+                exclude_bool and isinstance(value, bool)
+            ):
+                _error(errors, path, "invalid", reason)
+                return False
+
+        return check
+
+    def _compile_enum(self, enum: list) -> Check:
+        choices = set(choice for choice in enum if choice is not None)
+        reason = "Invalid choice, expected one of {}.".format(
+            ", ".join(repr(choice) for choice in enum)
+        )
+
+        def check(value, path, errors):
+            try:
+                valid = value in choices
+            except TypeError:
+                valid = False
+            if not valid:
+                _error(errors, path, "invalid_choice", reason)
+
+        return check
+
+    def _compile_string(self, schema: dict) -> List[Check]:
+        checks = []
+        min_length = schema.get("minLength")
+        max_length = schema.get("maxLength")
+        if min_length is not None or max_length is not None:
+
+            def check_length(value, path, errors):
+                if not isinstance(value, str):
+                    return
+                if min_length is not None and len(value) < min_length:
+                    _error(
+                        errors,
+                        path,
+                        "min_length",
+                        "Ensure this field has at least {} characters.".format(
+                            min_length
+                        ),
+                    )
+                elif max_length is not None and len(value) > max_length:
+                    _error(
+                        errors,
+                        path,
+                        "max_length",
+                        "Ensure this field has no more than {} characters.".format(
+                            max_length
+                        ),
+                    )
+
+            checks.append(check_length)
+
+        if "pattern" in schema:
+            pattern = schema["pattern"]
+            reason = "The value does not match the pattern {}.".format(pattern)
+
+            def check_pattern(value, path, errors):
+                if not isinstance(value, str):
+                    return
+                search = _compile_pattern(pattern)
+                if search is not None and search(value) is None:
+                    _error(errors, path, "invalid", reason)
+
+            checks.append(check_pattern)
+
+        is_valid = FORMATS.get(schema.get("format"))
+        if is_valid is not None:
+            reason = "Invalid format, expected {}.".format(schema["format"])
+
+            def check_format(value, path, errors):
+                # empty strings are allowed for optional fields
+                if isinstance(value, str) and value and not is_valid(value):
+                    _error(errors, path, "invalid", reason)
+
+            checks.append(check_format)
+        return checks
+
+    def _compile_number(self, schema: dict) -> List[Check]:
+        minimum = schema.get("minimum")
+        maximum = schema.get("maximum")
+        if minimum is None and maximum is None:
+            return []
+        exclusive_minimum = schema.get("exclusiveMinimum", False)
+        exclusive_maximum = schema.get("exclusiveMaximum", False)
+
+        def check(value, path, errors):
+            if minimum is not None and (
+                value < minimum or (exclusive_minimum and value == minimum)
+            ):
+                _error(
+                    errors,
+                    path,
+                    "min_value",
+                    "Ensure this value is greater than {}.".format(minimum),
+                )
+            if maximum is not None and (
+                value > maximum or (exclusive_maximum and value == maximum)
+            ):
+                _error(
+                    errors,
+                    path,
+                    "max_value",
+                    "Ensure this value is less than {}.".format(maximum),
+                )
+
+        return [check]
+
+    def _compile_array(self, schema: dict) -> List[Check]:
+        validate_item = self.compile(schema["items"]) if "items" in schema else None
+        min_items = schema.get("minItems")
+        max_items = schema.get("maxItems")
+        unique = schema.get("uniqueItems", False)
+
+        def check(value, path, errors):
+            if not isinstance(value, (list, tuple)):
+                return
+            if min_items is not None and len(value) < min_items:
+                _error(
+                    errors,
+                    path,
+                    "min_length",
+                    "Ensure this field has at least {} elements.".format(min_items),
+                )
+            if max_items is not None and len(value) > max_items:
+                _error(
+                    errors,
+                    path,
+                    "max_length",
+                    "Ensure this field has no more than {} elements.".format(max_items),
+                )
+            if unique and len(set(map(repr, value))) != len(value):
+                _error(errors, path, "unique", "The elements must be unique.")
+            if validate_item is not None:
+                for index, item in enumerate(value):
+                    validate_item(item, _join(path, index), errors)
+
+        return [check]
+
+    def _compile_object(self, schema: dict) -> List[Check]:
+        properties = {
+            name: self.compile(sub_schema)
+            for name, sub_schema in schema.get("properties", {}).items()
+            if not self._is_read_only(sub_schema)
+        }
+        required = (
+            ()
+            if self.partial
+            else tuple(
+                name for name in schema.get("required", []) if name in properties
+            )
+        )
+        additional = schema.get("additionalProperties")
+        validate_additional = (
+            self.compile(additional) if isinstance(additional, dict) else None
+        )
+
+        def check(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    _error(
+                        errors, _join(path, name), "required", "This field is required."
+                    )
+            for name, item in value.items():
+                validate = properties.get(name)
+                if validate is None:
+                    validate = validate_additional
+                    if validate is None:
+                        continue
+                validate(item, _join(path, name), errors)
+
+        return [check]
+
+    def _compile_any_of(self, schemas: List[dict]) -> Check:
+        validators = [self.compile(schema) for schema in schemas]
+
+        def check(value, path, errors):
+            for validate in validators:
+                sub_errors = []
+                validate(value, path, sub_errors)
+                if not sub_errors:
+                    return
+            _error(
+                errors, path, "invalid", "The value does not match any of the schemas."
+            )
+
+        return check
+
+    def _is_read_only(self, schema: dict) -> bool:
+        while "$ref" in schema:
+            schema = resolve_reference(self.spec, schema["$ref"])
+        return schema.get("readOnly", False)
+
+
+class RequestValidator:
+    """
+    Validate the request bodies of a single operation.
+    """
+
+    __slots__ = ("operation_id", "partial", "_validate")
+
+    def __init__(self, spec: dict, operation_id: str, schema: dict, partial=False):
+        self.operation_id = operation_id
+        self.partial = partial
+        self._validate = (
+            _Compiler(spec, partial=partial).compile(schema) if schema else None
+        )
+
+    def __repr__(self):
+        return "<%s: %s partial=%r>" % (
+            self.__class__.__name__,
+            self.operation_id,
+            self.partial,
+        )
+
+    def errors(self, data: Any) -> List[dict]:
+        """
+        Return the validation errors of the request body, in ``invalidParams`` form.
+        """
+        errors = []
+        if self._validate is not None:
+            self._validate(data, "", errors)
+        return errors
+
+    def validate(self, data: Any) -> None:
+        """
+        :raises: :class:`ValidationError` if the request body is invalid
+        """
+        errors = self.errors(data)
+        if errors:
+            raise ValidationError(errors)
+
+
+def _get_request_body_schema(spec: dict, definition: dict) -> Dict:
+    body = definition.get("requestBody")
+    if body is None:
+        return {}
+    if "$ref" in body:
+        body = resolve_reference(spec, body["$ref"])
+    return body.get("content", {}).get("application/json", {}).get("schema", {})
+
+
+def get_request_validator(
+    spec: dict, operation_id: str, partial: bool = False
+) -> RequestValidator:
+    """
+    Return the (cached) validator of the request bodies of an operation.
+
+    :param partial: validate partial updates, without required properties
+    :raises: :class:`ValueError` if the operation is not in the schema
+    """
+    operation = compile_schema(spec).get_operation(operation_id)
+    validator = operation.request_validators.get(partial)
+    if validator is None:
+        validator = RequestValidator(
+            spec,
+            operation_id,
+            _get_request_body_schema(spec, operation.definition),
+            partial=partial,
+        )
+        operation.request_validators[partial] = validator
+    return validator